@@ -1,4 +1,5 @@
 import json
+from collections import defaultdict
 from functools import cached_property
 
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
@@ -97,6 +98,8 @@ class TaggedModelMixin(models.Model, AnnotationMixin):
 
     def add_tag(self, tag: Tag, team: Team, added_by: CustomUser):
         self.tags.add(tag, through_defaults={"team": team, "user": added_by})
+        # the cached tags are out of date
+        self.__dict__.pop("tags_json", None)
 
     def user_tag_names(self):
         return {tag["name"] for tag in self.tags_json if not tag["is_system_tag"]}
@@ -107,30 +110,52 @@ class TaggedModelMixin(models.Model, AnnotationMixin):
     def all_tag_names(self):
         return [tag["name"] for tag in self.tags_json]
 
+    def get_tag_name(self, category: TagCategories) -> str | None:
+        """Returns the name of the first tag (by name) in `category`"""
+        return min((tag["name"] for tag in self.tags_json if tag["category"] == category), default=None)
+
     @cached_property
     def tags_json(self):
-        tagged_items = CustomTaggedItem.objects.filter(
-            content_type__model=self._meta.model_name, content_type__app_label=self._meta.app_label, object_id=self.id
-        ).prefetch_related("tag", "user")
-        tags = []
-        for tagged_item in tagged_items:
-            if tagged_item.tag.is_system_tag:
-                added_by = "System"
-            elif tagged_item.user and tagged_item.user.email:
-                added_by = tagged_item.user.email
-            else:
-                added_by = "Participant"
-
-            tags.append(
-                {
-                    "name": tagged_item.tag.name,
-                    "id": tagged_item.tag.id,
-                    "is_system_tag": tagged_item.tag.is_system_tag,
-                    "category": tagged_item.tag.category,
-                    "added_by": added_by,
-                }
+        return [_tagged_item_to_json(tagged_item) for tagged_item in self._get_tagged_items(object_id=self.id)]
+
+    @classmethod
+    def prefetch_tags(cls, objects: list["TaggedModelMixin"]):
+        """Loads the tags of all the `objects` with a single query, so that `tags_json` and the methods that use it
+        don't query the tags of each object"""
+        tags_by_object_id = defaultdict(list)
+        if object_ids := {obj.id for obj in objects}:
+            for tagged_item in cls._get_tagged_items(object_id__in=object_ids):
+                tags_by_object_id[tagged_item.object_id].append(_tagged_item_to_json(tagged_item))
+
+        for obj in objects:
+            obj.__dict__["tags_json"] = tags_by_object_id[obj.id]
+
+    @classmethod
+    def _get_tagged_items(cls, **filters):
+        return (
+            CustomTaggedItem.objects.filter(
+                content_type__model=cls._meta.model_name, content_type__app_label=cls._meta.app_label, **filters
             )
-        return tags
+            .select_related("tag", "user")
+            .order_by("id")
+        )
+
+
+def _tagged_item_to_json(tagged_item: CustomTaggedItem) -> dict:
+    if tagged_item.tag.is_system_tag:
+        added_by = "System"
+    elif tagged_item.user and tagged_item.user.email:
+        added_by = tagged_item.user.email
+    else:
+        added_by = "Participant"
+
+    return {
+        "name": tagged_item.tag.name,
+        "id": tagged_item.tag.id,
+        "is_system_tag": tagged_item.tag.is_system_tag,
+        "category": tagged_item.tag.category,
+        "added_by": added_by,
+    }
 
 
 class UserComment(BaseTeamModel):
@@ -1,7 +1,15 @@
+import contextvars
+import json
+import logging
+import queue
 import textwrap
+import threading
 import time
 import uuid
+from collections.abc import Iterator
 
+from django.db import connections
+from django.http import StreamingHttpResponse
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
 from rest_framework import serializers
@@ -11,9 +19,16 @@ from rest_framework.response import Response
 
 from apps.api.serializers import ExperimentSessionCreateSerializer, MessageSerializer
 from apps.channels.tasks import handle_api_message
+from apps.chat import streaming
+
+logger = logging.getLogger("ocs.api")
 
 create_chat_completion_request = inline_serializer(
-    "CreateChatCompletionRequest", {"messages": MessageSerializer(many=True)}
+    "CreateChatCompletionRequest",
+    {
+        "messages": MessageSerializer(many=True),
+        "stream": serializers.BooleanField(required=False, default=False),
+    },
 )
 
 create_chat_completion_response = inline_serializer(
@@ -97,6 +112,9 @@ def chat_completions_schema(versioned: bool):
 
         reply = completion.choices[0].message
         ```
+
+        Set `stream=True` to receive the response as a stream of `chat.completion.chunk` objects
+        (server-sent events) while it is being generated.
         """
     )
 
@@ -147,16 +165,31 @@ def _chat_completions(request, experiment_id: uuid.UUID, version=None):
 
     session = serializer.save()
     experiment_version = session.experiment.get_version(version) if version is not None else session.experiment_version
-    response_message = handle_api_message(
-        request.user,
-        experiment_version,
-        session.experiment_channel,
-        last_message.get("content"),
-        session.participant.identifier,
-        session,
-    )
+
+    def _get_response():
+        return handle_api_message(
+            request.user,
+            experiment_version,
+            session.experiment_channel,
+            last_message.get("content"),
+            session.participant.identifier,
+            session,
+        )
+
+    completion_id = str(session.external_id)
+    created = int(time.time())
+    model = session.experiment.get_llm_provider_model_name()
+    if request.data.get("stream"):
+        response = StreamingHttpResponse(
+            _stream_completion_chunks(_get_response, completion_id, created, model), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    response_message = _get_response()
     completion = {
-        "id": session.external_id,
+        "id": completion_id,
         "choices": [
             {
                 "finish_reason": "stop",
@@ -164,13 +197,82 @@ def _chat_completions(request, experiment_id: uuid.UUID, version=None):
                 "message": {"role": "assistant", "content": response_message},
             }
         ],
-        "created": int(time.time()),
-        "model": session.experiment.get_llm_provider_model_name(),
+        "created": created,
+        "model": model,
         "object": "chat.completion",
     }
     return Response(data=completion)
 
 
+def _stream_completion_chunks(get_response, completion_id, created, model) -> Iterator[str]:
+    """Generates the response in a separate thread and yields its tokens as `chat.completion.chunk` events.
+
+    Bots that don't stream their tokens produce a single chunk containing the complete response.
+    """
+    events = queue.Queue()
+
+    def _generate():
+        try:
+            with streaming.token_callback(lambda token: events.put(("token", token))):
+                events.put(("done", get_response()))
+        except Exception:
+            logger.exception("Error generating streamed chat completion")
+            events.put(("error", "An error occurred while generating the response"))
+        finally:
+            # the thread's connections are not managed by the request cycle
+            connections.close_all()
+
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(_generate,), daemon=True).start()
+
+    def _chunk(delta, finish_reason=None):
+        chunk = {
+            "id": completion_id,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            "created": created,
+            "model": model,
+            "object": "chat.completion.chunk",
+        }
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    yield _chunk({"role": "assistant", "content": ""})
+    streamed_content = ""
+    while True:
+        try:
+            event, data = events.get(timeout=streaming.STREAM_READ_TIMEOUT_SECONDS)
+        except queue.Empty:
+            # the generating thread is left to finish on its own since threads can't be stopped
+            logger.error("Timed out waiting for the streamed chat completion %s", completion_id)
+            yield _error_event("Timed out waiting for the response")
+            break
+
+        if event == "token":
+            streamed_content += data
+            yield _chunk({"content": data})
+        elif event == "done":
+            data = data or ""
+            if not data.startswith(streamed_content):
+                # the bot changed its response after it was streamed, so the client doesn't have the actual response
+                logger.warning("Streamed chat completion %s doesn't match the response", completion_id)
+                yield _error_event("The streamed response was replaced. Retry the request without streaming.")
+                break
+
+            # send whatever part of the response wasn't streamed
+            if len(data) > len(streamed_content):
+                yield _chunk({"content": data[len(streamed_content) :]})
+            yield _chunk({}, finish_reason="stop")
+            break
+        else:
+            yield _error_event(data)
+            break
+    yield "data: [DONE]\n\n"
+
+
+def _error_event(message: str) -> str:
+    error = {"error": {"message": message, "type": "error", "param": None, "code": None}}
+    return f"data: {json.dumps(error)}\n\n"
+
+
 def _make_error_response(status_code, message):
     data = {"error": {"message": message, "type": "error", "param": None, "code": None}}
     return Response(data=data, status=status_code)
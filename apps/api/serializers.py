@@ -149,7 +149,11 @@ class ExperimentSessionCreateSerializer(serializers.ModelSerializer):
         messages = validated_data.pop("messages", [])
         instance = super().create(validated_data)
         if messages:
-            ChatMessage.objects.bulk_create([ChatMessage(chat=instance.chat, **message) for message in messages])
+            messages = ChatMessage.objects.bulk_create(
+                [ChatMessage(chat=instance.chat, **message) for message in messages]
+            )
+            ExperimentSession.objects.update_last_message_timestamps(messages)
+            instance.refresh_from_db(fields=ExperimentSession.MESSAGE_TIMESTAMP_FIELDS)
         return instance
 
 
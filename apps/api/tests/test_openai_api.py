@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 from unittest.mock import call, patch
 
 import pytest
@@ -8,6 +9,8 @@ from openai import OpenAI
 from pytest_django.fixtures import live_server_helper
 
 from apps.api.models import UserAPIKey
+from apps.api.openai import _stream_completion_chunks
+from apps.chat import streaming
 from apps.experiments.models import ExperimentSession
 from apps.utils.factories.experiment import ExperimentFactory
 from apps.utils.tests.clients import ApiTestClient
@@ -90,6 +93,72 @@ def test_chat_completion(mock_experiment_response, experiment, api_key, live_ser
     ]
 
 
+@pytest.mark.django_db(
+    available_apps=["apps.api", "apps.experiments", "apps.teams", "apps.users"],
+    serialized_rollback=True,
+)
+@patch("apps.chat.channels.ApiChannel._get_bot_response")
+def test_chat_completion_stream(mock_experiment_response, experiment, api_key, live_server):
+    def _get_bot_response(message):
+        token_callback = streaming.get_token_callback()
+        for token in ["So, this ain't ", "the end"]:
+            token_callback(token)
+        return "So, this ain't the end, I saw you again today"
+
+    mock_experiment_response.side_effect = _get_bot_response
+    client = OpenAI(api_key=api_key, base_url=f"{live_server.url}/api/openai/{experiment.public_id}")
+
+    chunks = list(
+        client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": "Sing a song for me"}],
+            stream=True,
+        )
+    )
+
+    session = ExperimentSession.objects.first()
+    assert {chunk.id for chunk in chunks} == {session.external_id}
+    assert [chunk.choices[0].delta.content for chunk in chunks] == [
+        "",
+        "So, this ain't ",
+        "the end",
+        ", I saw you again today",
+        None,
+    ]
+    assert chunks[-1].choices[0].finish_reason == "stop"
+
+
+def test_chat_completion_stream_with_replaced_response():
+    def _get_response():
+        streaming.get_token_callback()("Here is how to do it")
+        # e.g. the bot rewrote its response after generating it
+        return "Sorry, I can't help with that"
+
+    events = list(_stream_completion_chunks(_get_response, "completion-id", 0, "gpt-4o"))
+
+    deltas = [json.loads(event[len("data: ") :])["choices"][0]["delta"] for event in events[:2]]
+    assert deltas == [{"role": "assistant", "content": ""}, {"content": "Here is how to do it"}]
+    assert json.loads(events[2][len("data: ") :])["error"]["message"].startswith("The streamed response was replaced")
+    assert events[3:] == ["data: [DONE]\n\n"]
+
+
+@patch("apps.chat.streaming.STREAM_READ_TIMEOUT_SECONDS", 0.1)
+def test_chat_completion_stream_timeout():
+    response_generated = threading.Event()
+
+    def _get_response():
+        response_generated.wait(timeout=5)
+        return "Too late"
+
+    try:
+        events = list(_stream_completion_chunks(_get_response, "completion-id", 0, "gpt-4o"))
+    finally:
+        response_generated.set()
+
+    assert json.loads(events[1][len("data: ") :])["error"]["message"] == "Timed out waiting for the response"
+    assert events[2:] == ["data: [DONE]\n\n"]
+
+
 @pytest.mark.django_db()
 def test_unsupported_message_type(experiment):
     user = experiment.team.members.first()
@@ -57,10 +57,11 @@ files, as well as those provided by the assistant.
 
 import logging
 import pathlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps
-from io import BytesIO
 
 import openai
+from django.core.cache import cache
 from django.db.models import Count, Subquery
 from django.forms import ValidationError
 from langchain_core.utils.function_calling import convert_to_openai_tool as lc_convert_to_openai_tool
@@ -77,6 +78,11 @@ from apps.utils.prompt import validate_prompt_variables
 
 logger = logging.getLogger("ocs.openai_sync")
 
+# The maximum number of files that are uploaded to OpenAI at the same time
+FILE_UPLOAD_MAX_WORKERS = 8
+# How long the IDs of the files in a vector store are cached after a sync
+VECTOR_STORE_FILES_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 class OpenAiSyncError(Exception):
     pass
@@ -399,31 +405,55 @@ def _sync_tool_resource_files_from_openai(file_ids, ocs_resource):
 
 
 def _sync_vector_store_files_to_openai(client, vector_store_id, files_ids: list[str]):
-    kwargs = {}
-    to_delete_remote = []
+    remote_file_ids = _get_vector_store_file_ids(client, vector_store_id)
+    to_delete_remote = remote_file_ids - set(files_ids)
+    to_add_remote = [file_id for file_id in files_ids if file_id not in remote_file_ids]
+    try:
+        for file_id in to_delete_remote:
+            try:
+                client.beta.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
+            except openai.NotFoundError:
+                # the cached file IDs are out of date
+                pass
+            remote_file_ids.discard(file_id)
+
+        for chunk in chunk_list(to_add_remote, 500):
+            client.beta.vector_stores.file_batches.create(vector_store_id=vector_store_id, file_ids=chunk)
+            remote_file_ids.update(chunk)
+    finally:
+        # cache the progress so that a failed sync resumes where it stopped
+        _set_vector_store_file_ids(vector_store_id, remote_file_ids)
+
+
+def _get_vector_store_file_ids(client, vector_store_id) -> set[str]:
+    """Returns the IDs of the files in the vector store. The IDs are cached by each sync, so the files only need to
+    be listed from OpenAI if the vector store hasn't been synced recently."""
+    if (file_ids := cache.get(_get_vector_store_files_cache_key(vector_store_id))) is not None:
+        return set(file_ids)
 
+    file_ids = set()
+    kwargs = {}
     while True:
         vector_store_files = client.beta.vector_stores.files.list(
             order="asc",
             vector_store_id=vector_store_id,
             **kwargs,
         )
-        for v_file in vector_store_files.data:
-            try:
-                files_ids.remove(v_file.id)
-            except ValueError:
-                to_delete_remote.append(v_file.id)
-
+        file_ids.update(v_file.id for v_file in vector_store_files.data)
         if not vector_store_files.has_more:
             break
         kwargs["after"] = vector_store_files.last_id
+    return file_ids
 
-    for file_id in to_delete_remote:
-        client.beta.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
 
-    if files_ids:
-        for chunk in chunk_list(files_ids, 500):
-            client.beta.vector_stores.file_batches.create(vector_store_id=vector_store_id, file_ids=chunk)
+def _set_vector_store_file_ids(vector_store_id, file_ids: set[str]):
+    cache.set(
+        _get_vector_store_files_cache_key(vector_store_id), sorted(file_ids), timeout=VECTOR_STORE_FILES_CACHE_TIMEOUT
+    )
+
+
+def _get_vector_store_files_cache_key(vector_store_id) -> str:
+    return f"vector_store_files:{vector_store_id}"
 
 
 def _ocs_assistant_to_openai_kwargs(assistant: OpenAiAssistant) -> dict:
@@ -484,8 +514,9 @@ def _update_or_create_vector_store(assistant, name, vector_store_id, file_ids) -
         return vector_store_id
 
     vector_store = client.beta.vector_stores.create(name=name, file_ids=file_ids[:100])
-    for chunk in chunk_list(file_ids[100:], 500):
-        client.beta.vector_stores.file_batches.create(vector_store_id=vector_store.id, file_ids=chunk)
+    _set_vector_store_file_ids(vector_store.id, set(file_ids[:100]))
+    # the remaining files are added by syncing the new vector store
+    _sync_vector_store_files_to_openai(client, vector_store.id, file_ids)
     return vector_store.id
 
 
@@ -513,22 +544,44 @@ def _openai_assistant_to_ocs_kwargs(assistant: Assistant, team=None, llm_provide
     return kwargs
 
 
-def create_files_remote(client, files):
-    file_ids = []
-    for file in files:
-        if not file.external_id:
-            _push_file_to_openai(client, file)
-        file_ids.append(file.external_id)
-    return file_ids
+def create_files_remote(client, files) -> list[str]:
+    """Uploads the files that haven't been uploaded to OpenAI and returns the OpenAI IDs of all the files.
+
+    Files are uploaded concurrently. The OpenAI ID of each file is saved as soon as the file is uploaded, so if some
+    of the uploads fail, only those files are uploaded when the sync is retried.
+    """
+    files = list(files)
+    if files_to_upload := [file for file in files if not file.external_id]:
+        _push_files_to_openai(client, files_to_upload)
+    return [file.external_id for file in files]
+
+
+def _push_files_to_openai(client, files: list[File]):
+    errors = []
+    max_workers = min(FILE_UPLOAD_MAX_WORKERS, len(files))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="openai_upload") as executor:
+        futures = {executor.submit(_upload_file_to_openai, client, file): file for file in files}
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                openai_file = future.result()
+            except Exception as e:
+                logger.warning("Unable to upload file %s to OpenAI: %s", file.id, e)
+                errors.append(e)
+                continue
+
+            file.external_id = openai_file.id
+            file.external_source = "openai"
+            file.save()
+
+    if errors:
+        raise errors[0]
 
 
-def _push_file_to_openai(client, file: File):
+def _upload_file_to_openai(client, file: File):
+    # The file is streamed from storage instead of being read into memory
     with file.file.open("rb") as fh:
-        bytesio = BytesIO(fh.read())
-    openai_file = _openai_create_file_with_retries(client, file.name, bytesio)
-    file.external_id = openai_file.id
-    file.external_source = "openai"
-    file.save()
+        return _openai_create_file_with_retries(client, file.name, fh)
 
 
 @retry(
@@ -538,9 +591,12 @@ def _push_file_to_openai(client, file: File):
     stop=stop_after_attempt(3),
     before_sleep=before_sleep_log(logger, logging.INFO),
 )
-def _openai_create_file_with_retries(client, filename, bytesio):
+def _openai_create_file_with_retries(client, filename, content):
     logger.debug("Creating file in OpenAI: %s", filename)
-    return client.files.create(file=(filename, bytesio), purpose="assistants")
+    if hasattr(content, "seek"):
+        # a previous attempt may have read some of the file
+        content.seek(0)
+    return client.files.create(file=(filename, content), purpose="assistants")
 
 
 def get_and_store_openai_file(client, file_id: str, team_id: int) -> File:
@@ -3,13 +3,17 @@ import re
 from io import BytesIO
 from unittest.mock import call, patch
 
+import openai
 import pytest
+from openai import OpenAI
 from openai.pagination import SyncCursorPage
 
 from apps.assistants.models import ToolResources
 from apps.assistants.sync import (
     OpenAiSyncError,
+    _sync_vector_store_files_to_openai,
     _update_or_create_vector_store,
+    create_files_remote,
     delete_openai_assistant,
     get_out_of_sync_files,
     import_openai_assistant,
@@ -343,3 +347,54 @@ def test_vector_store_create_batch_files(create_file_batch, create_vector_store,
         assert len(create_file_batch.call_args_list[1][1]["file_ids"]) == 180
     else:
         assert create_file_batch.call_count == 0
+
+
+@pytest.mark.django_db()
+def test_create_files_remote_saves_uploaded_files_when_an_upload_fails():
+    files = FileFactory.create_batch(3)
+    uploaded = FileObjectFactory.create_batch(2)
+
+    def _create_file(file, purpose):
+        if file[0] == files[1].name:
+            raise openai.APIConnectionError(request=None)
+        return uploaded[0] if file[0] == files[0].name else uploaded[1]
+
+    client = OpenAI(api_key="123")
+    with patch("openai.resources.Files.create", side_effect=_create_file):
+        with pytest.raises(openai.APIConnectionError):
+            create_files_remote(client, files)
+
+    for file in files:
+        file.refresh_from_db()
+    assert [file.external_id for file in files] == [uploaded[0].id, "", uploaded[1].id]
+
+    # only the failed file is uploaded when the sync is retried
+    with patch("openai.resources.Files.create", return_value=ObjectWithId(id="file_retried")) as file_create:
+        assert create_files_remote(client, files) == [uploaded[0].id, "file_retried", uploaded[1].id]
+    assert file_create.call_count == 1
+
+
+@pytest.mark.django_db()
+@patch("openai.resources.beta.vector_stores.file_batches.FileBatches.create")
+@patch("openai.resources.beta.vector_stores.files.Files.delete")
+@patch("openai.resources.beta.vector_stores.files.Files.list")
+def test_vector_store_files_are_cached_between_syncs(vs_files_list, vs_file_delete, file_batches):
+    client = OpenAI(api_key="123")
+    vs_files_list.return_value = SyncCursorPage(
+        data=[ObjectWithId(id="file_1"), ObjectWithId(id="file_2")],
+        object="list",
+        first_id="file_1",
+        last_id="file_2",
+        has_more=False,
+    )
+
+    _sync_vector_store_files_to_openai(client, "vs_123", ["file_1", "file_3"])
+    vs_file_delete.assert_called_once_with(vector_store_id="vs_123", file_id="file_2")
+    file_batches.assert_called_once_with(vector_store_id="vs_123", file_ids=["file_3"])
+
+    vs_file_delete.reset_mock()
+    file_batches.reset_mock()
+    _sync_vector_store_files_to_openai(client, "vs_123", ["file_1", "file_3", "file_4"])
+    assert vs_files_list.call_count == 1
+    vs_file_delete.assert_not_called()
+    file_batches.assert_called_once_with(vector_store_id="vs_123", file_ids=["file_4"])
@@ -1,19 +1,95 @@
+"""Audio conversion with ffmpeg.
+
+Audio is converted by a single ffmpeg process that reads the source audio from stdin and writes the converted audio
+to stdout. The audio is never decoded into memory. Some formats need to seek in their input (e.g. MP4 files with the
+`moov` atom at the end), so stdin is read through ffmpeg's `cache` protocol, which keeps what it has read.
+
+Converted audio is cached by the hash of its content, so audio that is sent more than once (e.g. a cached voice
+reply) is only converted once.
+"""
+
+import hashlib
+import struct
+import subprocess
 from io import BytesIO
 
 from pydub import AudioSegment
+from pydub.utils import get_prober_name
 
+from apps.chat.exceptions import AudioConversionException
+from apps.utils.lru import LRUCache
 
-def convert_audio(audio: BytesIO, target_format: str, source_format="ogg", codec=None) -> BytesIO:
-    audio = AudioSegment.from_file(audio, format=source_format)
-    # Convert to mono
-    audio = audio.set_channels(1)
+# Converted audio is usually a few hundred KB
+CONVERTED_AUDIO_CACHE_SIZE = 32
 
-    convertion_kwargs = {}
-    if codec:
-        convertion_kwargs["codec"] = codec
+_converted_audio_cache = LRUCache(maxsize=CONVERTED_AUDIO_CACHE_SIZE)
+
+# Read the input from stdin while allowing ffmpeg to seek back in it
+_SEEKABLE_STDIN = ["-read_ahead_limit", "-1", "-i", "cache:pipe:0"]
+
+
+def convert_audio(audio: BytesIO, target_format: str, source_format="ogg", codec=None) -> BytesIO:
+    """Converts `audio` to a mono audio file in `target_format`, optionally using `codec`"""
+    audio_bytes = audio.getvalue()
+    cache_key = (hashlib.sha256(audio_bytes).hexdigest(), source_format, target_format, codec)
+    converted = _converted_audio_cache.get(cache_key)
+    if converted is None:
+        converted = _convert(audio_bytes, target_format, source_format, codec)
+        _converted_audio_cache.set(cache_key, converted)
 
-    new_audio = BytesIO()
-    audio.export(new_audio, format=target_format, **convertion_kwargs)
-    new_audio.seek(0)
+    new_audio = BytesIO(converted)
     new_audio.name = f"some_name.{target_format}"
     return new_audio
+
+
+def get_audio_duration(audio: bytes, format: str) -> float:
+    """Returns the duration of `audio` in seconds. The packets of the audio are read, but not decoded."""
+    command = [
+        get_prober_name(),
+        "-v",
+        "error",
+        "-f",
+        format,
+        *_SEEKABLE_STDIN,
+        "-show_entries",
+        "packet=duration_time",
+        "-of",
+        "csv=p=0",
+    ]
+    output = _run(command, audio)
+    return sum(float(line) for line in output.decode().split() if line not in ("", "N/A"))
+
+
+def _convert(audio: bytes, target_format: str, source_format: str, codec: str | None) -> bytes:
+    command = [AudioSegment.converter, "-v", "error", "-f", source_format, *_SEEKABLE_STDIN, "-ac", "1"]
+    if codec:
+        command += ["-c:a", codec]
+    command += ["-f", target_format, "pipe:1"]
+    converted = _run(command, audio)
+    if target_format == "wav":
+        converted = _fix_wav_header(converted)
+    return converted
+
+
+def _run(command: list[str], audio: bytes) -> bytes:
+    try:
+        process = subprocess.run(command, input=audio, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise AudioConversionException(f"Unable to process audio: {e.stderr.decode(errors='replace')}") from e
+    return process.stdout
+
+
+def _fix_wav_header(wav: bytes) -> bytes:
+    """ffmpeg can't go back to write the sizes in the header of a WAV file when writing it to a pipe, so the sizes
+    are written after the audio has been converted"""
+    wav = bytearray(wav)
+    struct.pack_into("<I", wav, 4, len(wav) - 8)
+    offset = 12
+    while offset + 8 <= len(wav):
+        chunk_id = wav[offset : offset + 4]
+        if chunk_id == b"data":
+            struct.pack_into("<I", wav, offset + 4, len(wav) - offset - 8)
+            break
+        (chunk_size,) = struct.unpack_from("<I", wav, offset + 4)
+        offset += 8 + chunk_size + chunk_size % 2
+    return bytes(wav)
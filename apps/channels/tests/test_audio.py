@@ -0,0 +1,100 @@
+import shutil
+import struct
+import subprocess
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from apps.channels import audio
+from apps.chat.exceptions import AudioConversionException
+
+
+@pytest.fixture(autouse=True)
+def _clear_converted_audio_cache():
+    audio._converted_audio_cache.clear()
+    yield
+    audio._converted_audio_cache.clear()
+
+
+def _wav(data: bytes, with_list_chunk=False) -> bytes:
+    """A WAV file with the sizes that ffmpeg writes to a pipe"""
+    fmt_chunk = b"fmt " + struct.pack("<I", 16) + b"\x00" * 16
+    list_chunk = b"LIST" + struct.pack("<I", 3) + b"abc\x00" if with_list_chunk else b""
+    return b"RIFF" + b"\xff" * 4 + b"WAVE" + fmt_chunk + list_chunk + b"data" + b"\xff" * 4 + data
+
+
+@patch("apps.channels.audio.subprocess.run")
+def test_conversions_are_cached_by_content(run):
+    run.return_value = Mock(stdout=b"converted")
+
+    converted = audio.convert_audio(BytesIO(b"voice note"), target_format="mp3", source_format="ogg")
+    assert converted.getvalue() == b"converted"
+    assert converted.name.endswith(".mp3")
+    command = run.call_args.args[0]
+    assert command[1:] == [
+        "-v",
+        "error",
+        "-f",
+        "ogg",
+        "-read_ahead_limit",
+        "-1",
+        "-i",
+        "cache:pipe:0",
+        "-ac",
+        "1",
+        "-f",
+        "mp3",
+        "pipe:1",
+    ]
+    assert run.call_args.kwargs["input"] == b"voice note"
+
+    assert audio.convert_audio(BytesIO(b"voice note"), target_format="mp3").getvalue() == b"converted"
+    audio.convert_audio(BytesIO(b"voice note"), target_format="ogg", source_format="ogg", codec="libopus")
+    audio.convert_audio(BytesIO(b"another voice note"), target_format="mp3")
+    assert run.call_count == 3
+
+
+@pytest.mark.parametrize("with_list_chunk", [True, False])
+@patch("apps.channels.audio.subprocess.run")
+def test_wav_header_sizes_are_fixed(run, with_list_chunk):
+    run.return_value = Mock(stdout=_wav(b"\x01\x02\x03\x04", with_list_chunk))
+
+    wav = audio.convert_audio(BytesIO(b"voice note"), target_format="wav").getvalue()
+
+    assert struct.unpack_from("<I", wav, 4)[0] == len(wav) - 8
+    data_offset = wav.index(b"data")
+    assert struct.unpack_from("<I", wav, data_offset + 4)[0] == 4
+
+
+@patch("apps.channels.audio.subprocess.run")
+def test_audio_duration_is_the_sum_of_its_packets(run):
+    run.return_value = Mock(stdout=b"0.026122\n0.026122\nN/A\n0.5\n")
+    assert audio.get_audio_duration(b"audio", format="mp3") == pytest.approx(0.552244)
+    command = run.call_args.args[0]
+    assert command[command.index("-i") - 2 : command.index("-i") + 2] == [
+        "-read_ahead_limit",
+        "-1",
+        "-i",
+        "cache:pipe:0",
+    ]
+
+
+@patch("apps.channels.audio.subprocess.run")
+def test_conversion_errors(run):
+    run.side_effect = subprocess.CalledProcessError(1, "ffmpeg", stderr=b"Invalid data found when processing input")
+    with pytest.raises(AudioConversionException, match="Invalid data found"):
+        audio.convert_audio(BytesIO(b"not audio"), target_format="wav")
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg") or not shutil.which("ffprobe"), reason="ffmpeg is not installed")
+def test_mp4_with_moov_atom_at_the_end():
+    """MP4 files that have their metadata at the end can only be read if ffmpeg can seek in its input"""
+    mp4_audio = (Path(__file__).parent / "data" / "moov_at_end.m4a").read_bytes()
+
+    assert audio.get_audio_duration(mp4_audio, format="mp4") == pytest.approx(0.1)
+    wav = audio.convert_audio(BytesIO(mp4_audio), target_format="wav", source_format="mp4").getvalue()
+    # 0.1 seconds of 16 bit mono audio at 8kHz
+    data_offset = wav.index(b"data")
+    assert struct.unpack_from("<I", wav, data_offset + 4)[0] == 1600
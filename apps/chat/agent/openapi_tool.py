@@ -2,6 +2,7 @@ import enum
 import logging
 import pathlib
 import tempfile
+import time
 import uuid
 from collections import defaultdict
 from email.message import Message
@@ -18,6 +19,7 @@ from openapi_pydantic import DataType, Parameter, Reference, Schema
 from pydantic import BaseModel, Field, create_model
 
 from apps.service_providers.auth_service import AuthService
+from apps.service_providers.llm_service.parallel_tools import CONCURRENCY_SAFE
 from apps.utils.urlvalidate import InvalidURL, validate_user_input_url
 
 logger = logging.getLogger("ocs.tools")
@@ -55,6 +57,8 @@ class FunctionDef(BaseModel):
             handle_tool_error=True,
             func=executor.call_api,
             response_format="content_and_artifact",
+            # API calls are independent of each other
+            metadata={CONCURRENCY_SAFE: True},
         )
 
 
@@ -86,21 +90,28 @@ class OpenAPIOperationExecutor:
         kwargs = {k: v.model_dump() if isinstance(v, BaseModel) else v for k, v in kwargs.items()}
 
         url = self._get_url(path_params)
-        with self.auth_service.get_http_client() as client:
-            try:
-                return self.auth_service.call_with_retries(self._make_request, client, url, method, **kwargs)
-            except httpx.HTTPStatusError as e:
-                if e.response and e.response.status_code == 400:
-                    raise ToolException(f"Bad request: {e.response.text}")
-                raise ToolException(f"Error making request: {str(e)}")
-            except httpx.HTTPError as e:
-                raise ToolException(f"Error making request: {str(e)}")
+        client = self.auth_service.get_pooled_http_client()
+        try:
+            return self.auth_service.call_with_retries(self._make_request, client, url, method, **kwargs)
+        except httpx.HTTPStatusError as e:
+            if e.response and e.response.status_code == 400:
+                raise ToolException(f"Bad request: {e.response.text}")
+            raise ToolException(f"Error making request: {str(e)}")
+        except httpx.HTTPError as e:
+            raise ToolException(f"Error making request: {str(e)}")
 
     def _make_request(
         self, http_client: httpx.Client, url: str, method: str, **kwargs
     ) -> tuple[str, ToolArtifact | None]:
         logger.info("[%s] %s %s", self.function_def.name, method.upper(), url)
+        start = time.monotonic()
         with http_client.stream(method.upper(), url, follow_redirects=False, **kwargs) as response:
+            logger.info(
+                "[%s] %s response in %.0fms",
+                self.function_def.name,
+                response.status_code,
+                (time.monotonic() - start) * 1000,
+            )
             try:
                 response.raise_for_status()
             except httpx.HTTPStatusError:
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import logging
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING, Any, Union
@@ -7,15 +9,24 @@ from langchain_community.utilities.openapi import OpenAPISpec
 from langchain_core.tools import BaseTool
 
 from apps.chat.agent import schemas
-from apps.chat.agent.openapi_tool import openapi_spec_op_to_function_def
+from apps.chat.agent.openapi_tool import FunctionDef, openapi_spec_op_to_function_def
 from apps.events.forms import ScheduledMessageConfigForm
 from apps.events.models import ScheduledMessage, TimePeriod
 from apps.experiments.models import AgentTools, Experiment, ExperimentSession, ParticipantData
 from apps.pipelines.models import Node
+from apps.service_providers.llm_service.parallel_tools import CONCURRENCY_SAFE
+from apps.utils.lru import LRUCache
 from apps.utils.time import pretty_date
 
 if TYPE_CHECKING:
     from apps.assistants.models import OpenAiAssistant
+    from apps.custom_actions.models import CustomActionOperation
+
+# The maximum number of custom action function definitions to keep in memory
+FUNCTION_DEF_CACHE_SIZE = 1024
+
+# Maps (custom action operation id, schema hash) to the function definition of the operation
+_function_def_cache = LRUCache(maxsize=FUNCTION_DEF_CACHE_SIZE)
 
 
 class CustomBaseTool(BaseTool):
@@ -44,6 +55,8 @@ class RecurringReminderTool(CustomBaseTool):
     name: str = AgentTools.RECURRING_REMINDER
     description: str = "Schedule recurring reminders"
     requires_session: bool = True
+    # each call creates its own scheduled message
+    metadata: dict[str, Any] | None = {CONCURRENCY_SAFE: True}
     args_schema: type[schemas.RecurringReminderSchema] = schemas.RecurringReminderSchema
 
     def action(
@@ -73,6 +86,8 @@ class OneOffReminderTool(CustomBaseTool):
     name: str = AgentTools.ONE_OFF_REMINDER
     description: str = "Schedule one-off reminders"
     requires_session: bool = True
+    # each call creates its own scheduled message
+    metadata: dict[str, Any] | None = {CONCURRENCY_SAFE: True}
     args_schema: type[schemas.OneOffReminderSchema] = schemas.OneOffReminderSchema
 
     def action(
@@ -151,23 +166,27 @@ class UpdateParticipantDataTool(CustomBaseTool):
     name: str = AgentTools.UPDATE_PARTICIPANT_DATA
     description: str = "Update user data"
     requires_session: bool = True
+    # the participant data row is locked while it is updated
+    metadata: dict[str, Any] | None = {CONCURRENCY_SAFE: True}
     args_schema: type[schemas.UpdateUserDataSchema] = schemas.UpdateUserDataSchema
 
     @transaction.atomic
     def action(self, key: str, value: Any):
-        try:
-            participant_data = ParticipantData.objects.for_experiment(self.experiment_session.experiment).get(
-                participant=self.experiment_session.participant
-            )
-            participant_data.data[key] = value
-            participant_data.save()
-        except ParticipantData.DoesNotExist:
-            ParticipantData.objects.create(
+        # The row is locked so that concurrent updates of other keys aren't lost
+        participant_data, _created = (
+            ParticipantData.objects.for_experiment(self.experiment_session.experiment)
+            .select_for_update()
+            .get_or_create(
                 participant=self.experiment_session.participant,
-                experiment=self.experiment_session.experiment,
-                team=self.experiment_session.team,
-                data={key: value},
+                defaults={
+                    "experiment": self.experiment_session.experiment,
+                    "team": self.experiment_session.team,
+                    "data": {},
+                },
             )
+        )
+        participant_data.data[key] = value
+        participant_data.save()
         return "Success"
 
 
@@ -266,13 +285,31 @@ def get_custom_action_tools(action_holder: Union[Experiment, "OpenAiAssistant"])
 
 
 def get_tool_for_custom_action_operation(custom_action_operation) -> BaseTool | None:
-    custom_action = custom_action_operation.custom_action
-    spec = OpenAPISpec.from_spec_dict(custom_action_operation.operation_schema)
+    function_def = get_function_def_for_custom_action_operation(custom_action_operation)
+    if not function_def:
+        return
+
+    auth_service = custom_action_operation.custom_action.get_auth_service()
+    return function_def.build_tool(auth_service)
+
+
+def get_function_def_for_custom_action_operation(
+    custom_action_operation: "CustomActionOperation",
+) -> FunctionDef | None:
+    """Returns the function definition of the operation. Parsing the schema and building the args schema is
+    expensive, so function definitions are cached until the schema of the operation changes."""
+    operation_schema = custom_action_operation.operation_schema
+    schema_hash = hashlib.sha256(json.dumps(operation_schema, sort_keys=True).encode()).hexdigest()
+    cache_key = (custom_action_operation.id, schema_hash)
+    if function_def := _function_def_cache.get(cache_key):
+        return function_def
+
+    spec = OpenAPISpec.from_spec_dict(operation_schema)
     if not spec.paths:
         return
 
-    auth_service = custom_action.get_auth_service()
     path = list(spec.paths)[0]
     method = spec.get_methods_for_path(path)[0]
     function_def = openapi_spec_op_to_function_def(spec, path, method)
-    return function_def.build_tool(auth_service)
+    _function_def_cache.set(cache_key, function_def)
+    return function_def
@@ -1,26 +1,62 @@
 import textwrap
-from typing import TYPE_CHECKING, Any
+from concurrent.futures import Executor, Future
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 from langchain.memory import ConversationBufferMemory
 from langchain_core.language_models import BaseChatModel
-from langchain_core.runnables import chain
+from langchain_core.runnables import RunnableConfig, chain
+from langchain_core.runnables.config import get_executor_for_config
 from pydantic import ValidationError
 
 from apps.annotations.models import TagCategories
+from apps.chat import streaming
 from apps.chat.conversation import BasicConversation, Conversation
 from apps.chat.exceptions import ChatException
 from apps.chat.models import ChatMessageType
 from apps.events.models import StaticTriggerType
 from apps.events.tasks import enqueue_static_triggers
-from apps.experiments.models import Experiment, ExperimentRoute, ExperimentSession, SafetyLayer
+from apps.experiments.models import Experiment, ExperimentRoute, ExperimentRouteType, ExperimentSession, SafetyLayer
 from apps.pipelines.nodes.base import PipelineState
 from apps.service_providers.llm_service.default_models import get_default_model
 from apps.service_providers.llm_service.prompt_context import PromptTemplateContext
 from apps.service_providers.llm_service.runnables import create_experiment_runnable
+from apps.teams.models import Flag
+from apps.utils.lru import LRUCache
 
 if TYPE_CHECKING:
     from apps.channels.datamodels import Attachment
 
+# The maximum number of experiment versions to keep the routes of in memory
+ROUTE_CACHE_SIZE = 1024
+
+# Maps experiment version IDs to their routes. Versions can't be changed, so their routes never need to be invalidated.
+_route_cache = LRUCache(maxsize=ROUTE_CACHE_SIZE)
+
+
+class Route(NamedTuple):
+    keyword: str
+    child_id: int
+    is_default: bool
+    type: str
+
+
+def get_experiment_routes(experiment: Experiment) -> list[Route]:
+    """Returns the processor and terminal routes of an experiment. The routes of experiment versions are cached."""
+    is_version = experiment.working_version_id is not None
+    if is_version and (routes := _route_cache.get(experiment.id)) is not None:
+        return routes
+
+    routes = [
+        Route(*values)
+        for values in ExperimentRoute.objects.filter(parent=experiment).values_list(
+            "keyword", "child_id", "is_default", "type"
+        )
+    ]
+    if is_version:
+        _route_cache.set(experiment.id, routes)
+    return routes
+
 
 def create_conversation(
     prompt_str: str,
@@ -79,14 +115,11 @@ class TopicBot:
         self.input_tokens = 0
         self.output_tokens = 0
 
-        # maps keywords to child experiments.
-        self.child_experiment_routes = (
-            ExperimentRoute.objects.select_related("child").filter(parent=self.experiment, type="processor").all()
-        )
+        # maps keywords to child experiment routes. The child chains are only created when they are used.
+        self.child_routes: dict[str, Route] = {}
         self.child_chains = {}
-        self.default_child_chain = None
         self.default_tag = None
-        self.terminal_chain = None
+        self.terminal_route: Route | None = None
         self.processor_experiment = None
         self.trace_service = self.experiment.trace_service
 
@@ -95,43 +128,59 @@ class TopicBot:
         self._initialize()
 
     def _initialize(self):
-        for child_route in self.child_experiment_routes:
-            child_runnable = create_experiment_runnable(
-                child_route.child, self.session, self.disable_tools, trace_service=self.trace_service
-            )
-            self.child_chains[child_route.keyword.lower().strip()] = child_runnable
-            if child_route.is_default:
-                self.default_child_chain = child_runnable
-                self.default_tag = child_route.keyword.lower().strip()
+        for route in get_experiment_routes(self.experiment):
+            if route.type == ExperimentRouteType.TERMINAL:
+                self.terminal_route = self.terminal_route or route
+                continue
+
+            tag = route.keyword.lower().strip()
+            self.child_routes[tag] = route
+            if route.is_default:
+                self.default_tag = tag
 
-        if self.child_chains and not self.default_child_chain:
-            self.default_tag, self.default_child_chain = list(self.child_chains.items())[0]
+        if self.child_routes and not self.default_tag:
+            self.default_tag = list(self.child_routes)[0]
 
         self.chain = create_experiment_runnable(
             self.experiment, self.session, self.disable_tools, trace_service=self.trace_service
         )
 
-        terminal_route = (
-            ExperimentRoute.objects.select_related("child").filter(parent=self.experiment, type="terminal").first()
-        )
-        if terminal_route:
-            self.terminal_chain = create_experiment_runnable(
-                terminal_route.child, self.session, trace_service=self.trace_service
-            )
-
         # load up the safety bots. They should not be agents. We don't want them using tools (for now)
         self.safety_bots = [
             SafetyBot(safety_layer, self.llm, self.source_material) for safety_layer in self.safety_layers
         ]
 
-    def _call_predict(self, input_str, save_input_to_history=True, attachments: list["Attachment"] | None = None):
-        if self.child_chains:
+    @cached_property
+    def terminal_chain(self):
+        if self.terminal_route:
+            child = Experiment.objects.get_all().get(id=self.terminal_route.child_id)
+            return create_experiment_runnable(child, self.session, trace_service=self.trace_service)
+
+    def _get_child_chain_for_tag(self, tag: str):
+        if tag not in self.child_chains:
+            child = Experiment.objects.get_all().get(id=self.child_routes[tag].child_id)
+            self.child_chains[tag] = create_experiment_runnable(
+                child, self.session, self.disable_tools, trace_service=self.trace_service
+            )
+        return self.child_chains[tag]
+
+    def _call_predict(
+        self,
+        input_str,
+        save_input_to_history=True,
+        attachments: list["Attachment"] | None = None,
+        speculative=False,
+    ):
+        """Generate a response to `input_str`. A `speculative` response may still be discarded, so the new bot
+        message triggers are left to the caller to fire once the response is kept."""
+        if self.child_routes:
             tag, chain = self._get_child_chain(input_str, attachments)
         else:
             tag, chain = None, self.chain
 
         # The processor_experiment is the experiment that generated the output
         self.processor_experiment = chain.experiment
+        token_callback = self._get_token_callback()
         result = chain.invoke(
             input_str,
             config={
@@ -139,6 +188,7 @@ class TopicBot:
                     "save_input_to_history": save_input_to_history,
                     "save_output_to_history": self.terminal_chain is None,
                     "experiment_tag": tag,
+                    "token_callback": token_callback if self.terminal_chain is None else None,
                 }
             },
             attachments=attachments,
@@ -154,17 +204,28 @@ class TopicBot:
                         "save_input_to_history": False,
                         "experiment_tag": tag,
                         "include_conversation_history": False,
+                        "token_callback": token_callback,
                     },
                 },
             )
 
         self.generator_chain = chain
 
-        enqueue_static_triggers.delay(self.session.id, StaticTriggerType.NEW_BOT_MESSAGE)
+        if not speculative:
+            enqueue_static_triggers.delay(self.session.id, StaticTriggerType.NEW_BOT_MESSAGE)
         self.input_tokens = self.input_tokens + result.prompt_tokens
         self.output_tokens = self.output_tokens + result.completion_tokens
         return result.output
 
+    def _get_token_callback(self) -> streaming.TokenCallback | None:
+        """Returns the callback to stream the response to, if there is one. Responses are not streamed if they might
+        still be replaced by a safe response after they have been generated."""
+        if any(bot.filter_ai_messages() for bot in self.safety_bots):
+            return None
+        if any(bot.filter_human_messages() for bot in self.safety_bots) and self.speculative_safety_checks:
+            return None
+        return streaming.get_token_callback()
+
     def _get_child_chain(self, input_str: str, attachments: list["Attachment"] | None = None) -> tuple[str, Any]:
         result = self.chain.invoke(
             input_str,
@@ -181,31 +242,50 @@ class TopicBot:
         self.output_tokens = self.output_tokens + result.completion_tokens
 
         keyword = result.output.lower().strip()
-        try:
-            return keyword, self.child_chains[keyword]
-        except KeyError:
-            return self.default_tag, self.default_child_chain
+        if keyword not in self.child_routes:
+            keyword = self.default_tag
+        return keyword, self._get_child_chain_for_tag(keyword)
 
     def process_input(self, user_input: str, save_input_to_history=True, attachments: list["Attachment"] | None = None):
         @chain
-        def main_bot_chain(user_input):
-            # human safety layers
-            for safety_bot in self.safety_bots:
-                if safety_bot.filter_human_messages() and not safety_bot.is_safe(user_input):
-                    self._save_message_to_history(user_input, ChatMessageType.HUMAN)
+        def main_bot_chain(user_input, config: RunnableConfig):
+            human_safety_bots = [bot for bot in self.safety_bots if bot.filter_human_messages()]
+            ai_safety_bots = [bot for bot in self.safety_bots if bot.filter_ai_messages()]
+            with get_executor_for_config(config) as executor:
+                # human safety layers
+                safety_checks = self._submit_safety_checks(executor, human_safety_bots, user_input)
+                response = None
+                if safety_checks and self.speculative_safety_checks:
+                    # generate the response while the safety layers are running and discard it if they fail
+                    response = self._call_predict(
+                        user_input,
+                        save_input_to_history=save_input_to_history,
+                        attachments=attachments,
+                        speculative=True,
+                    )
+
+                if failed_safety_bot := self._get_failed_safety_bot(safety_checks):
+                    if response is not None:
+                        self._discard_response()
+                    if response is None or not save_input_to_history:
+                        self._save_message_to_history(user_input, ChatMessageType.HUMAN)
                     enqueue_static_triggers.delay(self.session.id, StaticTriggerType.HUMAN_SAFETY_LAYER_TRIGGERED)
-                    notify_users_of_violation(self.session.id, safety_layer_id=safety_bot.safety_layer.id)
-                    return self._get_safe_response(safety_bot.safety_layer)
-
-            response = self._call_predict(
-                user_input, save_input_to_history=save_input_to_history, attachments=attachments
-            )
-
-            # ai safety layers
-            for safety_bot in self.safety_bots:
-                if safety_bot.filter_ai_messages() and not safety_bot.is_safe(response):
+                    notify_users_of_violation(self.session.id, safety_layer_id=failed_safety_bot.safety_layer.id)
+                    return self._get_safe_response(failed_safety_bot.safety_layer)
+
+                if response is None:
+                    response = self._call_predict(
+                        user_input, save_input_to_history=save_input_to_history, attachments=attachments
+                    )
+                else:
+                    # the speculative response is kept
+                    enqueue_static_triggers.delay(self.session.id, StaticTriggerType.NEW_BOT_MESSAGE)
+
+                # ai safety layers
+                safety_checks = self._submit_safety_checks(executor, ai_safety_bots, response)
+                if failed_safety_bot := self._get_failed_safety_bot(safety_checks):
                     enqueue_static_triggers.delay(self.session.id, StaticTriggerType.BOT_SAFETY_LAYER_TRIGGERED)
-                    return self._get_safe_response(safety_bot.safety_layer)
+                    return self._get_safe_response(failed_safety_bot.safety_layer)
 
             return response
 
@@ -231,6 +311,34 @@ class TopicBot:
             if self.trace_service:
                 self.trace_service.end()
 
+    @cached_property
+    def speculative_safety_checks(self) -> bool:
+        """When enabled, the response is generated while the human safety layers are being evaluated instead of
+        after they pass. This reduces latency, but a response that fails the safety layers will have been generated
+        (and any tools called) before it is discarded.
+        """
+        return Flag.get("speculative_safety_layers").is_active_for_team(self.experiment.team)
+
+    def _submit_safety_checks(
+        self, executor: Executor, safety_bots: list["SafetyBot"], message: str
+    ) -> list[tuple["SafetyBot", Future]]:
+        """Evaluate the safety layers concurrently"""
+        return [(safety_bot, executor.submit(safety_bot.is_safe, message)) for safety_bot in safety_bots]
+
+    def _get_failed_safety_bot(self, safety_checks: list[tuple["SafetyBot", Future]]) -> "SafetyBot | None":
+        """Wait for the safety checks to complete and return the first safety bot whose check failed"""
+        failed_safety_bot = None
+        for safety_bot, future in safety_checks:
+            if not future.result() and failed_safety_bot is None:
+                failed_safety_bot = safety_bot
+        return failed_safety_bot
+
+    def _discard_response(self):
+        """Remove a response that was generated speculatively from the history"""
+        if self.generator_chain and (ai_message := self.generator_chain.history_manager.ai_message):
+            ai_message.delete()
+            self.generator_chain.history_manager.ai_message = None
+
     def get_ai_message_id(self) -> int | None:
         """Returns the generated AI message's ID. The caller can use this to fetch more information on this message"""
         if self.generator_chain and self.generator_chain.history_manager.ai_message:
@@ -441,6 +441,8 @@ class ChannelBase(ABC):
         return self.send_text_to_user(self._unsupported_message_type_response())
 
     def _reply_voice_message(self, text: str):
+        from apps.service_providers import voice_cache
+
         text, extracted_urls = strip_urls_and_emojis(text)
 
         voice_provider = self.experiment.voice_provider
@@ -451,9 +453,8 @@ class ChannelBase(ABC):
             voice_provider = self.bot.processor_experiment.voice_provider
             synthetic_voice = self.bot.processor_experiment.synthetic_voice
 
-        speech_service = voice_provider.get_speech_service()
         try:
-            synthetic_voice_audio = speech_service.synthesize_voice(text, synthetic_voice)
+            synthetic_voice_audio = voice_cache.synthesize_voice(voice_provider, synthetic_voice, text)
             self.send_voice_to_user(synthetic_voice_audio)
         except AudioSynthesizeException as e:
             logger.exception(e)
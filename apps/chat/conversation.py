@@ -1,3 +1,4 @@
+import hashlib
 import logging
 from abc import ABC, abstractmethod
 
@@ -17,15 +18,20 @@ from langchain_core.prompts import (
 
 from apps.chat.models import Chat, ChatMessage, ChatMessageType
 from apps.pipelines.models import PipelineChatHistory, PipelineChatHistoryModes, PipelineChatMessages
+from apps.utils.lru import LRUCache
 from apps.utils.prompt import OcsPromptTemplate
 
 SUMMARY_TOO_LARGE_ERROR_MESSAGE = "Unable to compress chat history: existing summary too large"
 INITIAL_SUMMARY_TOKENS_ESTIMATE = 20
 # The maximum number of messages that can be uncompressed
 MAX_UNCOMPRESSED_MESSAGES = 1000
+# The maximum number of per-message token counts to keep in memory
+MESSAGE_TOKEN_CACHE_SIZE = 50_000
 
 log = logging.getLogger("ocs.bots")
 
+_message_token_cache = LRUCache(maxsize=MESSAGE_TOKEN_CACHE_SIZE)
+
 
 class Conversation(ABC):
     @abstractmethod
@@ -172,6 +178,58 @@ def compress_pipeline_chat_history(
         return history_messages
 
 
+class HistoryTokenCounter:
+    """Counts tokens for history messages one message at a time so that compression can prune the history
+    using running totals instead of re-counting the remaining history after every pruning step.
+
+    Per-message counts are cached per model and message content, so each message is only tokenized once
+    for as long as it remains in the history.
+    """
+
+    def __init__(self, llm: BaseChatModel):
+        self.llm = llm
+        self.model_key = _get_model_cache_key(llm)
+        # The fixed number of tokens added to a list of messages regardless of its length (e.g. reply priming)
+        self.overhead = self._get_overhead()
+
+    def count(self, messages: list) -> list[int]:
+        """Returns the number of tokens that each message adds to the total"""
+        return [self._count_message(message) for message in messages]
+
+    def total(self, token_counts: list[int]) -> int:
+        """Returns the token count for a list of messages given their per-message counts. This matches
+        `llm.get_num_tokens_from_messages(messages)`"""
+        return self.overhead + sum(token_counts)
+
+    def get_num_tokens_from_messages(self, messages: list) -> int:
+        return self.total(self.count(messages))
+
+    def _get_overhead(self) -> int:
+        key = (self.model_key, None)
+        overhead = _message_token_cache.get(key)
+        if overhead is None:
+            overhead = self.llm.get_num_tokens_from_messages([])
+            _message_token_cache.set(key, overhead)
+        return overhead
+
+    def _count_message(self, message) -> int:
+        if not isinstance(message, BaseMessage):
+            return self.llm.get_num_tokens_from_messages([message]) - self.overhead
+
+        content_hash = hashlib.sha1(f"{message.type}:{message.content}".encode()).hexdigest()
+        key = (self.model_key, content_hash)
+        count = _message_token_cache.get(key)
+        if count is None:
+            count = self.llm.get_num_tokens_from_messages([message]) - self.overhead
+            _message_token_cache.set(key, count)
+        return count
+
+
+def _get_model_cache_key(llm: BaseChatModel) -> str:
+    model_name = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    return f"{type(llm).__module__}.{type(llm).__qualname__}:{model_name}"
+
+
 def _compress_chat_history(
     history: list,
     llm: BaseChatModel,
@@ -189,7 +247,7 @@ def _compress_chat_history(
 
     total_messages = history.copy()
     total_messages.extend(input_messages)
-    current_token_count = llm.get_num_tokens_from_messages(total_messages)
+    current_token_count = HistoryTokenCounter(llm).get_num_tokens_from_messages(total_messages)
     if history_mode in [PipelineChatHistoryModes.SUMMARIZE, PipelineChatHistoryModes.TRUNCATE_TOKENS, None]:
         if current_token_count <= max_token_limit and len(total_messages) <= MAX_UNCOMPRESSED_MESSAGES:
             log.info("Skipping chat history compression: %s <= %s", current_token_count, max_token_limit)
@@ -215,18 +273,22 @@ def _compress_chat_history(
 
 def truncate_tokens(history, max_token_limit, llm, input_message_tokens):
     """Removes old messages until the token count is below the max limit."""
-    pruned_memory = []
-    history_tokens = llm.get_num_tokens_from_messages(history)
-    while history and history_tokens + input_message_tokens > max_token_limit:
-        pruned_memory.append(history.pop(0))
-        history_tokens = llm.get_num_tokens_from_messages(history)
-    return history, pruned_memory
+    token_counter = HistoryTokenCounter(llm)
+    token_counts = token_counter.count(history)
+    history_tokens = token_counter.total(token_counts)
+    prune_count = 0
+    while prune_count < len(history) and history_tokens + input_message_tokens > max_token_limit:
+        history_tokens -= token_counts[prune_count]
+        prune_count += 1
+    return history[prune_count:], history[:prune_count]
 
 
 def summarize_history(llm, history, max_token_limit, input_message_tokens, summary, input_messages, pruned_memory):
-    history_tokens = llm.get_num_tokens_from_messages(history)
+    token_counter = HistoryTokenCounter(llm)
+    token_counts = token_counter.count(history)
+    history_tokens = token_counter.total(token_counts)
     summary_tokens = (
-        llm.get_num_tokens_from_messages([SystemMessage(content=summary)])
+        token_counter.get_num_tokens_from_messages([SystemMessage(content=summary)])
         if summary
         else INITIAL_SUMMARY_TOKENS_ESTIMATE
     )
@@ -245,10 +307,11 @@ def summarize_history(llm, history, max_token_limit, input_message_tokens, summa
 
             pruned_messages, history = history[:prune_count], history[prune_count:]
             pruned_memory.extend(pruned_messages)
-            history_tokens = llm.get_num_tokens_from_messages(history)
+            history_tokens -= sum(token_counts[:prune_count])
+            token_counts = token_counts[prune_count:]
         # Generate a new summary after pruning messages
         summary = _get_new_summary(llm, pruned_memory, summary, max_token_limit)
-        summary_tokens = llm.get_num_tokens_from_messages([SystemMessage(content=summary)])
+        summary_tokens = token_counter.get_num_tokens_from_messages([SystemMessage(content=summary)])
 
     return history, pruned_memory, summary
 
@@ -265,7 +328,8 @@ def compress_chat_history_from_messages(
     summary = history.pop(0).content if history and history[0].type == ChatMessageType.SYSTEM else None
     history, pruned_memory = history[-keep_history_len:], history[:-keep_history_len]
     latest_message = history[-1] if history else None
-    input_message_tokens = llm.get_num_tokens_from_messages(input_messages)
+    token_counter = HistoryTokenCounter(llm)
+    input_message_tokens = token_counter.get_num_tokens_from_messages(input_messages)
     if history_mode == PipelineChatHistoryModes.MAX_HISTORY_LENGTH:
         return history, latest_message, summary
     elif history_mode == PipelineChatHistoryModes.TRUNCATE_TOKENS:
@@ -274,14 +338,14 @@ def compress_chat_history_from_messages(
         history, pruned_memory, summary = summarize_history(
             llm, history, max_token_limit, input_message_tokens, summary, input_messages, pruned_memory
         )
+        history_tokens = token_counter.get_num_tokens_from_messages(history)
+        summary_tokens = token_counter.get_num_tokens_from_messages([SystemMessage(content=summary)])
         log.info(
             "Compressed chat history to %s tokens (%s prompt + %s summary + %s history)",
-            input_message_tokens
-            + llm.get_num_tokens_from_messages(history)
-            + llm.get_num_tokens_from_messages([SystemMessage(content=summary)]),
+            input_message_tokens + history_tokens + summary_tokens,
             input_message_tokens,
-            llm.get_num_tokens_from_messages([SystemMessage(content=summary)]),
-            llm.get_num_tokens_from_messages(history),
+            summary_tokens,
+            history_tokens,
         )
     if history:
         last_message = history[0]
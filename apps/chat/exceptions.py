@@ -12,6 +12,10 @@ class AudioTranscriptionException(ChatException):
     pass
 
 
+class AudioConversionException(ChatException):
+    pass
+
+
 class ChannelException(ChatException):
     pass
 
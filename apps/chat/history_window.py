@@ -0,0 +1,94 @@
+"""A cache of the most recent messages of a chat history, going back to (and including) the latest summary.
+
+This is the part of the history that is loaded on every turn of a conversation. Messages are appended to a cached
+window once the transaction that created them is committed, so loading the history is a single cache lookup. The
+database is only queried if the window isn't cached. Windows are stored as lists of LangChain message dicts, oldest
+message first.
+
+Each window has a version which is incremented by every append and invalidation. A window is stored together with
+the version it was built from and is only used while that version is current, so a window that was loaded from the
+database before a message was added or changed can't be cached over the newer state.
+"""
+
+import time
+from collections.abc import Callable
+
+from django.core.cache import cache
+
+HISTORY_WINDOW_TIMEOUT = 60 * 60 * 24
+
+
+def get_cache_key(history_type: str, history_id: int) -> str:
+    return f"history_window:{history_type}:{history_id}"
+
+
+def get_or_load_window(key: str, load_window: Callable[[], list[dict]]) -> list[dict]:
+    """Return the cached window, or load it with `load_window` and cache it if no newer version was cached while it
+    was being loaded."""
+    version_key = _get_version_key(key)
+    cached = cache.get_many([key, version_key])
+    version = cached.get(version_key)
+    if version is None:
+        version = _init_version(version_key)
+    window = cached.get(key)
+    if window is not None and window[0] == version:
+        return window[1]
+
+    # the version is read before loading so that changes made while loading are detected
+    messages = load_window()
+    if window is not None:
+        cache.delete(key)
+    if cache.get(version_key) == version:
+        cache.add(key, (version, messages), timeout=HISTORY_WINDOW_TIMEOUT)
+    return messages
+
+
+def append_to_window(key: str, messages: list[dict], new_window: bool = False):
+    """Add newly created messages to the window. If `new_window` is True, the messages start a new window e.g.
+    because the first message is a summary.
+
+    Windows are only appended to if they are up-to-date, otherwise they would be incomplete.
+    """
+    version = _bump_version(key)
+    if version is None:
+        return
+
+    if new_window:
+        cache.set(key, (version, messages), timeout=HISTORY_WINDOW_TIMEOUT)
+        return
+
+    window = cache.get(key)
+    if window is not None and window[0] == version - 1:
+        cache.set(key, (version, window[1] + messages), timeout=HISTORY_WINDOW_TIMEOUT)
+
+
+def invalidate_window(key: str):
+    """Mark the window as out of date until it is loaded from the database again"""
+    _bump_version(key)
+
+
+def invalidate_windows(keys: list[str]):
+    for key in keys:
+        invalidate_window(key)
+
+
+def _bump_version(key: str) -> int | None:
+    """Increment the version of the window. Returns None if the window has no version, in which case no window
+    can be valid and a new version is started."""
+    version_key = _get_version_key(key)
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        _init_version(version_key)
+        return None
+
+
+def _init_version(version_key: str) -> int:
+    # A version that is unique over time means that a window stored under an expired version can't become valid
+    # again when the version is started over.
+    cache.add(version_key, time.time_ns(), timeout=HISTORY_WINDOW_TIMEOUT)
+    return cache.get(version_key)
+
+
+def _get_version_key(key: str) -> str:
+    return f"{key}:version"
@@ -2,16 +2,55 @@ from enum import StrEnum
 from functools import cache
 from urllib.parse import quote
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.functional import classproperty
 from langchain_core.messages import BaseMessage, messages_from_dict
 
 from apps.annotations.models import Tag, TagCategories, TaggedModelMixin, UserCommentsMixin
+from apps.chat import history_window
 from apps.files.models import File
 from apps.teams.models import BaseTeamModel
 from apps.utils.models import BaseModel
 
 
+class HistoryWindowQuerySet(models.QuerySet):
+    """A queryset of chat messages that invalidates the cached history windows of the chats whose messages are
+    changed in bulk, since bulk operations don't go through `save` and `delete`."""
+
+    history_type: str
+    history_field: str
+
+    def update(self, **kwargs):
+        history_ids = self._get_history_ids()
+        result = super().update(**kwargs)
+        self._invalidate_history_windows(history_ids)
+        return result
+
+    def delete(self):
+        history_ids = self._get_history_ids()
+        result = super().delete()
+        self._invalidate_history_windows(history_ids)
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._invalidate_history_windows({getattr(obj, self.history_field) for obj in objs})
+        return objs
+
+    def _get_history_ids(self) -> set[int]:
+        return set(self.order_by().values_list(self.history_field, flat=True).distinct())
+
+    def _invalidate_history_windows(self, history_ids):
+        keys = [history_window.get_cache_key(self.history_type, history_id) for history_id in history_ids]
+        if keys:
+            transaction.on_commit(lambda: history_window.invalidate_windows(keys))
+
+
+class ChatMessageQuerySet(HistoryWindowQuerySet):
+    history_type = "chat"
+    history_field = "chat_id"
+
+
 class Chat(BaseTeamModel, TaggedModelMixin, UserCommentsMixin):
     """
     A chat instance.
@@ -37,13 +76,21 @@ class Chat(BaseTeamModel, TaggedModelMixin, UserCommentsMixin):
         return messages_from_dict([m.to_langchain_dict() for m in self.messages.all()])
 
     def get_langchain_messages_until_summary(self) -> list[BaseMessage]:
+        window = history_window.get_or_load_window(self.history_window_key, self._get_langchain_dicts_until_summary)
+        return messages_from_dict(window)
+
+    def _get_langchain_dicts_until_summary(self) -> list[dict]:
         messages = []
         for message in self.message_iterator():
             messages.append(message.to_langchain_dict())
             if message.is_summary:
                 break
 
-        return messages_from_dict(list(reversed(messages)))
+        return list(reversed(messages))
+
+    @property
+    def history_window_key(self) -> str:
+        return history_window.get_cache_key("chat", self.id)
 
     def message_iterator(self, with_summaries=True):
         for message in self.messages.order_by("-created_at").iterator(100):
@@ -108,6 +155,8 @@ class ChatMessage(BaseModel, TaggedModelMixin, UserCommentsMixin):
     )
     metadata = models.JSONField(default=dict)
 
+    objects = ChatMessageQuerySet.as_manager()
+
     class Meta:
         ordering = ["created_at"]
 
@@ -125,7 +174,30 @@ class ChatMessage(BaseModel, TaggedModelMixin, UserCommentsMixin):
     def save(self, *args, **kwargs):
         if self.is_summary:
             raise ValueError("Cannot save a summary message")
+        is_new = self._state.adding
         super().save(*args, **kwargs)
+        # a message that is rolled back must not end up in the cached window
+        if is_new:
+            transaction.on_commit(self._add_to_history_window)
+        else:
+            transaction.on_commit(self._invalidate_history_window)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        # the cached window may include this message
+        transaction.on_commit(self._invalidate_history_window)
+        return result
+
+    def _invalidate_history_window(self):
+        history_window.invalidate_window(history_window.get_cache_key("chat", self.chat_id))
+
+    def _add_to_history_window(self):
+        messages = [self.to_langchain_dict()]
+        if self.summary:
+            messages.insert(0, self.get_summary_message().to_langchain_dict())
+        history_window.append_to_window(
+            history_window.get_cache_key("chat", self.chat_id), messages, new_window=bool(self.summary)
+        )
 
     @property
     def trace_info(self):
@@ -216,20 +288,17 @@ class ChatMessage(BaseModel, TaggedModelMixin, UserCommentsMixin):
         self.add_tag(tag, team=self.chat.team, added_by=None)
 
     def rating(self) -> str | None:
-        if rating := self.tags.filter(category=TagCategories.RESPONSE_RATING).values_list("name", flat=True).first():
-            return rating
+        return self.get_tag_name(TagCategories.RESPONSE_RATING)
 
     def get_processor_bot_tag_name(self) -> str | None:
         """Returns the tag of the bot that generated this message"""
         if self.message_type != ChatMessageType.AI:
             return
-        if tag := self.tags.filter(category=TagCategories.BOT_RESPONSE).first():
-            return tag.name
+        return self.get_tag_name(TagCategories.BOT_RESPONSE)
 
     def get_safety_layer_tag_name(self) -> str | None:
         """Returns the name of the safety layer tag, if there is one"""
-        if tag := self.tags.filter(category=TagCategories.SAFETY_LAYER_RESPONSE).first():
-            return tag.name
+        return self.get_tag_name(TagCategories.SAFETY_LAYER_RESPONSE)
 
 
 class ChatAttachment(BaseModel):
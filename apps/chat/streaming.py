@@ -0,0 +1,140 @@
+"""Streaming of bot responses to the web chat.
+
+While a response is being generated by a Celery task, its tokens are added to a Redis stream that is keyed by the ID
+of the session and the ID of the task, so a stream can only be read through the session it belongs to. The web chat
+reads the stream using server-sent events (SSE) so that the response can be displayed as it is generated. A final
+`done` event, which includes the result of the task, is added to the stream when the task completes.
+
+Streaming is best effort: if Redis is not available, tokens are dropped and the chat falls back to fetching the
+complete response.
+"""
+
+import json
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger("ocs.chat")
+
+# How long to keep a stream after the last event was added to it
+STREAM_TTL_SECONDS = 5 * 60
+# The maximum amount of time tokens are buffered before being added to the stream
+TOKEN_FLUSH_INTERVAL_SECONDS = 0.05
+# How long clients wait for new events before giving up on the stream
+STREAM_READ_TIMEOUT_SECONDS = 120
+
+TokenCallback = Callable[[str], None]
+
+_token_callback: ContextVar[TokenCallback | None] = ContextVar("token_callback", default=None)
+
+
+@cache
+def get_redis_client() -> redis.Redis:
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def get_stream_key(session_id: int, task_id: str) -> str:
+    return f"response_stream:{session_id}:{task_id}"
+
+
+def get_token_callback() -> TokenCallback | None:
+    """Returns the function that generated tokens should be passed to, if the response is being streamed"""
+    return _token_callback.get()
+
+
+@contextmanager
+def token_callback(callback: TokenCallback):
+    """Pass the tokens of responses generated within this context to `callback`"""
+    reset_token = _token_callback.set(callback)
+    try:
+        yield
+    finally:
+        _token_callback.reset(reset_token)
+
+
+class ResponseStream:
+    """Adds the tokens of a response to the Redis stream of a task. Tokens are buffered for a short time to avoid
+    a round trip to Redis for each token."""
+
+    def __init__(self, session_id: int, task_id: str | None):
+        self.key = get_stream_key(session_id, task_id)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        # tasks that aren't run by Celery (e.g. in tests) don't have an ID
+        self._enabled = task_id is not None
+        self.closed = False
+
+    def add_token(self, token: str):
+        self._buffer.append(token)
+        if time.monotonic() - self._last_flush >= TOKEN_FLUSH_INTERVAL_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._add_event("token", "".join(self._buffer))
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self, result: dict | None = None):
+        self.flush()
+        self._add_event("done", result or {})
+        self.closed = True
+
+    def _add_event(self, event: str, data):
+        if not self._enabled:
+            return
+
+        try:
+            with get_redis_client().pipeline() as pipe:
+                # the stream must not fail the task, so values that can't be serialized are sent as strings
+                pipe.xadd(self.key, {"event": event, "data": json.dumps(data, default=str)})
+                pipe.expire(self.key, STREAM_TTL_SECONDS)
+                pipe.execute()
+        except redis.RedisError:
+            logger.exception("Unable to add to response stream %s", self.key)
+            self._enabled = False
+
+
+@contextmanager
+def stream_response(session_id: int, task_id: str | None):
+    """Stream the tokens of the responses generated within this context to the stream of `task_id`.
+
+    The stream is closed when the context exits if it wasn't closed already. Use `ResponseStream.close` to include
+    the result of the task in the `done` event.
+    """
+    stream = ResponseStream(session_id, task_id)
+    with token_callback(stream.add_token):
+        try:
+            yield stream
+        finally:
+            if not stream.closed:
+                stream.close()
+
+
+def read_stream(
+    session_id: int, task_id: str, timeout: float = STREAM_READ_TIMEOUT_SECONDS
+) -> Iterator[tuple[str, str | dict]]:
+    """Yields the `(event, data)` tuples of a task's stream as they are added, starting from the first event.
+    Stops after the `done` event or when no events are added for `timeout` seconds."""
+    key = get_stream_key(session_id, task_id)
+    client = get_redis_client()
+    last_id = "0-0"
+    deadline = time.monotonic() + timeout
+    while (remaining := deadline - time.monotonic()) > 0:
+        response = client.xread({key: last_id}, block=max(1, int(min(remaining, 1) * 1000)))
+        if not response:
+            continue
+
+        for entry_id, fields in response[0][1]:
+            last_id = entry_id
+            event = fields[b"event"].decode()
+            yield event, json.loads(fields[b"data"])
+            if event == "done":
+                return
+        deadline = time.monotonic() + timeout
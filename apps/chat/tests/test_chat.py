@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import pytest
 
 from apps.chat.models import Chat, ChatMessage, ChatMessageType
@@ -30,6 +32,68 @@ def test_chat_get_langchain_messages_until_summary_with_summary(chat):
     ]
 
 
+def test_chat_history_window_is_updated_when_messages_are_created(
+    chat, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ChatMessage.objects.create(chat=chat, content="Hi", message_type=ChatMessageType.AI)
+    with django_assert_num_queries(0):
+        assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello", "Hi"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ChatMessage.objects.create(chat=chat, content="Bye", message_type=ChatMessageType.HUMAN, summary="Greetings")
+    with django_assert_num_queries(0):
+        messages = chat.get_langchain_messages_until_summary()
+    assert [(m.type, m.content) for m in messages] == [("system", "Greetings"), ("human", "Bye")]
+    assert messages == Chat.objects.get(id=chat.id).get_langchain_messages_until_summary()
+
+
+def test_chat_history_window_is_only_updated_when_messages_are_committed(chat, django_capture_on_commit_callbacks):
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello"]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        ChatMessage.objects.create(chat=chat, content="Hi", message_type=ChatMessageType.AI)
+    # the transaction hasn't been committed
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello"]
+
+    callbacks[0]()
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello", "Hi"]
+
+
+def test_chat_history_window_is_not_cached_if_messages_are_added_while_it_is_loaded(
+    chat, django_capture_on_commit_callbacks
+):
+    load_window = chat._get_langchain_dicts_until_summary
+
+    def _load_window_and_add_message():
+        window = load_window()
+        with django_capture_on_commit_callbacks(execute=True):
+            ChatMessage.objects.create(chat=chat, content="Hi", message_type=ChatMessageType.AI)
+        return window
+
+    with patch.object(chat, "_get_langchain_dicts_until_summary", _load_window_and_add_message):
+        assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello"]
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello", "Hi"]
+
+
+def test_chat_history_window_is_invalidated_by_bulk_changes(chat, django_capture_on_commit_callbacks):
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ChatMessage.objects.bulk_create([ChatMessage(chat=chat, content="Hi", message_type=ChatMessageType.AI)])
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello", "Hi"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ChatMessage.objects.filter(chat=chat, content="Hi").update(content="Bye")
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello", "Bye"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        chat.messages.filter(content="Bye").delete()
+    assert [m.content for m in chat.get_langchain_messages_until_summary()] == ["Hello"]
+
+
 def test_chat_message_to_langchain_dict():
     chat = Chat()
     message = ChatMessage(chat=chat, content="Hello", message_type=ChatMessageType.HUMAN)
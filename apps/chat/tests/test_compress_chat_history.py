@@ -8,8 +8,10 @@ from langchain_core.messages import BaseMessage, HumanMessage
 
 from apps.chat.conversation import (
     SUMMARY_TOO_LARGE_ERROR_MESSAGE,
+    HistoryTokenCounter,
     _get_new_summary,
     _get_summary_tokens_with_context,
+    _message_token_cache,
     compress_chat_history,
     truncate_tokens,
 )
@@ -41,6 +43,13 @@ def _patch_initial_tokens():
         yield
 
 
+@pytest.fixture(autouse=True)
+def _clear_token_cache():
+    _message_token_cache.clear()
+    yield
+    _message_token_cache.clear()
+
+
 @pytest.fixture()
 def chat(team_with_users):
     return Chat.objects.create(team=team_with_users)
@@ -270,3 +279,23 @@ def test_truncate_tokens():
     assert llm.get_num_tokens_from_messages(new_history) + input_message_tokens <= max_token_limit
     remaining_after_pruning = [{"content": "Another one"}, {"content": "Final message"}]
     assert new_history == remaining_after_pruning
+
+
+def test_history_token_counter_caches_message_counts():
+    llm = FakeLlmSimpleTokenCount(responses=[])
+    history = [HumanMessage(f"Hello {i}") for i in range(5)]
+
+    with mock.patch.object(
+        FakeLlmSimpleTokenCount, "get_num_tokens", autospec=True, side_effect=lambda self, text: len(text.split())
+    ) as get_num_tokens:
+        token_counter = HistoryTokenCounter(llm)
+        token_counts = token_counter.count(history)
+        assert get_num_tokens.call_count == 5
+
+        # the history from the next turn only has one new message that needs to be tokenized
+        next_history = history + [HumanMessage("Goodbye")]
+        HistoryTokenCounter(llm).count(next_history)
+        assert get_num_tokens.call_count == 6
+
+    assert token_counts == [3] * 5
+    assert token_counter.total(token_counts) == llm.get_num_tokens_from_messages(history)
@@ -50,6 +50,26 @@ class TestChatMessage:
         assert ai_message_wo_tag.get_processor_bot_tag_name() is None
         assert ai_message_with_tag.get_processor_bot_tag_name() == "some-bot"
 
+    def test_prefetch_tags(self, django_assert_num_queries):
+        session = ExperimentSessionFactory()
+        messages = [
+            ChatMessage.objects.create(chat=session.chat, message_type=ChatMessageType.AI, content="Hi")
+            for _i in range(3)
+        ]
+        messages[0].add_system_tag(tag="some-bot", tag_category=TagCategories.BOT_RESPONSE)
+        messages[0].add_rating("👍")
+        messages[1].add_system_tag(tag="safety-bot", tag_category=TagCategories.SAFETY_LAYER_RESPONSE)
+
+        messages = list(ChatMessage.objects.filter(chat=session.chat).order_by("id"))
+        with django_assert_num_queries(1):
+            ChatMessage.prefetch_tags(messages)
+            assert [
+                (message.get_processor_bot_tag_name(), message.get_safety_layer_tag_name(), message.rating())
+                for message in messages
+            ] == [("some-bot", None, "👍"), (None, "safety-bot", None), (None, None, None)]
+            assert messages[0].tags_json[0]["added_by"] == "System"
+            assert messages[2].all_tag_names() == []
+
     def test_add_version_tag(self):
         session = ExperimentSessionFactory()
         chat_message1 = ChatMessage.objects.create(chat=session.chat, message_type=ChatMessageType.AI, content="Hi")
@@ -1,10 +1,14 @@
+from unittest.mock import patch
+
+import httpx
 import pytest
 from langchain_community.utilities.openapi import OpenAPISpec
 from langchain_core.messages import ToolMessage
 
 from apps.chat.agent.openapi_tool import openapi_spec_op_to_function_def
 from apps.chat.tests.test_openapi_tool import _make_openapi_schema
-from apps.service_providers.auth_service import anonymous_auth_service
+from apps.service_providers import client_pool
+from apps.service_providers.auth_service import BearerTokenAuthService, anonymous_auth_service
 
 
 def test_openapi_tool_query_params(httpx_mock):
@@ -115,6 +119,33 @@ def test_openapi_tool_response_content_disposition_attachment(httpx_mock, filena
         assert result.artifact.name == "example.txt"
 
 
+def test_http_transports_are_pooled_by_credentials():
+    client_pool.clear()
+    client = BearerTokenAuthService(token="token").get_pooled_http_client()
+
+    other_client = BearerTokenAuthService(token="token").get_pooled_http_client()
+    # clients, and so their cookies, are never shared
+    assert other_client is not client
+    assert other_client._transport is client._transport
+    assert BearerTokenAuthService(token="new_token").get_pooled_http_client()._transport is not client._transport
+    assert anonymous_auth_service.get_pooled_http_client()._transport is not client._transport
+    assert client_pool.get_pool_stats() == {"http_transport": {"created": 3, "reused": 1}}
+    client_pool.clear()
+
+
+def test_evicted_http_transports_are_closed():
+    client_pool.clear()
+    with (
+        patch.object(client_pool._client_pool, "maxsize", 1),
+        patch.object(httpx.HTTPTransport, "close", autospec=True) as close,
+    ):
+        transport = BearerTokenAuthService(token="token").get_pooled_http_client()._transport
+        BearerTokenAuthService(token="new_token").get_pooled_http_client()
+
+    close.assert_called_once_with(transport)
+    client_pool.clear()
+
+
 def _test_tool_call(spec_dict, call_args: dict, path=None):
     spec = OpenAPISpec.from_spec_dict(spec_dict)
     path = path or list(spec.paths)[0]
@@ -3,7 +3,8 @@ from unittest.mock import Mock, patch
 import pytest
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from apps.chat.bots import TopicBot
+from apps.chat import bots
+from apps.chat.bots import TopicBot, get_experiment_routes
 from apps.chat.models import ChatMessageType
 from apps.experiments.models import ExperimentRoute
 from apps.service_providers.models import TraceProvider
@@ -97,6 +98,34 @@ def test_experiment_routing_with_assistant(
     assert set(message.tags.values_list("name", flat=True)) == set([expected_tag, "v1-unreleased"])
 
 
+@pytest.mark.django_db()
+def test_only_the_selected_child_chain_is_created():
+    experiment = _make_experiment_with_routing()
+    session = ExperimentSessionFactory(experiment=experiment)
+    with (
+        mock_llm(responses=["keyword3", "How can I help today?"], token_counts=[0]),
+        patch("apps.chat.bots.create_experiment_runnable", wraps=bots.create_experiment_runnable) as create_runnable,
+    ):
+        bot = TopicBot(session)
+        assert create_runnable.call_count == 1
+        bot.process_input("Hi")
+
+    assert create_runnable.call_count == 2
+    assert list(bot.child_chains) == ["keyword3"]
+
+
+@pytest.mark.django_db()
+def test_routes_of_experiment_versions_are_cached(django_assert_num_queries):
+    experiment = _make_experiment_with_routing()
+    version = experiment.create_new_version()
+    expected_keywords = {"keyword1", "keyword2", "keyword3"}
+
+    bots._route_cache.clear()
+    assert {route.keyword for route in get_experiment_routes(version)} == expected_keywords
+    with django_assert_num_queries(0):
+        assert {route.keyword for route in get_experiment_routes(version)} == expected_keywords
+
+
 def _make_experiment_with_routing(with_default=True, assistant_children=False):
     team = TeamFactory()
     experiments = ExperimentFactory.create_batch(4, team=team)
@@ -15,6 +15,7 @@ from apps.chat.agent.tools import (
     _move_datetime_to_new_weekday_and_time,
     create_schedule_message,
 )
+from apps.custom_actions.models import CustomAction, CustomActionOperation
 from apps.events.models import ScheduledMessage, TimePeriod
 from apps.experiments.models import AgentTools, Experiment
 from apps.utils.factories.events import EventActionFactory
@@ -378,7 +379,45 @@ class TestUpdateParticipantDataTool:
 
         assert session.participant_data_from_experiment == {"test": value}
 
+    def test_update_keeps_other_keys(self, session):
+        self._invoke_tool(session, key="name", value="Jack")
+        self._invoke_tool(session, key="age", value=30)
+
+        assert session.participant_data_from_experiment == {"name": "Jack", "age": 30}
+
 
 @pytest.mark.parametrize("tool", list(AgentTools))
 def test_tools_present(tool):
     assert tool in TOOL_CLASS_MAP
+
+
+@pytest.mark.django_db()
+def test_custom_action_function_defs_are_cached():
+    session = ExperimentSessionFactory()
+    action = CustomAction.objects.create(
+        team=session.team,
+        name="Weather",
+        api_schema={
+            "openapi": "3.0.0",
+            "info": {"title": "Weather API", "version": "1.0.0"},
+            "servers": [{"url": "https://api.weather.com"}],
+            "paths": {"/weather": {"get": {"summary": "Get weather"}}},
+        },
+        allowed_operations=["weather_get"],
+    )
+    operation = CustomActionOperation.objects.create(
+        custom_action=action, experiment=session.experiment, operation_id="weather_get"
+    )
+
+    with mock.patch(
+        "apps.chat.agent.tools.openapi_spec_op_to_function_def", wraps=tools.openapi_spec_op_to_function_def
+    ) as build_function_def:
+        function_def = tools.get_function_def_for_custom_action_operation(operation)
+        assert tools.get_function_def_for_custom_action_operation(operation) is function_def
+        assert build_function_def.call_count == 1
+
+        # the function definition is rebuilt when the schema changes
+        action.api_schema["paths"]["/weather"]["get"]["summary"] = "Get the weather"
+        action.save()
+        assert tools.get_function_def_for_custom_action_operation(operation).description == "Get the weather"
+        assert build_function_def.call_count == 2
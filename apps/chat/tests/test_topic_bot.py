@@ -1,11 +1,14 @@
+import threading
 from unittest import mock
 from unittest.mock import Mock, patch
 
 import pytest
 
 from apps.annotations.models import TagCategories
+from apps.chat import streaming
 from apps.chat.bots import TopicBot
 from apps.chat.models import ChatMessage, ChatMessageType
+from apps.events.models import StaticTriggerType
 from apps.experiments.models import ExperimentRoute, ExperimentRouteType, ExperimentSession, SafetyLayer
 from apps.service_providers.models import TraceProvider
 from apps.utils.factories.experiment import ExperimentFactory, ExperimentSessionFactory
@@ -34,6 +37,90 @@ def test_safety_response(is_safe_mock):
     assert response == expected
 
 
+@pytest.mark.django_db()
+def test_human_safety_layers_are_evaluated_concurrently():
+    session = ExperimentSessionFactory()
+    experiment = session.experiment
+    for _ in range(2):
+        experiment.safety_layers.add(SafetyLayer.objects.create(prompt_text="Is this safe?", team=experiment.team))
+
+    # each check waits for the other one, so this would time out if the checks ran one after the other
+    barrier = threading.Barrier(2, timeout=5)
+
+    def is_safe(message):
+        barrier.wait()
+        return True
+
+    with patch("apps.chat.bots.SafetyBot.is_safe", side_effect=is_safe), mock_llm(responses=["Hello there"]):
+        assert TopicBot(session).process_input("Hi") == "Hello there"
+
+
+@pytest.mark.django_db()
+@patch.object(TopicBot, "speculative_safety_checks", True)
+@patch("apps.chat.bots.SafetyBot.is_safe", Mock(return_value=False))
+@patch("apps.chat.bots.enqueue_static_triggers")
+def test_speculative_response_is_discarded_when_unsafe(enqueue_static_triggers, django_capture_on_commit_callbacks):
+    session = ExperimentSessionFactory()
+    experiment = session.experiment
+    layer = SafetyLayer.objects.create(
+        prompt_text="Is this safe?", team=experiment.team, default_response_to_user="Let's talk about cats instead"
+    )
+    experiment.safety_layers.add(layer)
+
+    with mock_llm(responses=["Sure, here is how"]) as service, django_capture_on_commit_callbacks(execute=True):
+        assert TopicBot(session).process_input("How do I do something bad?") == "Let's talk about cats instead"
+
+    # the response was generated but not kept
+    assert len(service.llm.get_calls()) == 1
+
+    messages = session.chat.messages.order_by("created_at")
+    assert [(message.message_type, message.content) for message in messages] == [
+        (ChatMessageType.HUMAN, "How do I do something bad?"),
+        (ChatMessageType.AI, "Let's talk about cats instead"),
+    ]
+    assert [message.content for message in session.chat.get_langchain_messages_until_summary()] == [
+        "How do I do something bad?",
+        "Let's talk about cats instead",
+    ]
+    # the discarded response was never shown to the participant
+    enqueue_static_triggers.delay.assert_called_once_with(session.id, StaticTriggerType.HUMAN_SAFETY_LAYER_TRIGGERED)
+
+
+@pytest.mark.django_db()
+@patch.object(TopicBot, "speculative_safety_checks", True)
+@patch("apps.chat.bots.SafetyBot.is_safe", Mock(return_value=True))
+@patch("apps.chat.bots.enqueue_static_triggers")
+def test_speculative_response_is_kept_when_safe(enqueue_static_triggers):
+    session = ExperimentSessionFactory()
+    experiment = session.experiment
+    experiment.safety_layers.add(SafetyLayer.objects.create(prompt_text="Is this safe?", team=experiment.team))
+
+    with mock_llm(responses=["Hello there"]):
+        assert TopicBot(session).process_input("Hi") == "Hello there"
+
+    enqueue_static_triggers.delay.assert_called_once_with(session.id, StaticTriggerType.NEW_BOT_MESSAGE)
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(("messages_to_review", "streamed"), [(None, True), ("human", True), ("ai", False)])
+@patch("apps.chat.bots.SafetyBot.is_safe", Mock(return_value=True))
+def test_response_streaming(messages_to_review, streamed):
+    session = ExperimentSessionFactory()
+    experiment = session.experiment
+    if messages_to_review:
+        layer = SafetyLayer.objects.create(
+            prompt_text="Is this safe?", team=experiment.team, messages_to_review=messages_to_review
+        )
+        experiment.safety_layers.add(layer)
+
+    tokens = []
+    with mock_llm(responses=["Hello there"]), streaming.token_callback(tokens.append):
+        assert TopicBot(session).process_input("Hi") == "Hello there"
+
+    # responses that could still be replaced by an AI safety layer are not streamed
+    assert "".join(tokens) == ("Hello there" if streamed else "")
+
+
 @pytest.mark.django_db()
 @patch("apps.service_providers.llm_service.runnables.SimpleLLMChat._get_output_check_cancellation")
 def test_bot_with_terminal_bot(get_output_check_cancellation):
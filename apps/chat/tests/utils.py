@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+
+
+class FakeRedis:
+    """An in-memory stand-in for the Redis stream commands used by `apps.chat.streaming`"""
+
+    def __init__(self):
+        self.streams: dict[str, list[tuple[bytes, dict[bytes, bytes]]]] = {}
+
+    @contextmanager
+    def pipeline(self):
+        yield self
+
+    def execute(self):
+        return []
+
+    def xadd(self, key: str, fields: dict) -> bytes:
+        entries = self.streams.setdefault(key, [])
+        entry_id = f"{len(entries) + 1}-0".encode()
+        entries.append((entry_id, {name.encode(): str(value).encode() for name, value in fields.items()}))
+        return entry_id
+
+    def expire(self, key: str, seconds: int):
+        pass
+
+    def xread(self, streams: dict, block: int | None = None) -> list:
+        response = []
+        for key, last_id in streams.items():
+            last_id = last_id.decode() if isinstance(last_id, bytes) else last_id
+            entries = [
+                entry for entry in self.streams.get(key, []) if _sequence(entry[0].decode()) > _sequence(last_id)
+            ]
+            if entries:
+                response.append((key.encode(), entries))
+        return response
+
+    def xrevrange(self, key: str, count: int | None = None) -> list:
+        return list(reversed(self.streams.get(key, [])))[:count]
+
+
+def _sequence(entry_id: str) -> int:
+    return int(entry_id.split("-")[0])
@@ -1,8 +1,12 @@
 import os
+from unittest.mock import patch
 
 import pytest
+from django.core.cache import cache
 from django.db import connections
+from django.test import override_settings
 
+from apps.chat.tests.utils import FakeRedis
 from apps.utils.factories.experiment import ExperimentFactory
 from apps.utils.factories.team import TeamFactory, TeamWithUsersFactory
 
@@ -22,6 +26,14 @@ def experiment(team_with_users, db):
     return ExperimentFactory(team=team_with_users)
 
 
+@pytest.fixture()
+def fake_redis():
+    """Use an in-memory Redis for response streams instead of the Redis server, which is shared between test runs"""
+    fake_redis = FakeRedis()
+    with patch("apps.chat.streaming.get_redis_client", return_value=fake_redis):
+        yield fake_redis
+
+
 @pytest.fixture(autouse=True, scope="session")
 def _django_db_restore_serialized(request: pytest.FixtureRequest, django_db_keepdb, django_db_blocker) -> None:
     """Restore database data at the end of the session. This is needed because we use transaction test cases
@@ -43,3 +55,16 @@ def _django_db_restore_serialized(request: pytest.FixtureRequest, django_db_keep
 @pytest.fixture(autouse=True, scope="session")
 def _set_env():
     os.environ["UNIT_TESTING"] = "True"
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _local_memory_cache():
+    """Use a per-process cache. The Redis cache is shared between test processes and test runs which each have their
+    own database, so cached data (e.g. chat history keyed by chat ID) could leak between tests."""
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache(_local_memory_cache):
+    cache.clear()
@@ -7,7 +7,7 @@ from dateutil.relativedelta import relativedelta
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.db import models, transaction
-from django.db.models import F, Func, OuterRef, Q, Subquery, functions
+from django.db.models import Count, ExpressionWrapper, F, Func, OuterRef, Q, Subquery, Value, functions
 from django.utils import timezone
 
 from apps.chat.models import ChatMessage, ChatMessageType
@@ -38,7 +38,61 @@ class StaticTriggerObjectManager(VersionsObjectManagerMixin, models.Manager):
 
 
 class TimeoutTriggerObjectManager(VersionsObjectManagerMixin, models.Manager):
-    pass
+    def timed_out_sessions(self) -> models.QuerySet[ExperimentSession]:
+        """Finds the timed out sessions for all active timeout triggers with a single query.
+
+        Sessions are joined with the timeout triggers of their experiment, so a session is returned once for every
+        trigger that is due and is annotated with the `timeout_trigger_id` of that trigger. A session is timed out
+        for a trigger when:
+        - The last human message was sent at a time earlier than the trigger time
+        - There have been fewer trigger attempts for that message than the total number defined by the trigger
+        - There have been fewer failures for that message than `TOTAL_FAILURES`
+        """
+        from apps.chat.tasks import STATUSES_FOR_COMPLETE_CHATS
+
+        last_human_message = ChatMessage.objects.filter(
+            chat_id=OuterRef("chat_id"),
+            message_type=ChatMessageType.HUMAN,
+        ).order_by("-created_at")
+        trigger_logs_for_last_message = EventLog.objects.filter(
+            content_type=ContentType.objects.get_for_model(self.model),
+            object_id=OuterRef("timeout_trigger_id"),
+            session=OuterRef("pk"),
+            chat_message_id=OuterRef("last_human_message_id"),
+        )
+        trigger_time = ExpressionWrapper(
+            Value(timezone.now()) - F("timeout_trigger_delay") * Value(timedelta(seconds=1)),
+            output_field=models.DateTimeField(),
+        )
+
+        return (
+            ExperimentSession.objects.filter(ended_at=None)
+            .exclude(status__in=STATUSES_FOR_COMPLETE_CHATS)
+            .annotate(
+                timeout_trigger_id=F("experiment__timeout_triggers__id"),
+                timeout_trigger_delay=F("experiment__timeout_triggers__delay"),
+                timeout_trigger_total_num_triggers=F("experiment__timeout_triggers__total_num_triggers"),
+                timeout_trigger_is_archived=F("experiment__timeout_triggers__is_archived"),
+            )
+            .filter(timeout_trigger_id__isnull=False, timeout_trigger_is_archived=False)
+            # The last message was received before the trigger time
+            .filter(last_human_message_at__lt=trigger_time)
+            .annotate(
+                last_human_message_id=Subquery(last_human_message.values("id")[:1]),
+                log_count=Subquery(_count_event_logs(trigger_logs_for_last_message, EventLogStatusChoices.SUCCESS)),
+                failure_count=Subquery(_count_event_logs(trigger_logs_for_last_message, EventLogStatusChoices.FAILURE)),
+            )
+            .filter(
+                Q(log_count__lt=F("timeout_trigger_total_num_triggers")) | Q(log_count__isnull=True)
+            )  # There were either no tries yet, or fewer tries than the required number for this message
+            .filter(failure_count__lt=TOTAL_FAILURES)  # There are still failures left
+        )
+
+
+def _count_event_logs(event_logs: models.QuerySet, status: str) -> models.QuerySet:
+    # We don't use Count here because otherwise Django wants to do a group_by, which messes up the subquery:
+    # https://stackoverflow.com/a/69031027
+    return event_logs.filter(status=status).annotate(count=Func(F("chat_message_id"), function="Count")).values("count")
 
 
 class EventActionType(models.TextChoices):
@@ -195,75 +249,13 @@ class TimeoutTrigger(BaseModel, VersionsMixin):
         return "TimeoutTrigger"
 
     def timed_out_sessions(self):
-        """Finds all the timed out sessions where:
-        - The last human message was sent at a time earlier than the trigger time
-        - There have been fewer trigger attempts than the total number defined by the trigger
-        """
-        from apps.chat.tasks import STATUSES_FOR_COMPLETE_CHATS
-
-        trigger_time = timezone.now() - timedelta(seconds=self.delay)
-
-        last_human_message_created_at = (
-            ChatMessage.objects.filter(
-                chat__experiment_session=OuterRef("pk"),
-                message_type=ChatMessageType.HUMAN,
-            )
-            .order_by("-created_at")
-            .values("created_at")[:1]
-        )
-        last_human_message_id = (
-            ChatMessage.objects.filter(
-                chat__experiment_session=OuterRef("session_id"),
-                message_type=ChatMessageType.HUMAN,
-            )
-            .order_by("-created_at")
-            .values("id")[:1]
-        )
-        log_count_for_last_message = (
-            EventLog.objects.filter(
-                session=OuterRef("pk"),
-                chat_message_id=Subquery(last_human_message_id),
-                status=EventLogStatusChoices.SUCCESS,
-            )
-            .annotate(
-                count=Func(F("chat_message_id"), function="Count")
-            )  # We don't use Count here because otherwise Django wants to do a group_by, which messes up the subquery: https://stackoverflow.com/a/69031027
-            .values("count")
-        )
-        failure_count_for_last_message = (
-            EventLog.objects.filter(
-                session=OuterRef("pk"),
-                chat_message_id=Subquery(last_human_message_id),
-                status=EventLogStatusChoices.FAILURE,
-            )
-            .annotate(count=Func(F("chat_message_id"), function="Count"))
-            .values("count")
-        )
-
-        sessions = (
-            ExperimentSession.objects.filter(
-                experiment=self.experiment,
-                ended_at=None,
-            )
-            .exclude(status__in=STATUSES_FOR_COMPLETE_CHATS)
-            .annotate(
-                last_human_message_created_at=Subquery(last_human_message_created_at),
-                log_count=Subquery(log_count_for_last_message),
-                failure_count=Subquery(failure_count_for_last_message),
-            )
-            .filter(
-                last_human_message_created_at__lt=trigger_time,
-                last_human_message_created_at__isnull=False,
-            )  # The last message was received before the trigger time
-            .filter(
-                Q(log_count__lt=self.total_num_triggers) | Q(log_count__isnull=True)
-            )  # There were either no tries yet, or fewer tries than the required number for this message
-            .filter(
-                Q(failure_count__lt=TOTAL_FAILURES)
-                # There are still failures left
-            )
+        """Finds all the sessions that have timed out for this trigger.
+        See `TimeoutTriggerObjectManager.timed_out_sessions`"""
+        return (
+            TimeoutTrigger.objects.timed_out_sessions()
+            .filter(timeout_trigger_id=self.id)
+            .select_related("experiment_channel", "experiment")
         )
-        return sessions.select_related("experiment_channel", "experiment").all()
 
     def fire(self, session) -> str | None:
         last_human_message = ChatMessage.objects.filter(
@@ -291,22 +283,12 @@ class TimeoutTrigger(BaseModel, VersionsMixin):
         return result
 
     def _has_triggers_left(self, session, message):
-        has_succeeded = (
-            self.event_logs.filter(
-                session=session,
-                chat_message=message,
-                status=EventLogStatusChoices.SUCCESS,
-            ).count()
-            >= self.total_num_triggers
-        )
-        failed = (
-            self.event_logs.filter(
-                session=session,
-                chat_message=message,
-                status=EventLogStatusChoices.FAILURE,
-            ).count()
-            >= TOTAL_FAILURES
+        counts = self.event_logs.filter(session=session, chat_message=message).aggregate(
+            successes=Count("id", filter=Q(status=EventLogStatusChoices.SUCCESS)),
+            failures=Count("id", filter=Q(status=EventLogStatusChoices.FAILURE)),
         )
+        has_succeeded = counts["successes"] >= self.total_num_triggers
+        failed = counts["failures"] >= TOTAL_FAILURES
 
         return not (has_succeeded or failed)
 
@@ -1,12 +1,18 @@
 import logging
+from collections import defaultdict
 
+from celery import group
 from celery.app import shared_task
 
 from apps.events.models import ScheduledMessage, StaticTrigger, TimeoutTrigger
 from apps.experiments.models import ExperimentSession
+from apps.service_providers import outbound
 
 logger = logging.getLogger("ocs.events")
 
+# The number of timed out sessions that are loaded from the database, and enqueued, at a time
+TIMED_OUT_SESSIONS_BATCH_SIZE = 50
+
 
 @shared_task(ignore_result=True)
 def enqueue_static_triggers(session_id, trigger_type):
@@ -29,18 +35,28 @@ def fire_static_trigger(trigger_id, session_id):
 
 @shared_task(ignore_result=True)
 def enqueue_timed_out_events():
-    active_triggers = TimeoutTrigger.objects.all()
-    for trigger in active_triggers:
-        for session in trigger.timed_out_sessions():
-            if session.is_stale():
-                logger.warning(
-                    f"ExperimentChannel is pointing to experiment '{session.experiment.name}'"
-                    "whereas the current experiment session points to experiment"
-                    f"'{session.experiment.name}'"
-                )
-                continue
-            else:
-                fire_trigger.delay(trigger.id, session.id)
+    timed_out_sessions = TimeoutTrigger.objects.timed_out_sessions().select_related("experiment", "experiment_channel")
+    trigger_sessions = []
+    for session in timed_out_sessions.iterator(TIMED_OUT_SESSIONS_BATCH_SIZE):
+        if session.is_stale():
+            logger.warning(
+                f"ExperimentChannel is pointing to experiment '{session.experiment.name}'"
+                "whereas the current experiment session points to experiment"
+                f"'{session.experiment.name}'"
+            )
+            continue
+        trigger_sessions.append((session.timeout_trigger_id, session.id))
+        if len(trigger_sessions) == TIMED_OUT_SESSIONS_BATCH_SIZE:
+            _fire_triggers(trigger_sessions)
+            trigger_sessions = []
+
+    if trigger_sessions:
+        _fire_triggers(trigger_sessions)
+
+
+def _fire_triggers(trigger_sessions: list[tuple[int, int]]):
+    # each (trigger, session) pair is fired by its own task so that a failure only affects that session
+    group(fire_trigger.s(trigger_id, session_id) for trigger_id, session_id in trigger_sessions).apply_async()
 
 
 @shared_task(ignore_result=True)
@@ -56,6 +72,9 @@ def poll_scheduled_messages():
     """Polls scheduled messages and triggers those that are due. After triggering, it updates the database with the
     new trigger details for each message."""
 
-    messages = ScheduledMessage.objects.get_messages_to_fire()
-    for message in messages:
-        message.safe_trigger()
+    messages_by_participant = defaultdict(list)
+    for message in ScheduledMessage.objects.get_messages_to_fire():
+        messages_by_participant[(message.participant_id, message.experiment_id)].append(message)
+
+    # Participants' messages are triggered concurrently. Sends are limited by the rate limit of each provider.
+    outbound.dispatch(messages_by_participant.values(), ScheduledMessage.safe_trigger)
@@ -1,9 +1,11 @@
 import logging
+import threading
 from datetime import datetime
 from unittest.mock import patch
 
 import pytest
 from dateutil.relativedelta import relativedelta
+from django.db import connection
 from django.utils import timezone
 from freezegun import freeze_time
 
@@ -12,6 +14,7 @@ from apps.events.tasks import poll_scheduled_messages
 from apps.experiments.models import ExperimentRoute
 from apps.utils.factories.events import EventActionFactory, ScheduledMessageFactory
 from apps.utils.factories.experiment import ExperimentFactory, ExperimentSessionFactory
+from apps.utils.pytest import django_db_with_data
 from apps.utils.time import timedelta_to_relative_delta
 
 
@@ -182,6 +185,56 @@ def test_poll_scheduled_messages(ad_hoc_bot_message, period):
         assert len(ScheduledMessage.objects.get_messages_to_fire()) == 0
 
 
+@django_db_with_data(
+    available_apps=(
+        "apps.chat",
+        "apps.events",
+        "apps.experiments",
+        "apps.service_providers",
+        "apps.teams",
+        "apps.users",
+        "field_audit",
+    )
+)
+def test_poll_scheduled_messages_in_worker_threads(settings):
+    """Messages are triggered by worker threads which use their own database connections"""
+    settings.OUTBOUND_DISPATCH_MAX_WORKERS = 2
+    sessions = [ExperimentSessionFactory(), ExperimentSessionFactory()]
+    messages = []
+    for session in sessions:
+        event_action, params = _construct_event_action(
+            frequency=1, time_period=TimePeriod.DAYS, repetitions=2, experiment_id=session.experiment.id
+        )
+        messages.append(
+            ScheduledMessageFactory(
+                participant=session.participant, action=event_action, team=session.team, experiment=session.experiment
+            )
+        )
+
+    sending_threads = set()
+
+    def _ad_hoc_bot_message(*args, **kwargs):
+        sending_threads.add(threading.current_thread().name)
+
+    with (
+        patch("apps.experiments.models.ExperimentSession.ad_hoc_bot_message", side_effect=_ad_hoc_bot_message),
+        patch("apps.events.models.functions.Now", return_value=timezone.now() + relativedelta(days=1.1)),
+    ):
+        poll_scheduled_messages()
+
+    assert len(sending_threads) == 2
+    assert all(name.startswith("outbound") for name in sending_threads)
+    for message in messages:
+        message.refresh_from_db()
+        assert message.total_triggers == 1
+    # the worker threads closed their connections, so only the connection of this thread is left
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()"
+        )
+        assert cursor.fetchone()[0] == 0
+
+
 @pytest.mark.django_db()
 @patch("apps.channels.forms.TelegramChannelForm._set_telegram_webhook")
 def test_error_when_sending_sending_message_to_a_user(_set_telegram_webhook, caplog):
@@ -5,7 +5,8 @@ import pytest
 from django.test import override_settings
 from freezegun import freeze_time
 
-from apps.chat.models import Chat, ChatMessage, ChatMessageType
+from apps.chat.models import ChatMessage, ChatMessageType
+from apps.events import tasks
 from apps.events.const import TOTAL_FAILURES
 from apps.events.models import (
     EventAction,
@@ -49,15 +50,13 @@ def test_timed_out_sessions(session):
     )
 
     with freeze_time("2024-04-02") as frozen_time:
-        chat = Chat.objects.create(team=session.team)
+        chat = session.chat
         message = ChatMessage.objects.create(
             chat=chat,
             content="Hello",
             message_type=ChatMessageType.HUMAN,
         )
         message.save()
-        session.chat = chat
-        session.save()
 
         frozen_time.tick(delta=timedelta(minutes=15))
         timed_out_sessions = timeout_trigger.timed_out_sessions()
@@ -74,14 +73,12 @@ def test_non_timed_out_sessions(session):
         delay=10,  # 10 seconds
     )
     with freeze_time("2024-04-02") as frozen_time:
-        chat = Chat.objects.create(team=session.team)
+        chat = session.chat
         ChatMessage.objects.create(
             chat=chat,
             content="Hello",
             message_type=ChatMessageType.HUMAN,
         )
-        session.chat = chat
-        session.save()
 
         frozen_time.tick(delta=timedelta(seconds=5))
         timed_out_sessions = timeout_trigger.timed_out_sessions()
@@ -100,15 +97,13 @@ def test_timed_out_sessions_fired(mock_fire_trigger, session):
     )
 
     with freeze_time("2024-04-02") as frozen_time:
-        chat = Chat.objects.create(team=session.team)
+        chat = session.chat
         message = ChatMessage.objects.create(
             chat=chat,
             content="Hello",
             message_type=ChatMessageType.HUMAN,
         )
         message.save()
-        session.chat = chat
-        session.save()
 
         frozen_time.tick(delta=timedelta(minutes=15))
         timed_out_sessions = timeout_trigger.timed_out_sessions()
@@ -117,6 +112,70 @@ def test_timed_out_sessions_fired(mock_fire_trigger, session):
         mock_fire_trigger.assert_called_with(timeout_trigger.id, session.id)
 
 
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+@mock.patch("apps.events.tasks.fire_trigger.run")
+@pytest.mark.django_db()
+def test_timed_out_sessions_fired_for_multiple_triggers(mock_fire_trigger, session):
+    short_trigger = TimeoutTrigger.objects.create(
+        experiment=session.experiment,
+        action=EventAction.objects.create(action_type=EventActionType.LOG),
+        delay=5 * 60,
+    )
+    long_trigger = TimeoutTrigger.objects.create(
+        experiment=session.experiment,
+        action=EventAction.objects.create(action_type=EventActionType.LOG),
+        delay=20 * 60,
+    )
+    other_session = ExperimentSessionFactory(
+        experiment=session.experiment, experiment_channel=session.experiment_channel
+    )
+
+    with freeze_time("2024-04-02") as frozen_time:
+        ChatMessage.objects.create(chat=session.chat, content="Hello", message_type=ChatMessageType.HUMAN)
+        frozen_time.tick(delta=timedelta(minutes=10))
+        ChatMessage.objects.create(chat=other_session.chat, content="Hello", message_type=ChatMessageType.HUMAN)
+
+        enqueue_timed_out_events()
+        mock_fire_trigger.assert_called_once_with(short_trigger.id, session.id)
+
+        mock_fire_trigger.reset_mock()
+        frozen_time.tick(delta=timedelta(minutes=15))
+        enqueue_timed_out_events()
+        assert {call.args for call in mock_fire_trigger.call_args_list} == {
+            (short_trigger.id, session.id),
+            (long_trigger.id, session.id),
+            (short_trigger.id, other_session.id),
+        }
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+@mock.patch("apps.events.tasks.fire_trigger.run")
+@mock.patch("apps.events.tasks.TIMED_OUT_SESSIONS_BATCH_SIZE", 2)
+@pytest.mark.django_db()
+def test_timed_out_sessions_are_enqueued_in_batches(mock_fire_trigger, session):
+    timeout_trigger = TimeoutTrigger.objects.create(
+        experiment=session.experiment,
+        action=EventAction.objects.create(action_type=EventActionType.LOG),
+        delay=5 * 60,
+    )
+    sessions = [session] + ExperimentSessionFactory.create_batch(
+        4, experiment=session.experiment, experiment_channel=session.experiment_channel
+    )
+
+    with freeze_time("2024-04-02") as frozen_time:
+        for timed_out_session in sessions:
+            ChatMessage.objects.create(chat=timed_out_session.chat, content="Hi", message_type=ChatMessageType.HUMAN)
+        frozen_time.tick(delta=timedelta(minutes=10))
+
+        with mock.patch("apps.events.tasks._fire_triggers", wraps=tasks._fire_triggers) as fire_triggers:
+            enqueue_timed_out_events()
+
+    assert [len(call.args[0]) for call in fire_triggers.call_args_list] == [2, 2, 1]
+    assert {call.args for call in mock_fire_trigger.call_args_list} == {
+        (timeout_trigger.id, timed_out_session.id) for timed_out_session in sessions
+    }
+
+
 @pytest.mark.django_db()
 def test_trigger_count_reached(session):
     timeout_trigger = TimeoutTrigger.objects.create(
@@ -126,15 +185,13 @@ def test_trigger_count_reached(session):
         delay=10 * 60,  # 10 minutes
     )
     with freeze_time("2024-04-02") as frozen_time:
-        chat = Chat.objects.create(team=session.team)
+        chat = session.chat
         message = ChatMessage.objects.create(
             chat=chat,
             content="Hello",
             message_type=ChatMessageType.HUMAN,
         )
         message.save()
-        session.chat = chat
-        session.save()
         frozen_time.tick(delta=timedelta(minutes=11))
 
         timeout_trigger.event_logs.create(session=session, chat_message=message, status=EventLogStatusChoices.SUCCESS)
@@ -173,15 +230,13 @@ def test_failure_count_reached(session):
         delay=10 * 60,  # 10 minutes
     )
     with freeze_time("2024-04-02") as frozen_time:
-        chat = Chat.objects.create(team=session.team)
+        chat = session.chat
         message = ChatMessage.objects.create(
             chat=chat,
             content="Hello",
             message_type=ChatMessageType.HUMAN,
         )
         message.save()
-        session.chat = chat
-        session.save()
         frozen_time.tick(delta=timedelta(minutes=11))
         assert len(timeout_trigger.timed_out_sessions()) == 1
 
@@ -207,14 +262,12 @@ def test_failure_count_reached(session):
 
 @pytest.mark.django_db()
 def test_fire_trigger_increments_stats(session):
-    chat = Chat.objects.create(team=session.team)
+    chat = session.chat
     ChatMessage.objects.create(
         chat=chat,
         content="Hello",
         message_type=ChatMessageType.HUMAN,
     )
-    session.chat = chat
-    session.save()
     timeout_trigger = TimeoutTrigger.objects.create(
         experiment=session.experiment,
         action=EventAction.objects.create(action_type=EventActionType.LOG),
@@ -234,14 +287,12 @@ def test_fire_trigger_increments_stats(session):
 
 @pytest.mark.django_db()
 def test_new_human_message_resets_count(session):
-    chat = Chat.objects.create(team=session.team)
+    chat = session.chat
     first_message = ChatMessage.objects.create(
         chat=chat,
         content="Hello",
         message_type=ChatMessageType.HUMAN,
     )
-    session.chat = chat
-    session.save()
     timeout_trigger = TimeoutTrigger.objects.create(
         experiment=session.experiment,
         action=EventAction.objects.create(action_type=EventActionType.LOG),
@@ -294,15 +345,13 @@ def test_not_triggered_for_complete_chats(status, matches, session):
         delay=10 * 60,
     )
     with freeze_time("2024-04-02") as frozen_time:
-        chat = Chat.objects.create(team=session.team)
+        chat = session.chat
         message = ChatMessage.objects.create(
             chat=chat,
             content="Hello",
             message_type=ChatMessageType.HUMAN,
         )
         message.save()
-        session.chat = chat
-        session.save()
 
         frozen_time.tick(delta=timedelta(minutes=15))
         timed_out_sessions = timeout_trigger.timed_out_sessions()
@@ -321,15 +370,13 @@ def test_not_triggered_no_human_message(session):
         delay=10 * 60,
     )
     with freeze_time("2024-04-02") as frozen_time:
-        chat = Chat.objects.create(team=session.team)
+        chat = session.chat
         message = ChatMessage.objects.create(
             chat=chat,
             content="Hello",
             message_type=ChatMessageType.AI,
         )
         message.save()
-        session.chat = chat
-        session.save()
 
         frozen_time.tick(delta=timedelta(minutes=15))
         timed_out_sessions = timeout_trigger.timed_out_sessions()
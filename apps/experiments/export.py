@@ -1,14 +1,41 @@
 import csv
 import io
+from collections import defaultdict
+from collections.abc import Callable, Iterator
 
-from apps.annotations.models import Tag, UserComment
+from django.contrib.contenttypes.models import ContentType
+
+from apps.annotations.models import CustomTaggedItem, UserComment
+from apps.chat.models import Chat, ChatMessage
 from apps.experiments.filters import apply_dynamic_filters
 from apps.experiments.models import ExperimentSession
 
+# The number of sessions to load at a time when exporting
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_HEADER = [
+    "Message ID",
+    "Message Date",
+    "Message Type",
+    "Message Content",
+    "Platform",
+    "Chat Tags",
+    "Chat Comments",
+    "Session ID",
+    "Session LLM",
+    "Experiment ID",
+    "Experiment Name",
+    "Participant Name",
+    "Participant Identifier",
+    "Participant Public ID",
+    "Message Tags",
+    "Message Comments",
+]
 
-def _format_tags(tags: list[Tag]) -> str:
-    """Returns `tags` parsed into a single string in the format 'tag1, tag2, tag3'"""
-    return ", ".join([t.name for t in tags])
+
+def _format_tags(tag_names: list[str]) -> str:
+    """Returns `tag_names` parsed into a single string in the format 'tag1, tag2, tag3'"""
+    return ", ".join(tag_names)
 
 
 def _format_comments(user_comments: list[UserComment]) -> str:
@@ -21,11 +48,7 @@ def _format_comments(user_comments: list[UserComment]) -> str:
 def get_filtered_sessions(request, experiment, query_params, include_api=False):
     from apps.channels.models import ChannelPlatform
 
-    sessions_queryset = (
-        ExperimentSession.objects.with_last_message_created_at()
-        .filter(experiment=experiment)
-        .select_related("participant__user")
-    )
+    sessions_queryset = ExperimentSession.objects.filter(experiment=experiment).select_related("participant__user")
 
     if not include_api:
         sessions_queryset = sessions_queryset.exclude(experiment_channel__platform=ChannelPlatform.API)
@@ -34,59 +57,100 @@ def get_filtered_sessions(request, experiment, query_params, include_api=False):
     return sessions_queryset
 
 
-def filtered_export_to_csv(experiment, sessions_queryset):
+def filtered_export_to_csv(experiment, sessions_queryset) -> io.StringIO:
     csv_in_memory = io.StringIO()
-    writer = csv.writer(csv_in_memory, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
-
-    queryset = sessions_queryset.prefetch_related(
-        "chat",
-        "chat__messages",
-        "participant",
-        "experiment_channel",
-        "chat__tags",
-        "chat__messages__tags",
-        "chat__messages__comments",
-        "chat__messages__comments__user",
-    )
-    header = [
-        "Message ID",
-        "Message Date",
-        "Message Type",
-        "Message Content",
-        "Platform",
-        "Chat Tags",
-        "Chat Comments",
-        "Session ID",
-        "Session LLM",
-        "Experiment ID",
-        "Experiment Name",
-        "Participant Name",
-        "Participant Identifier",
-        "Participant Public ID",
-        "Message Tags",
-        "Message Comments",
-    ]
-    writer.writerow(header)
-
-    for session in queryset:
-        for message in session.chat.messages.all():
-            row = [
-                message.id,
-                message.created_at,
-                message.message_type,
-                message.content,
-                session.get_platform_name(),
-                _format_tags(message.chat.tags.all()),
-                _format_comments(message.chat.comments.all()),
-                session.external_id,
-                experiment.get_llm_provider_model_name(raises=False),
-                experiment.public_id,
-                experiment.name,
-                session.participant.name,
-                session.participant.identifier,
-                session.participant.public_id,
-                _format_tags(message.tags.all()),
-                _format_comments(message.comments.all()),
-            ]
-            writer.writerow(row)
+    write_filtered_export_csv(experiment, sessions_queryset, csv_in_memory)
     return csv_in_memory
+
+
+def write_filtered_export_csv(
+    experiment,
+    sessions_queryset,
+    output,
+    progress_callback: Callable[[int, int], None] | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+):
+    """Write the chat export for the sessions in `sessions_queryset` to the `output` text stream.
+
+    Sessions are loaded in batches (paginated by ID) and the messages, tags and comments for each batch are loaded
+    with a fixed number of queries, so memory usage does not grow with the size of the export.
+
+    `progress_callback` is called after each batch with the number of sessions exported so far and the total.
+    """
+    writer = csv.writer(output, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(EXPORT_HEADER)
+
+    llm_name = experiment.get_llm_provider_model_name(raises=False)
+    total_sessions = sessions_queryset.count() if progress_callback else None
+    exported_sessions = 0
+    session_ids = sessions_queryset.order_by("id").values_list("id", flat=True)
+    last_session_id = 0
+    while batch_ids := list(session_ids.filter(id__gt=last_session_id)[:batch_size]):
+        last_session_id = batch_ids[-1]
+        for row in _get_export_rows_for_sessions(experiment, llm_name, batch_ids):
+            writer.writerow(row)
+
+        exported_sessions += len(batch_ids)
+        if progress_callback:
+            progress_callback(exported_sessions, total_sessions)
+
+
+def _get_export_rows_for_sessions(experiment, llm_name: str, session_ids: list[int]) -> Iterator[list]:
+    sessions = ExperimentSession.objects.filter(id__in=session_ids).select_related("participant", "experiment_channel")
+    sessions_by_chat_id = {session.chat_id: session for session in sessions}
+    chat_ids = list(sessions_by_chat_id)
+    messages = ChatMessage.objects.filter(chat_id__in=chat_ids)
+    message_ids = messages.values("id")
+
+    chat_tags = _get_tag_names(Chat, chat_ids)
+    chat_comments = _get_comments(Chat, chat_ids)
+    message_tags = _get_tag_names(ChatMessage, message_ids)
+    message_comments = _get_comments(ChatMessage, message_ids)
+
+    message_values = messages.order_by("chat_id", "created_at").values_list(
+        "id", "created_at", "message_type", "content", "chat_id"
+    )
+    for message_id, created_at, message_type, content, chat_id in message_values.iterator(EXPORT_BATCH_SIZE):
+        session = sessions_by_chat_id[chat_id]
+        yield [
+            message_id,
+            created_at,
+            message_type,
+            content,
+            session.get_platform_name(),
+            _format_tags(chat_tags[chat_id]),
+            _format_comments(chat_comments[chat_id]),
+            session.external_id,
+            llm_name,
+            experiment.public_id,
+            experiment.name,
+            session.participant.name,
+            session.participant.identifier,
+            session.participant.public_id,
+            _format_tags(message_tags[message_id]),
+            _format_comments(message_comments[message_id]),
+        ]
+
+
+def _get_tag_names(model, object_ids) -> dict[int, list[str]]:
+    tagged_items = (
+        CustomTaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=object_ids)
+        .order_by("tag__name")
+        .values_list("object_id", "tag__name")
+    )
+    tag_names = defaultdict(list)
+    for object_id, tag_name in tagged_items:
+        tag_names[object_id].append(tag_name)
+    return tag_names
+
+
+def _get_comments(model, object_ids) -> dict[int, list[UserComment]]:
+    user_comments = (
+        UserComment.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=object_ids)
+        .select_related("user")
+        .order_by("created_at")
+    )
+    comments = defaultdict(list)
+    for comment in user_comments:
+        comments[comment.object_id].append(comment)
+    return comments
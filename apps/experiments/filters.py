@@ -1,11 +1,7 @@
 import json
 from datetime import datetime
 
-from django.contrib.contenttypes.models import ContentType
-from django.db.models import Exists, OuterRef, Q
-
-from apps.annotations.models import CustomTaggedItem
-from apps.chat.models import Chat, ChatMessage
+from django.db.models import Q
 
 
 def apply_dynamic_filters(query_set, request, parsed_params=None):
@@ -31,7 +27,7 @@ def apply_dynamic_filters(query_set, request, parsed_params=None):
             filter_applied = True
 
     if filter_applied:
-        query_set = query_set.filter(filter_conditions).distinct()
+        query_set = query_set.filter(filter_conditions)
 
     return query_set
 
@@ -70,11 +66,11 @@ def build_timestamp_filter(operator, value):
     try:
         date_value = datetime.strptime(value, "%Y-%m-%d").date()
         if operator == "on":
-            return Q(last_message_created_at__date=date_value)
+            return Q(last_message_at__date=date_value)
         elif operator == "before":
-            return Q(last_message_created_at__date__lt=date_value)
+            return Q(last_message_at__date__lt=date_value)
         elif operator == "after":
-            return Q(last_message_created_at__date__gt=date_value)
+            return Q(last_message_at__date__gt=date_value)
     except (ValueError, TypeError):
         pass
     return None
@@ -86,19 +82,9 @@ def build_tags_filter(operator, value):
         if not selected_tags:
             return None
         if operator == "any of":
-            return Q(chat__tags__name__in=selected_tags)
+            return Q(tag_names__overlap=selected_tags)
         elif operator == "all of":
-            content_type = ContentType.objects.get_for_model(Chat)
-            conditions = Q()
-            for tag in selected_tags:
-                conditions &= Exists(
-                    CustomTaggedItem.objects.filter(
-                        object_id=OuterRef("id"),
-                        content_type_id=content_type,
-                        tag__name=tag,
-                    )
-                )
-            return conditions
+            return Q(tag_names__contains=selected_tags)
     except json.JSONDecodeError:
         pass
     return None
@@ -109,32 +95,19 @@ def build_versions_filter(operator, value):
         version_strings = json.loads(value)
         if not version_strings:
             return None
-        version_tags = [v for v in version_strings if v]
+        version_names = [v for v in version_strings if v]
         if operator == "any of":
-            tag_exists = [
-                ChatMessage.objects.filter(
-                    chat=OuterRef("chat"),
-                    tags__name__startswith=tag,
-                    tags__category=Chat.MetadataKeys.EXPERIMENT_VERSION,
-                ).values("id")
-                for tag in version_tags
-            ]
-            combined_query = Q()
-            for query in tag_exists:
-                combined_query |= Q(Exists(query))
-
-            return combined_query
-
+            return Q(version_tags__overlap=[tag for name in version_names for tag in _get_version_tags(name)])
         elif operator == "all of":
             q_objects = Q()
-            for tag in version_tags:
-                tag_exists = ChatMessage.objects.filter(
-                    chat=OuterRef("chat"),
-                    tags__name__startswith=tag,
-                    tags__category=Chat.MetadataKeys.EXPERIMENT_VERSION,
-                ).values("id")
-                q_objects &= Q(Exists(tag_exists))
+            for name in version_names:
+                q_objects &= Q(version_tags__overlap=_get_version_tags(name))
             return q_objects
     except json.JSONDecodeError:
         pass
     return None
+
+
+def _get_version_tags(version_name: str) -> list[str]:
+    """Messages generated by the working version of an experiment are tagged with the name of the next version"""
+    return [version_name, f"{version_name}-unreleased"]
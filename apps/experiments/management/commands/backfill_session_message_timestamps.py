@@ -0,0 +1,37 @@
+from django.core.management import BaseCommand
+from django.db.models import Max, Min
+
+from apps.experiments.models import ExperimentSession
+
+
+class Command(BaseCommand):
+    help = "Populate the `last_message_at` and `last_human_message_at` fields of experiment sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="The number of sessions to update at once")
+        parser.add_argument(
+            "--all",
+            dest="update_all",
+            action="store_true",
+            help="Update all sessions, not only the ones without a `last_message_at`",
+        )
+
+    def handle(self, batch_size, update_all, **options):
+        sessions = ExperimentSession.objects.all()
+        if not update_all:
+            sessions = sessions.filter(last_message_at__isnull=True)
+
+        id_range = sessions.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if id_range["min_id"] is None:
+            self.stdout.write("No sessions to update")
+            return
+
+        updated = 0
+        for start_id in range(id_range["min_id"], id_range["max_id"] + 1, batch_size):
+            filters = {"id__gte": start_id, "id__lt": start_id + batch_size}
+            if not update_all:
+                filters["last_message_at__isnull"] = True
+            updated += ExperimentSession.objects.backfill_last_message_timestamps(**filters)
+            self.stdout.write(f"Updated {updated} sessions (up to id {start_id + batch_size - 1})")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. Updated {updated} sessions"))
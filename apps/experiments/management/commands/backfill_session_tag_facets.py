@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+from django.db.models import Max, Min
+
+from apps.experiments.models import ExperimentSession
+
+
+class Command(BaseCommand):
+    help = "Populate the `tag_names` and `version_tags` fields of experiment sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="The number of sessions to update at once")
+
+    def handle(self, batch_size, **options):
+        id_range = ExperimentSession.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if id_range["min_id"] is None:
+            self.stdout.write("No sessions to update")
+            return
+
+        updated = 0
+        for start_id in range(id_range["min_id"], id_range["max_id"] + 1, batch_size):
+            updated += ExperimentSession.objects.backfill_tag_facets(id__gte=start_id, id__lt=start_id + batch_size)
+            self.stdout.write(f"Updated {updated} sessions (up to id {start_id + batch_size - 1})")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. Updated {updated} sessions"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.5 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('channels', '0021_alter_experimentchannel_platform'),
+        ('chat', '0017_change_chatmessage_metadata'),
+        ('experiments', '0110_alter_participantdata_data'),
+        ('teams', '0007_create_commcare_connect_flag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experimentsession',
+            name='last_human_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='experimentsession',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='experimentsession',
+            index=models.Index(fields=['experiment', 'last_message_at'], name='experiments_experim_989336_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experimentsession',
+            index=models.Index(condition=models.Q(('ended_at', None)), fields=['last_human_message_at'], name='session_last_human_msg_idx'),
+        ),
+    ]
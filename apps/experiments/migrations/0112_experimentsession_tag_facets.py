@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-18 06:25
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0111_experimentsession_last_message_at'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='experimentsession',
+            name='tag_names',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='experimentsession',
+            name='version_tags',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='experimentsession',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_names'], name='session_tag_names_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experimentsession',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['version_tags'], name='session_version_tags_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('identifier'), name='gin_trgm_ops'), name='participant_identifier_trgm'),
+        ),
+    ]
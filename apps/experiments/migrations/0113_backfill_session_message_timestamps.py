@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.db.models import Max, Min, OuterRef, Subquery
+
+from apps.chat.models import ChatMessageType
+
+BATCH_SIZE = 1000
+
+
+def _backfill_message_timestamps(apps, schema_editor):
+    """Sets `last_message_at` and `last_human_message_at` of existing sessions. The timeout triggers find timed out
+    sessions by `last_human_message_at`, so sessions without it would never time out."""
+    ExperimentSession = apps.get_model("experiments", "ExperimentSession")
+    ChatMessage = apps.get_model("chat", "ChatMessage")
+
+    sessions = ExperimentSession.objects.filter(last_message_at__isnull=True)
+    id_range = sessions.aggregate(min_id=Min("id"), max_id=Max("id"))
+    if id_range["min_id"] is None:
+        return
+
+    chat_messages = ChatMessage.objects.filter(chat_id=OuterRef("chat_id")).order_by("-created_at")
+    for start_id in range(id_range["min_id"], id_range["max_id"] + 1, BATCH_SIZE):
+        sessions.filter(id__gte=start_id, id__lt=start_id + BATCH_SIZE).update(
+            last_message_at=Subquery(chat_messages.values("created_at")[:1]),
+            last_human_message_at=Subquery(
+                chat_messages.filter(message_type=ChatMessageType.HUMAN).values("created_at")[:1]
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+    # each batch is committed on its own
+    atomic = False
+
+    dependencies = [
+        ("experiments", "0112_experimentsession_tag_facets"),
+    ]
+
+    operations = [
+        migrations.RunPython(_backfill_message_timestamps, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,51 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import migrations
+from django.db.models import Max, Min, OuterRef
+
+from apps.annotations.models import TagCategories
+
+BATCH_SIZE = 1000
+
+
+def _backfill_tag_facets(apps, schema_editor):
+    """Sets `tag_names` and `version_tags` of existing sessions, which are used to filter sessions by tags and
+    versions"""
+    ExperimentSession = apps.get_model("experiments", "ExperimentSession")
+    Chat = apps.get_model("chat", "Chat")
+    ChatMessage = apps.get_model("chat", "ChatMessage")
+    CustomTaggedItem = apps.get_model("annotations", "CustomTaggedItem")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+
+    id_range = ExperimentSession.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+    if id_range["min_id"] is None:
+        return
+
+    chat_content_type = ContentType.objects.get_for_model(Chat)
+    message_content_type = ContentType.objects.get_for_model(ChatMessage)
+    chat_tags = CustomTaggedItem.objects.filter(content_type=chat_content_type, object_id=OuterRef("chat_id"))
+    message_version_tags = CustomTaggedItem.objects.filter(
+        content_type=message_content_type,
+        object_id__in=ChatMessage.objects.filter(chat_id=OuterRef(OuterRef("chat_id"))).values("id"),
+        tag__category=TagCategories.EXPERIMENT_VERSION,
+    )
+    for start_id in range(id_range["min_id"], id_range["max_id"] + 1, BATCH_SIZE):
+        ExperimentSession.objects.filter(id__gte=start_id, id__lt=start_id + BATCH_SIZE).update(
+            tag_names=ArraySubquery(chat_tags.values("tag__name").order_by("tag__name")),
+            version_tags=ArraySubquery(message_version_tags.values("tag__name").distinct()),
+        )
+
+
+class Migration(migrations.Migration):
+    # each batch is committed on its own
+    atomic = False
+
+    dependencies = [
+        ("annotations", "0007_alter_tag_category"),
+        ("chat", "0017_change_chatmessage_metadata"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("experiments", "0113_backfill_session_message_timestamps"),
+    ]
+
+    operations = [
+        migrations.RunPython(_backfill_tag_facets, migrations.RunPython.noop, elidable=True),
+    ]
@@ -10,7 +10,10 @@ from uuid import uuid4
 import markdown
 import pytz
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.expressions import ArraySubquery
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, validate_email
 from django.db import models, transaction
@@ -20,6 +23,7 @@ from django.db.models import (
     CharField,
     Count,
     F,
+    Func,
     OuterRef,
     Q,
     Subquery,
@@ -27,7 +31,7 @@ from django.db.models import (
     Value,
     When,
 )
-from django.db.models.functions import Cast, Concat
+from django.db.models.functions import Cast, Concat, Greatest, Upper
 from django.template.loader import get_template
 from django.urls import reverse
 from django.utils import timezone
@@ -36,7 +40,7 @@ from django_cryptography.fields import encrypt
 from field_audit import audit_fields
 from field_audit.models import AuditAction, AuditingManager
 
-from apps.annotations.models import Tag
+from apps.annotations.models import CustomTaggedItem, Tag, TagCategories
 from apps.chat.models import Chat, ChatMessage, ChatMessageType
 from apps.custom_actions.mixins import CustomActionOperationMixin
 from apps.experiments import model_audit_fields
@@ -1335,6 +1339,10 @@ class Participant(BaseTeamModel):
     class Meta:
         ordering = ["platform", "identifier"]
         unique_together = [("team", "platform", "identifier")]
+        indexes = [
+            # Supports the case insensitive 'contains' and 'ends with' filters of the session table
+            GinIndex(OpClass(Upper("identifier"), name="gin_trgm_ops"), name="participant_identifier_trgm"),
+        ]
 
     @classmethod
     def create_anonymous(cls, team: Team, platform: str) -> "Participant":
@@ -1568,15 +1576,63 @@ class ExperimentSessionObjectManager(models.Manager):
     def for_chat_id(self, chat_id: str) -> list["ExperimentSession"]:
         return self.filter(participant__identifier=chat_id)
 
-    def with_last_message_created_at(self):
-        last_message_created_at = (
-            ChatMessage.objects.filter(
-                chat__experiment_session=models.OuterRef("pk"),
+    def update_last_message_timestamps(self, messages: list[ChatMessage]):
+        """Move `last_message_at` and `last_human_message_at` forward for the sessions that `messages` belong to.
+
+        The timestamps are only ever increased using `GREATEST` in a single UPDATE statement, so concurrent writers
+        cannot move them backwards.
+        """
+        timestamps_by_chat = {}
+        for message in messages:
+            last_message_at, last_human_message_at = timestamps_by_chat.get(message.chat_id, (None, None))
+            last_message_at = max(filter(None, [last_message_at, message.created_at]))
+            if message.message_type == ChatMessageType.HUMAN:
+                last_human_message_at = max(filter(None, [last_human_message_at, message.created_at]))
+            timestamps_by_chat[message.chat_id] = (last_message_at, last_human_message_at)
+
+        for chat_id, (last_message_at, last_human_message_at) in timestamps_by_chat.items():
+            # Postgres' GREATEST ignores NULL values, so this also works for sessions without any messages
+            updates = {"last_message_at": Greatest("last_message_at", Value(last_message_at))}
+            if last_human_message_at:
+                updates["last_human_message_at"] = Greatest("last_human_message_at", Value(last_human_message_at))
+            self.filter(chat_id=chat_id).update(**updates)
+
+    def add_version_tags(self, chat_id: int, version_tags: list[str]):
+        """Add `version_tags` to the `version_tags` of the session of the chat, if they aren't there already"""
+        version_tags_field = ExperimentSession._meta.get_field("version_tags")
+        for tag in version_tags:
+            self.filter(chat_id=chat_id).exclude(version_tags__contains=[tag]).update(
+                version_tags=Func(
+                    F("version_tags"), Value(tag), function="array_append", output_field=version_tags_field
+                )
             )
-            .order_by("-created_at")
-            .values("created_at")[:1]
+
+    def backfill_tag_facets(self, *args, **filters) -> int:
+        """Set `tag_names` and `version_tags` from the tags of the chats, and the chat messages, of the sessions
+        matching the filters. Returns the number of sessions updated."""
+        chat_tags = CustomTaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Chat), object_id=OuterRef("chat_id")
+        )
+        message_version_tags = CustomTaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(ChatMessage),
+            object_id__in=ChatMessage.objects.filter(chat_id=OuterRef(OuterRef("chat_id"))).values("id"),
+            tag__category=TagCategories.EXPERIMENT_VERSION,
+        )
+        return self.filter(*args, **filters).update(
+            tag_names=ArraySubquery(chat_tags.values("tag__name").order_by("tag__name")),
+            version_tags=ArraySubquery(message_version_tags.values("tag__name").distinct()),
+        )
+
+    def backfill_last_message_timestamps(self, **filters) -> int:
+        """Set `last_message_at` and `last_human_message_at` from the chat messages of the sessions matching
+        `filters`. Returns the number of sessions updated."""
+        chat_messages = ChatMessage.objects.filter(chat_id=OuterRef("chat_id")).order_by("-created_at")
+        return self.filter(**filters).update(
+            last_message_at=Subquery(chat_messages.values("created_at")[:1]),
+            last_human_message_at=Subquery(
+                chat_messages.filter(message_type=ChatMessageType.HUMAN).values("created_at")[:1]
+            ),
         )
-        return self.annotate(last_message_created_at=models.Subquery(last_message_created_at))
 
 
 class ExperimentSession(BaseTeamModel):
@@ -1605,25 +1661,71 @@ class ExperimentSession(BaseTeamModel):
         blank=True,
     )
     state = models.JSONField(default=dict)
+    # These are denormalized from the chat messages and kept up to date by `update_last_message_timestamps`
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_human_message_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # These are denormalized from the tags of the chat and the version tags of its messages, and are kept up to date
+    # by the tag signal handlers
+    tag_names = ArrayField(models.CharField(max_length=255), default=list, blank=True, editable=False)
+    version_tags = ArrayField(models.CharField(max_length=255), default=list, blank=True, editable=False)
+
+    MESSAGE_TIMESTAMP_FIELDS = ("last_message_at", "last_human_message_at")
+    TAG_FACET_FIELDS = ("tag_names", "version_tags")
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["experiment", "last_message_at"]),
+            models.Index(
+                fields=["last_human_message_at"], condition=Q(ended_at=None), name="session_last_human_msg_idx"
+            ),
+            GinIndex(fields=["tag_names"], name="session_tag_names_idx"),
+            GinIndex(fields=["version_tags"], name="session_version_tags_idx"),
+        ]
 
     def __str__(self):
         return f"ExperimentSession(id={self.external_id})"
 
     def save(self, *args, **kwargs):
+        backfill_message_timestamps = False
         if not hasattr(self, "chat"):
             self.chat = Chat.objects.create(team=self.team, name=self.experiment.name)
+        elif self._state.adding:
+            # The chat may already have messages
+            backfill_message_timestamps = True
         if not self.external_id:
             self.external_id = str(uuid.uuid4())
 
-        super().save(*args, **kwargs)
+        kept_fields = ()
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # The message timestamps and tag facets are updated in the DB when messages or tags are created, so keep
+            # the values in the DB instead of overwriting them with the (potentially stale) values on this instance
+            kept_fields = self.MESSAGE_TIMESTAMP_FIELDS + self.TAG_FACET_FIELDS
+            for field in kept_fields:
+                setattr(self, field, F(field))
+
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            for field in kept_fields:
+                # they are loaded from the DB when they are next accessed
+                del self.__dict__[field]
+
+        if backfill_message_timestamps:
+            ExperimentSession.objects.backfill_last_message_timestamps(id=self.id)
+            ExperimentSession.objects.backfill_tag_facets(id=self.id)
+            self.refresh_from_db(fields=self.MESSAGE_TIMESTAMP_FIELDS + self.TAG_FACET_FIELDS)
 
     def has_display_messages(self) -> bool:
-        return bool(self.get_messages_for_display())
+        return self._get_display_messages_queryset().exists()
+
+    def get_messages_for_display(self) -> list[ChatMessage]:
+        messages = list(self._get_display_messages_queryset())
+        # the tags of every message are rendered
+        ChatMessage.prefetch_tags(messages)
+        return messages
 
-    def get_messages_for_display(self):
+    def _get_display_messages_queryset(self):
         if self.seed_task_id:
             return self.chat.messages.all()[1:]
         else:
@@ -1668,7 +1770,7 @@ class ExperimentSession(BaseTeamModel):
 
         if self.experiment_channel.platform in ChannelPlatform.team_global_platforms():
             return False
-        return self.experiment_channel.experiment != self.experiment
+        return self.experiment_channel.experiment_id != self.experiment_id
 
     def is_complete(self):
         return self.status == SessionStatus.COMPLETE
@@ -1,10 +1,14 @@
-from django.db.models.signals import post_save
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from apps.annotations.models import CustomTaggedItem, Tag, TagCategories
+from apps.chat.models import Chat, ChatMessage
 from apps.teams.models import Team
 
 from .const import DEFAULT_CONSENT_TEXT
-from .models import ConsentForm
+from .models import ConsentForm, ExperimentSession
 
 
 @receiver(post_save, sender=Team)
@@ -22,3 +26,74 @@ def create_default_consent_for_team(team):
             "consent_text": DEFAULT_CONSENT_TEXT,
         },
     )
+
+
+@receiver(post_save, sender=ChatMessage)
+def update_session_last_message_timestamps_handler(sender, instance, created, **kwargs):
+    if created:
+        ExperimentSession.objects.update_last_message_timestamps([instance])
+
+
+@receiver(m2m_changed, sender=CustomTaggedItem)
+def update_session_tag_facets_handler(sender, instance, action, model, pk_set, **kwargs):
+    """Tags that are removed are handled when their tagged items are deleted"""
+    if action != "post_add" or not pk_set:
+        return
+
+    if isinstance(instance, Chat):
+        ExperimentSession.objects.backfill_tag_facets(chat_id=instance.id)
+    elif isinstance(instance, ChatMessage):
+        version_tags = Tag.objects.filter(id__in=pk_set, category=TagCategories.EXPERIMENT_VERSION)
+        ExperimentSession.objects.add_version_tags(instance.chat_id, list(version_tags.values_list("name", flat=True)))
+    elif isinstance(instance, Tag):
+        # the tag was added to the objects in `pk_set` from the tag's side of the relation
+        if model is Chat:
+            ExperimentSession.objects.backfill_tag_facets(chat_id__in=pk_set)
+        elif model is ChatMessage and instance.category == TagCategories.EXPERIMENT_VERSION:
+            chat_ids = ChatMessage.objects.filter(id__in=pk_set).values_list("chat_id", flat=True).distinct()
+            for chat_id in chat_ids:
+                ExperimentSession.objects.add_version_tags(chat_id, [instance.name])
+
+
+@receiver(post_delete, sender=CustomTaggedItem)
+def remove_session_tag_facets_handler(sender, instance, origin, **kwargs):
+    if isinstance(origin, Tag):
+        # The sessions of all the tag's items are updated at once when the tag is deleted
+        return
+
+    tag = Tag.objects.filter(id=instance.tag_id).values("name", "category").first()
+    if not tag:
+        return
+
+    # only the sessions that have the tag need to be updated
+    content_type = ContentType.objects.get_for_id(instance.content_type_id)
+    if content_type.model_class() is Chat:
+        ExperimentSession.objects.backfill_tag_facets(chat_id=instance.object_id, tag_names__contains=[tag["name"]])
+    elif content_type.model_class() is ChatMessage and tag["category"] == TagCategories.EXPERIMENT_VERSION:
+        chat_id = ChatMessage.objects.filter(id=instance.object_id).values("chat_id")
+        ExperimentSession.objects.backfill_tag_facets(chat_id__in=chat_id, version_tags__contains=[tag["name"]])
+
+
+@receiver(post_save, sender=Tag)
+def update_renamed_tag_facets_handler(sender, instance, created, **kwargs):
+    if not created:
+        ExperimentSession.objects.backfill_tag_facets(chat_id__in=_get_tagged_chat_ids(instance))
+
+
+@receiver(post_delete, sender=Tag)
+def update_deleted_tag_facets_handler(sender, instance, **kwargs):
+    # The facets hold tag names, so the sessions that had the tag can be found with the facet indexes
+    ExperimentSession.objects.backfill_tag_facets(
+        Q(tag_names__contains=[instance.name]) | Q(version_tags__contains=[instance.name]), team_id=instance.team_id
+    )
+
+
+def _get_tagged_chat_ids(tag: Tag) -> set[int]:
+    """Returns the IDs of the chats that are tagged with `tag`, or that have a message tagged with it"""
+    tagged_items = CustomTaggedItem.objects.filter(tag=tag)
+    chat_ids = set(
+        tagged_items.filter(content_type=ContentType.objects.get_for_model(Chat)).values_list("object_id", flat=True)
+    )
+    message_ids = tagged_items.filter(content_type=ContentType.objects.get_for_model(ChatMessage)).values("object_id")
+    chat_ids.update(ChatMessage.objects.filter(id__in=message_ids).values_list("chat_id", flat=True))
+    return chat_ids
@@ -150,7 +150,7 @@ def _show_chat_button(request, record):
 
 class ExperimentSessionsTable(tables.Table):
     participant = columns.Column(accessor="participant", verbose_name="Participant", order_by="participant__identifier")
-    last_message = columns.Column(accessor="last_message_created_at", verbose_name="Last Message", orderable=True)
+    last_message = columns.Column(accessor="last_message_at", verbose_name="Last Message", orderable=True)
     tags = columns.TemplateColumn(
         verbose_name="Tags",
         template_name="annotations/tag_ui.html",
@@ -1,17 +1,21 @@
+import io
 import logging
+import tempfile
 import time
 
 from celery.app import shared_task
-from django.core.files.base import ContentFile
+from celery_progress.backend import ProgressRecorder
+from django.core.files.base import File as DjangoFile
 from django.utils import timezone
 from field_audit.models import AuditAction
 from langchain_core.messages import AIMessage, HumanMessage
 from taskbadger.celery import Task as TaskbadgerTask
 
 from apps.channels.datamodels import Attachment, BaseMessage
+from apps.chat import streaming
 from apps.chat.bots import create_conversation
 from apps.chat.channels import WebChannel
-from apps.experiments.export import filtered_export_to_csv, get_filtered_sessions
+from apps.experiments.export import get_filtered_sessions, write_filtered_export_csv
 from apps.experiments.models import Experiment, ExperimentSession, PromptBuilderHistory, SourceMaterial
 from apps.files.models import File
 from apps.service_providers.models import LlmProvider, LlmProviderModel
@@ -21,19 +25,29 @@ from apps.utils.taskbadger import update_taskbadger_data
 
 logger = logging.getLogger("ocs.experiments")
 
+# Exports larger than this are written to disk instead of being held in memory
+EXPORT_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
 
 @shared_task(bind=True, base=TaskbadgerTask)
 def async_export_chat(self, experiment_id: int, query_params: dict, include_api: bool) -> dict:
     experiment = Experiment.objects.get(id=experiment_id)
     filtered_sessions = get_filtered_sessions(self.request, experiment, query_params, include_api)
-    csv_in_memory = filtered_export_to_csv(experiment, filtered_sessions)
     filename = f"{experiment.name} Chat Export {timezone.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv"
-    file_obj = File.objects.create(
-        name=filename,
-        team=experiment.team,
-        content_type="text/csv",
-        file=ContentFile(csv_in_memory.getvalue().encode("utf-8"), name=filename),
-    )
+    # progress can only be recorded when running as a celery task
+    progress_callback = ProgressRecorder(self).set_progress if self.request.id else None
+    # The export is written to a temporary file (in memory until it gets large) which is then streamed to storage
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE) as export_file:
+        csv_file = io.TextIOWrapper(export_file, encoding="utf-8", newline="")
+        write_filtered_export_csv(experiment, filtered_sessions, csv_file, progress_callback=progress_callback)
+        csv_file.detach()
+        export_file.seek(0)
+        file_obj = File.objects.create(
+            name=filename,
+            team=experiment.team,
+            content_type="text/csv",
+            file=DjangoFile(export_file, name=filename),
+        )
     return {"file_id": file_obj.id}
 
 
@@ -54,33 +68,35 @@ def get_response_for_webchat_task(
     self, experiment_session_id: int, experiment_id: int, message_text: str, attachments: list | None = None
 ) -> dict:
     response = {"response": None, "message_id": None, "error": None}
-    try:
-        experiment_session = ExperimentSession.objects.select_related("experiment", "experiment__team").get(
-            id=experiment_session_id
-        )
-        experiment = Experiment.objects.get(id=experiment_id)
-        web_channel = WebChannel(
-            experiment,
-            experiment_session.experiment_channel,
-            experiment_session=experiment_session,
-        )
-        message_attachments = []
-        for file_entry in attachments:
-            message_attachments.append(Attachment.model_validate(file_entry))
-
-        message = BaseMessage(
-            participant_id=experiment_session.participant.identifier,
-            message_text=message_text,
-            attachments=message_attachments,
-        )
-        update_taskbadger_data(self, web_channel, message)
-        with current_team(experiment_session.team):
-            response["response"] = web_channel.new_user_message(message)
-            response["message_id"] = web_channel.bot.get_ai_message_id()
-    except Exception as e:
-        logger.exception(e)
-        response["error"] = str(e)
-
+    with streaming.stream_response(experiment_session_id, self.request.id) as stream:
+        try:
+            experiment_session = ExperimentSession.objects.select_related("experiment", "experiment__team").get(
+                id=experiment_session_id
+            )
+            experiment = Experiment.objects.get(id=experiment_id)
+            web_channel = WebChannel(
+                experiment,
+                experiment_session.experiment_channel,
+                experiment_session=experiment_session,
+            )
+            message_attachments = []
+            for file_entry in attachments:
+                message_attachments.append(Attachment.model_validate(file_entry))
+
+            message = BaseMessage(
+                participant_id=experiment_session.participant.identifier,
+                message_text=message_text,
+                attachments=message_attachments,
+            )
+            update_taskbadger_data(self, web_channel, message)
+            with current_team(experiment_session.team):
+                response["response"] = web_channel.new_user_message(message)
+                response["message_id"] = web_channel.bot.get_ai_message_id()
+        except Exception as e:
+            logger.exception(e)
+            response["error"] = str(e)
+
+        stream.close(response)
     return response
 
 
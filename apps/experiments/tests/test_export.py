@@ -4,10 +4,12 @@ from unittest.mock import patch
 
 import pytest
 
+from apps.annotations.models import Tag, UserComment
 from apps.chat.models import ChatMessage, ChatMessageType
-from apps.experiments.export import filtered_export_to_csv
+from apps.experiments.export import filtered_export_to_csv, write_filtered_export_csv
 from apps.utils.factories.channels import ExperimentChannelFactory
 from apps.utils.factories.experiment import ExperimentFactory, ExperimentSessionFactory
+from apps.utils.factories.user import UserFactory
 
 
 @pytest.mark.django_db()
@@ -79,3 +81,44 @@ def test_filtered_export_with_mocked_filter(mock_get_filtered_sessions, session_
             message = session_configs[i]["message"]
             matching_rows = [row for row in rows if message in row]
             assert len(matching_rows) > 0, f"Message for session {i} not found in CSV"
+
+
+@pytest.mark.django_db()
+def test_export_in_batches_includes_tags_and_comments():
+    experiment = ExperimentFactory()
+    team = experiment.team
+    user = UserFactory()
+    sessions = [ExperimentSessionFactory(experiment=experiment, team=team) for _ in range(3)]
+    for i, session in enumerate(sessions):
+        for j in range(2):
+            ChatMessage.objects.create(
+                chat=session.chat, content=f"message {i}-{j}", message_type=ChatMessageType.HUMAN
+            )
+
+    message = sessions[1].chat.messages.first()
+    tags = [Tag.objects.create(name=name, team=team) for name in ["b-tag", "a-tag"]]
+    for tag in tags:
+        message.add_tag(tag, team=team, added_by=user)
+    UserComment.add_for_model(message, comment="Nice", added_by=user, team=team)
+    UserComment.add_for_model(sessions[1].chat, comment="Good chat", added_by=user, team=team)
+
+    output = io.StringIO()
+    progress = []
+    write_filtered_export_csv(
+        experiment,
+        experiment.sessions.all(),
+        output,
+        progress_callback=lambda current, total: progress.append((current, total)),
+        batch_size=2,
+    )
+
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [row["Message Content"] for row in rows] == [f"message {i}-{j}" for i in range(3) for j in range(2)]
+    assert progress == [(2, 3), (3, 3)]
+
+    tagged_row = rows[2]
+    assert tagged_row["Message ID"] == str(message.id)
+    assert tagged_row["Message Tags"] == "a-tag, b-tag"
+    assert tagged_row["Message Comments"] == f'<{user.username}>: "Nice"'
+    assert tagged_row["Chat Comments"] == f'<{user.username}>: "Good chat"'
+    assert rows[0]["Message Tags"] == rows[0]["Chat Comments"] == ""
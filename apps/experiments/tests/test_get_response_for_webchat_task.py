@@ -1,6 +1,9 @@
+from uuid import uuid4
+
 import pytest
 
 from apps.channels.datamodels import Attachment
+from apps.chat import streaming
 from apps.experiments.tasks import get_response_for_webchat_task
 from apps.utils.factories.experiment import ExperimentSessionFactory
 from apps.utils.langchain import mock_llm
@@ -26,3 +29,15 @@ def test_get_response_for_webchat_task(session):
     assert response["response"] == "how can I help?"
     assert response["message_id"] is not None
     assert response["error"] is None
+
+
+@pytest.mark.django_db()
+def test_get_response_for_webchat_task_streams_response(session, fake_redis):
+    with mock_llm(responses=["how can I help?"]):
+        result = get_response_for_webchat_task.apply(
+            args=[session.id, session.experiment.id, "Hi", []], task_id=str(uuid4())
+        )
+
+    events = list(streaming.read_stream(session.id, result.id, timeout=1))
+    assert "".join(data for event, data in events if event == "token") == "how can I help?"
+    assert events[-1] == ("done", result.result)
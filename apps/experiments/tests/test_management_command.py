@@ -8,7 +8,10 @@ from unittest.mock import Mock, patch
 import pytest
 from django.core.management import call_command
 
+from apps.chat.models import ChatMessage, ChatMessageType
+from apps.experiments.models import ExperimentSession
 from apps.utils.factories.assistants import OpenAiAssistantFactory
+from apps.utils.factories.experiment import ExperimentSessionFactory
 from apps.utils.factories.files import FileFactory
 
 
@@ -45,3 +48,37 @@ def test_fix_vector_store_duplication_command(push_assistant_to_openai, args):
     assert assistant.is_a_version
     tool_resource = assistant.tool_resources.get(tool_type="file_search")
     tool_resource.extra["vector_store_id"] == ""
+
+
+@pytest.mark.django_db()
+def test_backfill_session_message_timestamps_command():
+    session = ExperimentSessionFactory()
+    human_message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.HUMAN)
+    ai_message = ChatMessage.objects.create(chat=session.chat, content="Hello", message_type=ChatMessageType.AI)
+    empty_session = ExperimentSessionFactory()
+    ExperimentSession.objects.filter(id=session.id).update(last_message_at=None, last_human_message_at=None)
+
+    call_command("backfill_session_message_timestamps", "--batch-size", "1")
+
+    session.refresh_from_db()
+    assert session.last_message_at == ai_message.created_at
+    assert session.last_human_message_at == human_message.created_at
+    empty_session.refresh_from_db()
+    assert empty_session.last_message_at is None
+
+
+@pytest.mark.django_db()
+def test_backfill_session_tag_facets_command():
+    session = ExperimentSessionFactory()
+    message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.AI)
+    message.add_version_tag(version_number=1, is_a_version=True)
+    empty_session = ExperimentSessionFactory()
+    ExperimentSession.objects.filter(id=session.id).update(version_tags=[])
+
+    call_command("backfill_session_tag_facets", "--batch-size", "1")
+
+    session.refresh_from_db()
+    assert session.version_tags == ["v1"]
+    empty_session.refresh_from_db()
+    assert empty_session.tag_names == []
+    assert empty_session.version_tags == []
@@ -1,22 +1,27 @@
+import json
 from datetime import UTC, datetime
 from unittest.mock import Mock, patch
 
 import pytest
+from django.db.models.signals import m2m_changed
 from django.db.utils import IntegrityError
 from django.utils import timezone
 from freezegun import freeze_time
 
-from apps.annotations.models import TagCategories
+from apps.annotations.models import CustomTaggedItem, Tag, TagCategories
 from apps.assistants.models import ToolResources
-from apps.chat.models import ChatMessage, ChatMessageType
+from apps.chat.models import Chat, ChatMessage, ChatMessageType
 from apps.events.actions import ScheduleTriggerAction
 from apps.events.models import EventActionType, ScheduledMessage, TimePeriod
+from apps.experiments.filters import apply_dynamic_filters
 from apps.experiments.models import (
     ConsentForm,
     Experiment,
     ExperimentRoute,
+    ExperimentSession,
     ParticipantData,
     SafetyLayer,
+    SessionStatus,
     SyntheticVoice,
 )
 from apps.service_providers.llm_service.prompt_context import ParticipantDataProxy
@@ -28,6 +33,7 @@ from apps.utils.factories.events import (
     TimeoutTriggerFactory,
 )
 from apps.utils.factories.experiment import (
+    ChatFactory,
     ExperimentFactory,
     ExperimentSessionFactory,
     ParticipantFactory,
@@ -447,6 +453,171 @@ class TestExperimentSession:
         # Case 5 - Pipeline Router Node
         _test_pipline("RouterNode", params={"prompt": prompt})
 
+    def test_last_message_timestamps_are_updated(self):
+        session = ExperimentSessionFactory()
+        assert session.last_message_at is None
+        assert session.last_human_message_at is None
+
+        with freeze_time("2024-01-01") as frozen_time:
+            human_message = ChatMessage.objects.create(
+                chat=session.chat, content="Hi", message_type=ChatMessageType.HUMAN
+            )
+            frozen_time.tick()
+            ai_message = ChatMessage.objects.create(chat=session.chat, content="Hello", message_type=ChatMessageType.AI)
+
+        # saving a stale instance doesn't overwrite the timestamps
+        session.status = SessionStatus.ACTIVE
+        session.save()
+
+        session.refresh_from_db()
+        assert session.last_message_at == ai_message.created_at
+        assert session.last_human_message_at == human_message.created_at
+
+    def test_last_message_timestamps_are_never_moved_back(self):
+        session = ExperimentSessionFactory()
+        with freeze_time("2024-01-02"):
+            message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.HUMAN)
+
+        older_message = ChatMessage(
+            chat=session.chat,
+            content="Hello",
+            message_type=ChatMessageType.HUMAN,
+            created_at=datetime(2024, 1, 1, tzinfo=UTC),
+        )
+        ExperimentSession.objects.update_last_message_timestamps([older_message])
+
+        session.refresh_from_db()
+        assert session.last_message_at == message.created_at
+        assert session.last_human_message_at == message.created_at
+
+    def test_last_message_timestamps_set_for_existing_chat(self):
+        chat = ChatFactory()
+        message = ChatMessage.objects.create(chat=chat, content="Hi", message_type=ChatMessageType.HUMAN)
+
+        session = ExperimentSessionFactory(chat=chat, team=chat.team)
+        assert session.last_message_at == message.created_at
+        assert session.last_human_message_at == message.created_at
+
+    def test_tag_facets_are_updated(self):
+        session = ExperimentSessionFactory()
+        team = session.team
+        message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.AI)
+        message.add_version_tag(version_number=1, is_a_version=True)
+        message.add_version_tag(version_number=1, is_a_version=True)
+        message.add_version_tag(version_number=2, is_a_version=False)
+        for name in ["urgent", "bug"]:
+            session.chat.add_tag(Tag.objects.create(name=name, team=team), team=team, added_by=None)
+
+        # saving a stale instance doesn't overwrite the facets
+        session.save()
+
+        session.refresh_from_db()
+        assert session.tag_names == ["bug", "urgent"]
+        assert session.version_tags == ["v1", "v2-unreleased"]
+
+        session.chat.tags.remove("urgent")
+        message.tags.clear()
+        session.refresh_from_db()
+        assert session.tag_names == ["bug"]
+        assert session.version_tags == []
+
+    def test_tag_facets_are_updated_when_tags_are_renamed_or_deleted(self):
+        session = ExperimentSessionFactory()
+        team = session.team
+        message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.AI)
+        message.add_version_tag(version_number=1, is_a_version=True)
+        bug = Tag.objects.create(name="bug", team=team)
+        urgent = Tag.objects.create(name="urgent", team=team)
+        session.chat.add_tag(bug, team=team, added_by=None)
+        session.chat.add_tag(urgent, team=team, added_by=None)
+
+        bug.name = "defect"
+        bug.save()
+        version_tag = Tag.objects.get(name="v1", category=TagCategories.EXPERIMENT_VERSION)
+        version_tag.name = "v1-renamed"
+        version_tag.save()
+        session.refresh_from_db()
+        assert session.tag_names == ["defect", "urgent"]
+        assert session.version_tags == ["v1-renamed"]
+
+        urgent.delete()
+        version_tag.delete()
+        session.refresh_from_db()
+        assert session.tag_names == ["defect"]
+        assert session.version_tags == []
+
+    def test_tag_facets_are_updated_when_tagged_items_are_deleted(self):
+        session = ExperimentSessionFactory()
+        team = session.team
+        message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.AI)
+        message.add_version_tag(version_number=1, is_a_version=True)
+        session.chat.add_tag(Tag.objects.create(name="bug", team=team), team=team, added_by=None)
+
+        CustomTaggedItem.objects.get(tag__name="bug").delete()
+        CustomTaggedItem.objects.get(tag__name="v1").delete()
+        session.refresh_from_db()
+        assert session.tag_names == []
+        assert session.version_tags == []
+
+    def test_tag_facets_are_updated_when_tags_are_added_from_the_tag(self):
+        session = ExperimentSessionFactory()
+        team = session.team
+        message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.AI)
+        bug = Tag.objects.create(name="bug", team=team)
+        version_tag = Tag.objects.create(name="v4", team=team, category=TagCategories.EXPERIMENT_VERSION)
+        CustomTaggedItem.objects.create(content_object=session.chat, tag=bug, team=team)
+        CustomTaggedItem.objects.create(content_object=message, tag=version_tag, team=team)
+
+        for tag, model, object_id in [(bug, Chat, session.chat.id), (version_tag, ChatMessage, message.id)]:
+            m2m_changed.send(
+                sender=CustomTaggedItem, instance=tag, action="post_add", reverse=True, model=model, pk_set={object_id}
+            )
+
+        session.refresh_from_db()
+        assert session.tag_names == ["bug"]
+        assert session.version_tags == ["v4"]
+
+    def test_tag_facets_set_for_existing_chat(self):
+        chat = ChatFactory()
+        message = ChatMessage.objects.create(chat=chat, content="Hi", message_type=ChatMessageType.AI)
+        message.add_version_tag(version_number=3, is_a_version=True)
+
+        session = ExperimentSessionFactory(chat=chat, team=chat.team)
+        assert session.version_tags == ["v3"]
+
+    @pytest.mark.parametrize(
+        ("column", "operator", "value", "expected"),
+        [
+            ("tags", "any of", ["bug", "urgent"], {"both", "bug"}),
+            ("tags", "all of", ["bug", "urgent"], {"both"}),
+            ("versions", "any of", ["v1"], {"both", "v1"}),
+            ("versions", "all of", ["v1", "v10"], {"both"}),
+        ],
+    )
+    def test_filter_sessions_by_tags_and_versions(self, column, operator, value, expected):
+        experiment = ExperimentFactory()
+        team = experiment.team
+        tags = {name: Tag.objects.create(name=name, team=team) for name in ["bug", "urgent"]}
+
+        def _session(name, tag_names, versions):
+            session = ExperimentSessionFactory(experiment=experiment, team=team, participant__identifier=name)
+            for tag_name in tag_names:
+                session.chat.add_tag(tags[tag_name], team=team, added_by=None)
+            message = ChatMessage.objects.create(chat=session.chat, content="Hi", message_type=ChatMessageType.AI)
+            for version_number, is_a_version in versions:
+                message.add_version_tag(version_number=version_number, is_a_version=is_a_version)
+
+        _session("both", ["bug", "urgent"], [(1, True), (10, False)])
+        _session("bug", ["bug"], [(10, True)])
+        _session("v1", [], [(1, False)])
+        _session("none", [], [])
+
+        params = {"filter_0_column": column, "filter_0_operator": operator, "filter_0_value": json.dumps(value)}
+        sessions = apply_dynamic_filters(
+            ExperimentSession.objects.filter(experiment=experiment), request=None, parsed_params=params
+        )
+        assert {session.participant.identifier for session in sessions} == expected
+
 
 class TestParticipant:
     @pytest.mark.django_db()
@@ -8,11 +8,19 @@ from apps.files.models import File
 from apps.utils.factories.experiment import ExperimentFactory, ExperimentSessionFactory
 
 
+@pytest.fixture()
+def _media_root(settings, tmp_path):
+    # exports are written to the default storage
+    settings.MEDIA_ROOT = tmp_path
+
+
 @pytest.mark.django_db()
-def test_async_export_chat_returns_file_id():
+@pytest.mark.usefixtures("_media_root")
+def test_async_export_chat_returns_file_id(tmp_path):
     session = ExperimentSessionFactory()
     result = async_export_chat(session.experiment_id, {}, False)
-    assert result == {"file_id": File.objects.first().id}
+    file = File.objects.get(id=result["file_id"])
+    assert (tmp_path / file.file.name).exists()
 
 
 @pytest.mark.django_db()
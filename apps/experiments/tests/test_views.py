@@ -1,6 +1,8 @@
 from contextlib import nullcontext as does_not_raise
+from functools import partial
 from io import BytesIO
 from unittest import mock
+from uuid import uuid4
 
 import jwt
 import pytest
@@ -11,6 +13,7 @@ from django.test import RequestFactory, override_settings
 from django.urls import reverse
 from waffle.testutils import override_flag
 
+from apps.chat import streaming
 from apps.chat.channels import WebChannel
 from apps.chat.models import Chat
 from apps.experiments.models import (
@@ -426,6 +429,57 @@ def test_experiment_session_message_view_creates_files(delay_mock, version, expe
     assert fs_resource.files.filter(name="fs.text").exists()
 
 
+@pytest.mark.django_db()
+@override_flag("web_chat_streaming", active=True)
+def test_stream_message_response(experiment, client, fake_redis):
+    session = ExperimentSessionFactory(experiment=experiment)
+    task_id = str(uuid4())
+    with streaming.stream_response(session.id, task_id) as stream:
+        streaming.get_token_callback()("Hello")
+        stream.close({"message_id": 1})
+
+    url = reverse(
+        "experiments:stream_message_response",
+        args=[experiment.team.slug, experiment.public_id, session.external_id, task_id],
+    )
+    response = client.get(url)
+    content = b"".join(response.streaming_content).decode()
+
+    assert response["Content-Type"] == "text/event-stream"
+    assert content == 'event: token\ndata: "Hello"\n\nevent: done\ndata: {}\n\n'
+
+
+@pytest.mark.django_db()
+@override_flag("web_chat_streaming", active=True)
+def test_stream_message_response_of_another_session(experiment, client, fake_redis):
+    session = ExperimentSessionFactory(experiment=experiment)
+    other_session = ExperimentSessionFactory(experiment=experiment)
+    task_id = str(uuid4())
+    with streaming.stream_response(other_session.id, task_id) as stream:
+        streaming.get_token_callback()("Hello")
+        stream.close({"message_id": 1})
+
+    url = reverse(
+        "experiments:stream_message_response",
+        args=[experiment.team.slug, experiment.public_id, session.external_id, task_id],
+    )
+    with mock.patch.object(streaming, "read_stream", partial(streaming.read_stream, timeout=0.1)):
+        response = client.get(url)
+        content = b"".join(response.streaming_content).decode()
+
+    assert content == "event: done\ndata: {}\n\n"
+
+
+@pytest.mark.django_db()
+def test_stream_message_response_requires_flag(experiment, client):
+    session = ExperimentSessionFactory(experiment=experiment)
+    url = reverse(
+        "experiments:stream_message_response",
+        args=[experiment.team.slug, experiment.public_id, session.external_id, str(uuid4())],
+    )
+    assert client.get(url).status_code == 404
+
+
 class TestExperimentTableView:
     def test_get_queryset(self, experiment):
         team = experiment.team
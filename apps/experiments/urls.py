@@ -97,6 +97,11 @@ urlpatterns = [
         views.get_message_response,
         name="get_message_response",
     ),
+    path(
+        "e/<uuid:experiment_id>/session/<str:session_id>/stream_response/<slug:task_id>/",
+        views.stream_message_response,
+        name="stream_message_response",
+    ),
     path(
         "e/<int:experiment_id>/session/<int:session_id>/poll_messages/",
         views.poll_messages,
@@ -47,6 +47,7 @@ from .experiment import (  # noqa: F401
     start_session_from_invite,
     start_session_public,
     start_session_public_embed,
+    stream_message_response,
     update_delete_channel,
     update_version_description,
     verify_public_chat_token,
@@ -15,7 +15,14 @@ from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import transaction
 from django.db.models import Case, Count, IntegerField, When
-from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.response import TemplateResponse
 from django.urls import reverse
@@ -29,6 +36,7 @@ from django.views.decorators.http import require_POST
 from django.views.generic import CreateView, UpdateView
 from django_tables2 import SingleTableView
 from field_audit.models import AuditAction
+from redis import RedisError
 from waffle import flag_is_active
 
 from apps.annotations.models import Tag
@@ -37,6 +45,7 @@ from apps.channels.datamodels import Attachment, AttachmentType
 from apps.channels.exceptions import ExperimentChannelException
 from apps.channels.forms import ChannelForm
 from apps.channels.models import ChannelPlatform, ExperimentChannel
+from apps.chat import streaming
 from apps.chat.channels import WebChannel
 from apps.chat.models import ChatAttachment, ChatMessage, ChatMessageType
 from apps.events.models import (
@@ -120,11 +129,9 @@ class ExperimentSessionsTableView(LoginAndTeamRequiredMixin, SingleTableView, Pe
     permission_required = "experiments.view_experimentsession"
 
     def get_queryset(self):
-        query_set = (
-            ExperimentSession.objects.with_last_message_created_at()
-            .filter(team=self.request.team, experiment__id=self.kwargs["experiment_id"])
-            .select_related("participant__user")
-        )
+        query_set = ExperimentSession.objects.filter(
+            team=self.request.team, experiment__id=self.kwargs["experiment_id"]
+        ).select_related("participant__user")
         if not self.request.GET.get("show-all"):
             query_set = query_set.exclude(experiment_channel__platform=ChannelPlatform.API)
         query_set = apply_dynamic_filters(query_set, self.request)
@@ -455,14 +462,10 @@ def version_create_status(request, team_slug: str, experiment_id: int):
 @permission_required("experiments.view_experiment", raise_exception=True)
 def single_experiment_home(request, team_slug: str, experiment_id: int):
     experiment = get_object_or_404(Experiment.objects.get_all(), id=experiment_id, team=request.team)
-    user_sessions = (
-        ExperimentSession.objects.with_last_message_created_at()
-        .filter(
-            participant__user=request.user,
-            experiment=experiment,
-        )
-        .exclude(experiment_channel__platform=ChannelPlatform.API)
-    )
+    user_sessions = ExperimentSession.objects.filter(
+        participant__user=request.user,
+        experiment=experiment,
+    ).exclude(experiment_channel__platform=ChannelPlatform.API)
     channels = experiment.experimentchannel_set.exclude(platform__in=[ChannelPlatform.WEB, ChannelPlatform.API]).all()
     used_platforms = {channel.platform_enum for channel in channels}
     available_platforms = ChannelPlatform.for_dropdown(used_platforms, experiment.team)
@@ -750,6 +753,12 @@ def _experiment_session_message(request, version_number: int, embedded=False):
         "assistant": experiment_version.get_assistant(),
         "experiment_version_number": experiment_version.version_number,
     }
+    stream_url = None
+    if flag_is_active(request, "web_chat_streaming"):
+        stream_url = reverse(
+            "experiments:stream_message_response",
+            args=[request.team.slug, working_experiment.public_id, session.external_id, result.task_id],
+        )
     return TemplateResponse(
         request,
         "experiments/chat/experiment_response_htmx.html",
@@ -760,6 +769,7 @@ def _experiment_session_message(request, version_number: int, embedded=False):
             "task_id": result.task_id,
             "created_files": created_files,
             "embedded": embedded,
+            "stream_url": stream_url,
             **version_specific_vars,
         },
     )
@@ -800,6 +810,38 @@ def get_message_response(request, team_slug: str, experiment_id: uuid.UUID, sess
     )
 
 
+@experiment_session_view()
+def stream_message_response(request, team_slug: str, experiment_id: uuid.UUID, session_id: str, task_id: str):
+    """Streams the response of a task as it is generated using server-sent events.
+
+    The response holds a request thread until the task completes, so this is behind the `web_chat_streaming` flag. It
+    should only be enabled where these requests don't tie up the threads of the web workers e.g. when they are served
+    by an ASGI server.
+
+    Streams are keyed by the session, so only the responses of this session's tasks can be read.
+    """
+    if not flag_is_active(request, "web_chat_streaming"):
+        raise Http404()
+
+    return StreamingHttpResponse(
+        _get_response_stream_events(request.experiment_session, task_id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _get_response_stream_events(session: ExperimentSession, task_id: str):
+    try:
+        for event, data in streaming.read_stream(session.id, task_id):
+            if event == "done":
+                break
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    except RedisError:
+        logging.exception("Error reading response stream for task %s", task_id)
+    # always end with `done` so that the client fetches the complete response, even if the stream timed out
+    yield "event: done\ndata: {}\n\n"
+
+
 @team_required
 def poll_messages(request, team_slug: str, experiment_id: int, session_id: int):
     user = get_real_user_or_none(request.user)
@@ -1,8 +1,11 @@
+import hashlib
+import json
 from collections import Counter, defaultdict
 from functools import cached_property, partial
 from typing import Self
 
 import pydantic
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from pydantic import Field
@@ -11,7 +14,15 @@ from pydantic_core import ValidationError
 from apps.pipelines.const import STANDARD_OUTPUT_NAME
 from apps.pipelines.exceptions import PipelineBuildError, PipelineNodeBuildError
 from apps.pipelines.models import Pipeline
+from apps.pipelines.nodes.base import PipelineNode, PipelineState
 from apps.pipelines.nodes.nodes import EndNode, StartNode
+from apps.utils.lru import LRUCache
+
+# The maximum number of compiled pipeline graphs to keep in memory
+RUNNABLE_CACHE_SIZE = 256
+
+# Maps (pipeline id, version number) to (graph hash, compiled graph)
+_runnable_cache = LRUCache(maxsize=RUNNABLE_CACHE_SIZE)
 
 
 class Node(pydantic.BaseModel):
@@ -88,7 +99,22 @@ class PipelineGraph(pydantic.BaseModel):
 
     @classmethod
     def build_runnable_from_pipeline(cls, pipeline: Pipeline) -> CompiledStateGraph:
-        return cls.build_from_pipeline(pipeline).build_runnable()
+        """Build the runnable for the pipeline, reusing a previously compiled graph if the pipeline's nodes and
+        edges have not changed since it was compiled."""
+        graph = cls.build_from_pipeline(pipeline)
+        cache_key = (pipeline.id, pipeline.version_number)
+        graph_hash = graph.get_hash()
+        cached = _runnable_cache.get(cache_key)
+        if cached and cached[0] == graph_hash:
+            return cached[1]
+
+        runnable = graph.build_runnable()
+        _runnable_cache.set(cache_key, (graph_hash, runnable))
+        return runnable
+
+    @staticmethod
+    def clear_cached_runnable(pipeline: Pipeline):
+        _runnable_cache.pop((pipeline.id, pipeline.version_number))
 
     @classmethod
     def build_from_pipeline(cls, pipeline: Pipeline) -> Self:
@@ -99,9 +125,16 @@ class PipelineGraph(pydantic.BaseModel):
         edge_data = [Edge(**edge) for edge in pipeline.data["edges"]]
         return cls(nodes=node_data, edges=edge_data)
 
-    def build_runnable(self) -> CompiledStateGraph:
-        from apps.pipelines.nodes.base import PipelineState
+    def get_hash(self) -> str:
+        """A hash of the nodes (including their params) and edges that make up this graph"""
+        data = {
+            "nodes": sorted((node.model_dump() for node in self.nodes), key=lambda node: node["id"]),
+            "edges": sorted((edge.model_dump() for edge in self.edges), key=lambda edge: edge["id"]),
+            "lenient_validation": self.lenient_validation,
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
 
+    def build_runnable(self) -> CompiledStateGraph:
         if not self.nodes:
             raise PipelineBuildError("There are no nodes in the graph")
 
@@ -191,7 +224,9 @@ class PipelineGraph(pydantic.BaseModel):
         for node in nodes:
             try:
                 incoming_edges = [edge.source for edge in self.edges if edge.target == node.id]
-                state_graph.add_node(node.id, partial(node.pipeline_node_instance.process, node.id, incoming_edges))
+                state_graph.add_node(
+                    node.id, partial(_process_node, node.pipeline_node_instance, node.id, incoming_edges)
+                )
             except ValidationError as ex:
                 raise PipelineNodeBuildError(ex)
 
@@ -204,7 +239,7 @@ class PipelineGraph(pydantic.BaseModel):
                         continue
                     state_graph.add_conditional_edges(
                         edge.source,
-                        partial(node.pipeline_node_instance.process_conditional, node_id=edge.source),
+                        partial(_process_node_conditional, node.pipeline_node_instance, node_id=edge.source),
                         self.conditional_edge_map[edge.source],
                     )
                     seen_sources.add(edge.source)
@@ -222,3 +257,15 @@ class PipelineGraph(pydantic.BaseModel):
             raise PipelineBuildError(
                 f"There should be exactly 1 {EndNode.model_config['json_schema_extra'].label} node"
             )
+
+
+def _process_node(
+    node: PipelineNode, node_id: str, incoming_edges: list, state: PipelineState, config: RunnableConfig
+) -> PipelineState:
+    # Nodes hold state for the duration of a run (e.g. the runnable config) so each run gets its own copy of the
+    # node. This allows the compiled graph to be shared between runs.
+    return node.model_copy().process(node_id, incoming_edges, state, config)
+
+
+def _process_node_conditional(node: PipelineNode, state: PipelineState, node_id: str | None = None) -> str:
+    return node.model_copy().process_conditional(state, node_id=node_id)
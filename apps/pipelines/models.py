@@ -8,11 +8,19 @@ import pydantic
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models, transaction
 from django.urls import reverse
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
 from langchain_core.runnables import RunnableConfig
 from pydantic import ConfigDict
 
-from apps.chat.models import ChatMessage, ChatMessageType
+from apps.chat import history_window
+from apps.chat.models import ChatMessage, ChatMessageType, HistoryWindowQuerySet
 from apps.custom_actions.form_utils import set_custom_actions
 from apps.custom_actions.mixins import CustomActionOperationMixin
 from apps.experiments.models import ExperimentSession, VersionsMixin, VersionsObjectManagerMixin
@@ -21,7 +29,7 @@ from apps.pipelines.exceptions import PipelineBuildError
 from apps.pipelines.executor import patch_executor
 from apps.pipelines.flow import Flow, FlowNode, FlowNodeData
 from apps.pipelines.logging import PipelineLoggingCallbackHandler
-from apps.pipelines.nodes.base import PipelineState
+from apps.pipelines.nodes.base import PipelineState, PipelineUnitOfWork
 from apps.pipelines.nodes.helpers import temporary_session
 from apps.teams.models import BaseTeamModel
 from apps.utils.models import BaseModel
@@ -121,6 +129,8 @@ class Pipeline(BaseTeamModel, VersionsMixin):
 
     def update_nodes_from_data(self) -> None:
         """Set the nodes on the pipeline from data coming from the frontend"""
+        from apps.pipelines.graph import PipelineGraph
+
         nodes = [FlowNode(**node) for node in self.data["nodes"]]
         # Delete old nodes
         current_ids = set(self.node_ids)
@@ -150,6 +160,8 @@ class Pipeline(BaseTeamModel, VersionsMixin):
             )
             created_node.update_from_params()
 
+        PipelineGraph.clear_cached_runnable(self)
+
     def validate(self, full=True) -> dict:
         """Validate the pipeline nodes and return a dictionary of errors"""
         from apps.pipelines.graph import PipelineGraph
@@ -238,6 +250,9 @@ class Pipeline(BaseTeamModel, VersionsMixin):
 
         runnable = PipelineGraph.build_runnable_from_pipeline(self)
         pipeline_run = self._create_pipeline_run(input, session)
+        # Participant data and session state changes made by the nodes are saved once, after the run
+        unit_of_work = PipelineUnitOfWork(session)
+        input = PipelineState(input, unit_of_work=unit_of_work)
         logging_callback = PipelineLoggingCallbackHandler(pipeline_run)
 
         logging_callback.logger.debug("Starting pipeline run", input=input["messages"][-1])
@@ -260,6 +275,7 @@ class Pipeline(BaseTeamModel, VersionsMixin):
                 },
             )
             output = runnable.invoke(input, config=config)
+            unit_of_work.flush()
             output = PipelineState(**output).json_safe()
             pipeline_run.output = output
             if save_run_to_history and session is not None:
@@ -571,11 +587,24 @@ class PipelineChatHistory(BaseModel):
         return messages
 
     def get_langchain_messages_until_summary(self):
+        window = history_window.get_or_load_window(self.history_window_key, self._get_langchain_dicts_until_summary)
+        return messages_from_dict(window)
+
+    def _get_langchain_dicts_until_summary(self) -> list[dict]:
         messages = self.get_messages_until_summary()
         langchain_messages_to_last_summary = [
             message for message_pair in messages for message in message_pair.as_langchain_messages()
         ]
-        return list(reversed(langchain_messages_to_last_summary))
+        return messages_to_dict(list(reversed(langchain_messages_to_last_summary)))
+
+    @property
+    def history_window_key(self) -> str:
+        return history_window.get_cache_key("pipeline", self.id)
+
+
+class PipelineChatMessagesQuerySet(HistoryWindowQuerySet):
+    history_type = "pipeline"
+    history_field = "chat_history_id"
 
 
 class PipelineChatMessages(BaseModel):
@@ -585,11 +614,38 @@ class PipelineChatMessages(BaseModel):
     ai_message = models.TextField()
     summary = models.TextField(null=True)  # noqa: DJ001
 
+    objects = PipelineChatMessagesQuerySet.as_manager()
+
     def __str__(self):
         if self.summary:
             return f"Human: {self.human_message}, AI: {self.ai_message}, System: {self.summary}"
         return f"Human: {self.human_message}, AI: {self.ai_message}"
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        # a message that is rolled back must not end up in the cached window
+        if is_new:
+            transaction.on_commit(self._add_to_history_window)
+        else:
+            transaction.on_commit(self._invalidate_history_window)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        # the cached window may include this message
+        transaction.on_commit(self._invalidate_history_window)
+        return result
+
+    def _invalidate_history_window(self):
+        history_window.invalidate_window(history_window.get_cache_key("pipeline", self.chat_history_id))
+
+    def _add_to_history_window(self):
+        history_window.append_to_window(
+            history_window.get_cache_key("pipeline", self.chat_history_id),
+            messages_to_dict(list(reversed(self.as_langchain_messages()))),
+            new_window=bool(self.summary),
+        )
+
     def as_tuples(self):
         message_tuples = []
         if self.summary:
@@ -52,6 +52,27 @@ class TempState(TypedDict):
     attachments: list
 
 
+class PipelineUnitOfWork:
+    """Collects the participant data and session state changes made during a pipeline run so that they can be
+    saved once, at the end of the run. Reads made during the run see the pending changes.
+    """
+
+    def __init__(self, session: ExperimentSession):
+        self.session = session
+        self.participant_data_proxy = ParticipantDataProxy(session, defer_writes=True)
+        self._session_state_changed = False
+
+    def set_session_state_key(self, key_name: str, value):
+        self.session.state[key_name] = value
+        self._session_state_changed = True
+
+    def flush(self):
+        self.participant_data_proxy.flush()
+        if self._session_state_changed:
+            self.session.save(update_fields=["state"])
+            self._session_state_changed = False
+
+
 class PipelineState(dict):
     messages: Annotated[Sequence[Any], operator.add]
     outputs: Annotated[dict, add_messages]
@@ -61,10 +82,12 @@ class PipelineState(dict):
     ai_message_id: int | None = None
     message_metadata: dict | None = None
     attachments: list = Field(default=[])
+    unit_of_work: PipelineUnitOfWork | None = None
 
     def json_safe(self):
         # We need to make a copy of `self` so as to not change the actual value of `experiment_session` forever
         copy = self.copy()
+        copy.pop("unit_of_work", None)
         if "experiment_session" in copy:
             copy["experiment_session"] = copy["experiment_session"].id
 
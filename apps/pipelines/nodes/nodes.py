@@ -1,9 +1,12 @@
 import datetime
+import hashlib
 import inspect
 import json
 import logging
 import random
 import time
+from functools import cache
+from types import MappingProxyType
 from typing import Literal
 
 import tiktoken
@@ -41,6 +44,7 @@ from apps.pipelines.tasks import send_email_from_pipeline
 from apps.service_providers.exceptions import ServiceProviderConfigError
 from apps.service_providers.llm_service.adapters import AssistantAdapter, ChatAdapter
 from apps.service_providers.llm_service.history_managers import PipelineHistoryManager
+from apps.service_providers.llm_service.prompt_context import ParticipantDataProxy
 from apps.service_providers.llm_service.runnables import (
     AgentAssistantChat,
     AgentLLMChat,
@@ -49,6 +53,7 @@ from apps.service_providers.llm_service.runnables import (
     SimpleLLMChat,
 )
 from apps.service_providers.models import LlmProviderModel
+from apps.utils.lru import LRUCache
 from apps.utils.prompt import OcsPromptTemplate, PromptVars, validate_prompt_variables
 
 
@@ -312,6 +317,7 @@ class LLMResponseWithPrompt(LLMResponse, HistoryMixin):
             provider_model=provider_model,
             tools=tools,
             disabled_tools=self.disabled_tools,
+            participant_data_proxy=self.get_participant_data_proxy(state),
         )
 
         allowed_tools = chat_adapter.get_allowed_tools()
@@ -456,7 +462,8 @@ class RouterNode(RouterMixin, Passthrough, HistoryMixin):
         session: ExperimentSession = state["experiment_session"]
         node_input = state["messages"][-1]
         context = {"input": node_input}
-        context.update(PromptTemplateContext(session).get_context(prompt.input_variables))
+        template_context = PromptTemplateContext(session, participant_data_proxy=self.get_participant_data_proxy(state))
+        context.update(template_context.get_context(prompt.input_variables))
 
         if self.history_type != PipelineChatHistoryTypes.NONE and session:
             input_messages = prompt.format_messages(**context)
@@ -695,13 +702,19 @@ class ExtractParticipantData(ExtractStructuredDataNodeMixin, LLMResponse, Struct
         if not session:
             return {}
 
-        participant_data = (
-            ParticipantData.objects.for_experiment(session.experiment).filter(participant=session.participant).first()
-        )
-        if not participant_data:
-            return {}
+        if unit_of_work := state.get("unit_of_work"):
+            # read through the unit of work so that changes made earlier in the pipeline run are included
+            data = unit_of_work.participant_data_proxy.get_experiment_data()
+        else:
+            participant_data = (
+                ParticipantData.objects.for_experiment(session.experiment)
+                .filter(participant=session.participant)
+                .first()
+            )
+            if not participant_data:
+                return {}
+            data = participant_data.data
 
-        data = participant_data.data
         if self.key_name:
             # string, list or dict
             return data.get(self.key_name, "")
@@ -723,6 +736,11 @@ class ExtractParticipantData(ExtractStructuredDataNodeMixin, LLMResponse, Struct
         if self.key_name:
             output = {self.key_name: output}
 
+        if unit_of_work := state.get("unit_of_work"):
+            proxy = unit_of_work.participant_data_proxy
+            proxy.set(proxy.get_experiment_data() | output)
+            return
+
         try:
             participant_data = ParticipantData.objects.for_experiment(session.experiment).get(
                 participant=session.participant
@@ -778,7 +796,12 @@ class AssistantNode(PipelineNode):
             raise PipelineNodeBuildError(f"Assistant {self.assistant_id} does not exist")
 
         session: ExperimentSession | None = state.get("experiment_session")
-        runnable = self._get_assistant_runnable(assistant, session=session, node_id=node_id)
+        runnable = self._get_assistant_runnable(
+            assistant,
+            session=session,
+            node_id=node_id,
+            participant_data_proxy=self.get_participant_data_proxy(state),
+        )
         attachments = self._get_attachments(state)
         chain_output: ChainOutput = runnable.invoke(input, config=self._config, attachments=attachments)
         output = chain_output.output
@@ -796,9 +819,20 @@ class AssistantNode(PipelineNode):
     def _get_attachments(self, state) -> list:
         return [att for att in state.get("temp_state", {}).get("attachments", []) if att.upload_to_assistant]
 
-    def _get_assistant_runnable(self, assistant: OpenAiAssistant, session: ExperimentSession, node_id: str):
+    def _get_assistant_runnable(
+        self,
+        assistant: OpenAiAssistant,
+        session: ExperimentSession,
+        node_id: str,
+        participant_data_proxy: ParticipantDataProxy = None,
+    ):
         history_manager = PipelineHistoryManager.for_assistant()
-        adapter = AssistantAdapter.for_pipeline(session=session, node=self, disabled_tools=self.disabled_tools)
+        adapter = AssistantAdapter.for_pipeline(
+            session=session,
+            node=self,
+            disabled_tools=self.disabled_tools,
+            participant_data_proxy=participant_data_proxy,
+        )
 
         allowed_tools = adapter.get_allowed_tools()
         if len(adapter.tools) != len(allowed_tools):
@@ -814,6 +848,10 @@ class AssistantNode(PipelineNode):
             return AssistantChat(adapter=adapter, history_manager=history_manager)
 
 
+# The maximum number of compiled code node functions to keep in memory
+BYTE_CODE_CACHE_SIZE = 1024
+_byte_code_cache = LRUCache(maxsize=BYTE_CODE_CACHE_SIZE)
+
 CODE_NODE_DOCS = f"{settings.DOCUMENTATION_BASE_URL}{settings.DOCUMENTATION_LINKS['node_code']}"
 DEFAULT_FUNCTION = f"""# You must define a main function, which takes the node input as a string.
 # Return a string to pass to the next node.
@@ -842,11 +880,7 @@ class CodeNode(PipelineNode):
         if not value:
             value = DEFAULT_FUNCTION
         try:
-            byte_code = compile_restricted(
-                value,
-                filename="<inline code>",
-                mode="exec",
-            )
+            byte_code = compile_code(value)
             custom_locals = {}
             try:
                 exec(byte_code, {}, custom_locals)
@@ -874,11 +908,7 @@ class CodeNode(PipelineNode):
 
     def _process(self, input: str, state: PipelineState, node_id: str) -> PipelineState:
         function_name = "main"
-        byte_code = compile_restricted(
-            self.code,
-            filename="<inline code>",
-            mode="exec",
-        )
+        byte_code = compile_code(self.code)
 
         custom_locals = {}
         custom_globals = self._get_custom_globals(state)
@@ -891,30 +921,20 @@ class CodeNode(PipelineNode):
         return PipelineState.from_node_output(node_name=self.name, node_id=node_id, output=result)
 
     def _get_custom_globals(self, state: PipelineState):
-        from RestrictedPython.Eval import (
-            default_guarded_getitem,
-            default_guarded_getiter,
-        )
-
-        custom_globals = safe_globals.copy()
+        # The builtins are shared between runs. They can't be modified by the code since RestrictedPython doesn't
+        # allow access to names starting with an underscore.
+        custom_globals = dict(_get_base_globals())
 
         participant_data_proxy = self.get_participant_data_proxy(state)
         custom_globals.update(
             {
-                "__builtins__": self._get_custom_builtins(),
-                "json": json,
-                "datetime": datetime,
-                "time": time,
-                "_getitem_": default_guarded_getitem,
-                "_getiter_": default_guarded_getiter,
-                "_write_": lambda x: x,
                 "get_participant_data": participant_data_proxy.get,
                 "set_participant_data": participant_data_proxy.set,
                 "get_participant_schedules": participant_data_proxy.get_schedules,
                 "get_temp_state_key": self._get_temp_state_key(state),
                 "set_temp_state_key": self._set_temp_state_key(state),
                 "get_session_state_key": self._get_session_state_key(state["experiment_session"]),
-                "set_session_state_key": self._set_session_state_key(state["experiment_session"]),
+                "set_session_state_key": self._set_session_state_key(state),
             }
         )
         return custom_globals
@@ -925,10 +945,16 @@ class CodeNode(PipelineNode):
 
         return get_session_state_key
 
-    def _set_session_state_key(self, session: ExperimentSession):
+    def _set_session_state_key(self, state: PipelineState):
+        session = state["experiment_session"]
+        unit_of_work = state.get("unit_of_work")
+
         def set_session_state_key(key_name: str, value):
-            session.state[key_name] = value
-            session.save(update_fields=["state"])
+            if unit_of_work:
+                unit_of_work.set_session_state_key(key_name, value)
+            else:
+                session.state[key_name] = value
+                session.save(update_fields=["state"])
 
         return set_session_state_key
 
@@ -946,32 +972,66 @@ class CodeNode(PipelineNode):
 
         return set_temp_state_key
 
-    def _get_custom_builtins(self):
-        allowed_modules = {
-            "json",
-            "re",
-            "datetime",
-            "time",
-            "random",
+
+def compile_code(code: str):
+    """Compile `code` with RestrictedPython. The byte code is cached by a hash of the code so that code nodes aren't
+    compiled on every run."""
+    cache_key = hashlib.sha256(code.encode()).hexdigest()
+    if (byte_code := _byte_code_cache.get(cache_key)) is None:
+        byte_code = compile_restricted(code, filename="<inline code>", mode="exec")
+        _byte_code_cache.set(cache_key, byte_code)
+    return byte_code
+
+
+@cache
+def _get_base_globals() -> MappingProxyType:
+    """The globals that are the same for every run of a code node. Run specific globals are added to a copy of
+    these."""
+    from RestrictedPython.Eval import (
+        default_guarded_getitem,
+        default_guarded_getiter,
+    )
+
+    return MappingProxyType(
+        safe_globals
+        | {
+            "__builtins__": _get_base_builtins(),
+            "json": json,
+            "datetime": datetime,
+            "time": time,
+            "_getitem_": default_guarded_getitem,
+            "_getiter_": default_guarded_getiter,
+            "_write_": lambda x: x,
         }
-        custom_builtins = safe_builtins.copy()
-        custom_builtins.update(
-            {
-                "min": min,
-                "max": max,
-                "sum": sum,
-                "abs": abs,
-                "all": all,
-                "any": any,
-                "datetime": datetime,
-                "random": random,
-            }
-        )
+    )
+
+
+def _get_base_builtins() -> dict:
+    allowed_modules = {
+        "json",
+        "re",
+        "datetime",
+        "time",
+        "random",
+    }
+    custom_builtins = safe_builtins.copy()
+    custom_builtins.update(
+        {
+            "min": min,
+            "max": max,
+            "sum": sum,
+            "abs": abs,
+            "all": all,
+            "any": any,
+            "datetime": datetime,
+            "random": random,
+        }
+    )
 
-        def guarded_import(name, *args, **kwargs):
-            if name not in allowed_modules:
-                raise ImportError(f"Importing '{name}' is not allowed")
-            return __import__(name, *args, **kwargs)
+    def guarded_import(name, *args, **kwargs):
+        if name not in allowed_modules:
+            raise ImportError(f"Importing '{name}' is not allowed")
+        return __import__(name, *args, **kwargs)
 
-        custom_builtins["__import__"] = guarded_import
-        return custom_builtins
+    custom_builtins["__import__"] = guarded_import
+    return custom_builtins
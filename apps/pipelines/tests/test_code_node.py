@@ -2,12 +2,14 @@ import json
 from unittest import mock
 
 import pytest
+from RestrictedPython import compile_restricted
 
 from apps.channels.datamodels import Attachment
 from apps.experiments.models import ExperimentSession, Participant, ParticipantData
 from apps.files.models import File
 from apps.pipelines.exceptions import PipelineNodeBuildError, PipelineNodeRunError
-from apps.pipelines.nodes.base import PipelineState
+from apps.pipelines.nodes.base import PipelineState, PipelineUnitOfWork
+from apps.pipelines.nodes.nodes import compile_code
 from apps.pipelines.tests.utils import (
     code_node,
     create_runnable,
@@ -527,3 +529,62 @@ def main(input, **kwargs):
 
     experiment_session.refresh_from_db()
     assert experiment_session.state["message_count"] == 2
+
+
+@django_db_with_data(available_apps=("apps.service_providers",))
+@mock.patch("apps.pipelines.nodes.base.PipelineNode.logger", mock.Mock())
+def test_unit_of_work_defers_writes(pipeline, experiment_session):
+    participant_data = ParticipantData.objects.create(
+        team=experiment_session.team,
+        experiment=experiment_session.experiment,
+        participant=experiment_session.participant,
+        data={"color": "red", "size": "small"},
+    )
+    code_set = """
+def main(input, **kwargs):
+    data = get_participant_data()
+    data["color"] = "blue"
+    del data["size"]
+    set_participant_data(data)
+    set_session_state_key("count", 1)
+    return input
+    """
+    code_get = """
+def main(input, **kwargs):
+    data = get_participant_data()
+    return f"{data['color']}, {'size' in data}, {get_session_state_key('count')}"
+    """
+    nodes = [start_node(), code_node(code_set), code_node(code_get), end_node()]
+    unit_of_work = PipelineUnitOfWork(experiment_session)
+    with mock.patch.object(experiment_session, "save", wraps=experiment_session.save) as save_mock:
+        output = create_runnable(pipeline, nodes).invoke(
+            PipelineState(experiment_session=experiment_session, messages=["hi"], unit_of_work=unit_of_work)
+        )
+        assert save_mock.call_count == 0
+
+        # later nodes see the pending changes but nothing has been saved yet
+        assert output["messages"][-1] == "blue, False, 1"
+        participant_data.refresh_from_db()
+        assert participant_data.data == {"color": "red", "size": "small"}
+
+        # a change made by another writer during the run is kept
+        participant_data.data["shape"] = "round"
+        participant_data.save()
+
+        unit_of_work.flush()
+        assert save_mock.call_count == 1
+
+    participant_data.refresh_from_db()
+    global_data = experiment_session.participant.global_data
+    assert participant_data.data == global_data | {"color": "blue", "shape": "round"}
+    experiment_session.refresh_from_db()
+    assert experiment_session.state["count"] == 1
+
+
+def test_compiled_code_is_cached():
+    code = "def main(input, **kwargs):\n\treturn input[::-1]"
+    with mock.patch("apps.pipelines.nodes.nodes.compile_restricted", wraps=compile_restricted) as compile_mock:
+        byte_code = compile_code(code)
+        assert compile_code(code) is byte_code
+        assert compile_code(code + "\n") is not byte_code
+    assert compile_mock.call_count == 2
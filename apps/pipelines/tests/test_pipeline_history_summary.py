@@ -44,6 +44,23 @@ def test_no_summary_returns_all_messages(experiment_session):
     assert expected_messages == summary_messages
 
 
+@pytest.mark.django_db()
+def test_history_window_is_updated_when_messages_are_created(
+    pipeline_chat_history, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    pipeline_chat_history.messages.create(ai_message="I am a robot", human_message="hi")
+    assert len(pipeline_chat_history.get_langchain_messages_until_summary()) == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        message = pipeline_chat_history.messages.create(ai_message="I can't do that", human_message="fetch me a coffee")
+    with django_assert_num_queries(0):
+        messages = pipeline_chat_history.get_langchain_messages_until_summary()
+    assert messages[2:] == [
+        HumanMessage(content="fetch me a coffee", additional_kwargs={"id": message.id, "node_id": ""}),
+        AIMessage(content="I can't do that", additional_kwargs={"id": message.id, "node_id": ""}),
+    ]
+
+
 @django_db_with_data(available_apps=("apps.service_providers",))
 def test_compress_history_no_need_for_compression(pipeline_chat_history):
     for i in range(15):
@@ -10,6 +10,7 @@ from langchain_core.runnables import RunnableConfig
 from apps.channels.datamodels import Attachment
 from apps.experiments.models import ParticipantData
 from apps.pipelines.exceptions import PipelineBuildError, PipelineNodeBuildError
+from apps.pipelines.graph import PipelineGraph
 from apps.pipelines.logging import LoggingCallbackHandler
 from apps.pipelines.nodes.base import PipelineState
 from apps.pipelines.nodes.nodes import EndNode, RouterNode, StartNode, StaticRouterNode
@@ -1060,3 +1061,25 @@ def test_pipeline_history_manager_metadata_storage(get_llm_service, pipeline):
     )
     assert history_manager.input_message_metadata == input_metadata
     assert history_manager.output_message_metadata == output_metadata
+
+
+@pytest.mark.django_db()
+@mock.patch("apps.pipelines.nodes.base.PipelineNode.logger", mock.Mock())
+def test_compiled_runnable_is_reused(pipeline):
+    create_runnable(pipeline, [start_node(), render_template_node("{{ input }} is cool"), end_node()])
+    runnable = PipelineGraph.build_runnable_from_pipeline(pipeline)
+    assert PipelineGraph.build_runnable_from_pipeline(pipeline) is runnable
+    assert runnable.invoke(PipelineState(messages=["Cycling"]))["messages"][-1] == "Cycling is cool"
+    assert runnable.invoke(PipelineState(messages=["Running"]))["messages"][-1] == "Running is cool"
+
+    # Changes to the node params (e.g. from another process) result in a new graph being compiled
+    template_node = pipeline.node_set.get(type="RenderTemplate")
+    template_node.params["template_string"] = "{{ input }} is fun"
+    template_node.save()
+    new_runnable = PipelineGraph.build_runnable_from_pipeline(pipeline)
+    assert new_runnable is not runnable
+    assert new_runnable.invoke(PipelineState(messages=["Cycling"]))["messages"][-1] == "Cycling is fun"
+
+    # Saving the working version evicts the cached graph
+    create_runnable(pipeline, [start_node(), end_node()])
+    assert PipelineGraph.build_runnable_from_pipeline(pipeline) is not new_runnable
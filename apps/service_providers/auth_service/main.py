@@ -1,13 +1,43 @@
+import hashlib
+import json
 from typing import Any
 
 import httpx
 import pydantic
 import tenacity
 
+from apps.service_providers import client_pool
 from apps.service_providers.auth_service.schemes import CommCareAuth, HeaderAuth
 
+# How long idle connections of pooled transports are kept open
+KEEPALIVE_EXPIRY_SECONDS = 30
+
 
 class AuthService(pydantic.BaseModel):
+    def get_pooled_http_client(self) -> httpx.Client:
+        """Returns an HTTP client whose connections are shared by all requests made with the same credentials in this
+        process, so that connections are kept alive between requests.
+
+        Only the transport (the connection pool) is shared. Each call returns a new client, so state like cookies is
+        never shared between calls. The client must not be closed, since that would close the shared transport."""
+        transport = client_pool.get_client("http_transport", self._get_pool_key(), self._get_pooled_http_transport)
+        return httpx.Client(transport=transport, timeout=10, **self._get_http_client_kwargs())
+
+    def _get_pooled_http_transport(self) -> httpx.HTTPTransport:
+        return httpx.HTTPTransport(
+            # concurrent requests to the same host are multiplexed over a single connection
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=5, max_connections=10, keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+
+    def _get_pool_key(self) -> str:
+        values = {
+            name: value.get_secret_value() if isinstance(value, pydantic.SecretStr) else value for name, value in self
+        }
+        return hashlib.sha256(json.dumps([type(self).__name__, values], sort_keys=True).encode()).hexdigest()
+
     def get_http_client(self) -> httpx.Client:
         kwargs = {
             **self._get_http_client_kwargs(),
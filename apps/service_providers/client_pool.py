@@ -0,0 +1,81 @@
+"""A per-process pool of the API clients used by the messaging services and custom actions.
+
+Creating a client for every message or API call means that every message also pays for a new TLS connection.
+Clients are instead created once per set of credentials and reused, so that their HTTP connections are kept alive
+between messages. Clients are keyed by their credentials, so a change of credentials results in a new client.
+"""
+
+import logging
+import threading
+from collections import Counter
+from collections.abc import Callable, Hashable
+from typing import TypeVar
+
+import requests
+
+from apps.utils.lru import LRUCache
+
+logger = logging.getLogger("ocs.messaging")
+
+CLIENT_POOL_SIZE = 256
+
+
+def _close_client(pool_key: tuple[str, Hashable], client):
+    """Closes the connections of evicted clients. A client is only evicted once it is the least recently used of
+    the pool, so it is very unlikely to still be in use."""
+    if callable(close := getattr(client, "close", None)):
+        try:
+            close()
+        except Exception:
+            logger.exception("Unable to close %s client", pool_key[0])
+
+
+# Clients are thread safe and only depend on their key
+_client_pool = LRUCache(maxsize=CLIENT_POOL_SIZE, on_evict=_close_client)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+def get_client(client_type: str, key: Hashable, factory: Callable[[], T]) -> T:
+    """Returns the pooled client of `client_type` for `key`, creating it with `factory` if there is none"""
+    pool_key = (client_type, key)
+    client = _client_pool.get(pool_key)
+    if client is None:
+        client = factory()
+        _client_pool.set(pool_key, client)
+        _record(client_type, "created")
+    else:
+        _record(client_type, "reused")
+    return client
+
+
+def get_http_session(client_type: str, key: Hashable) -> requests.Session:
+    """Returns a pooled `requests.Session` for clients that make their own requests"""
+    return get_client(client_type, key, requests.Session)
+
+
+def get_pool_stats() -> dict[str, dict[str, int]]:
+    """Returns the number of clients that were created and reused for each type of client. For HTTP calls made with
+    an `AuthService` this is the number of connection pools (`http_transport`) that were created and reused."""
+    stats = {}
+    with _stats_lock:
+        for (client_type, stat), count in _stats.items():
+            stats.setdefault(client_type, {"created": 0, "reused": 0})[stat] = count
+    return stats
+
+
+def clear():
+    _client_pool.clear()
+    with _stats_lock:
+        _stats.clear()
+
+
+def _record(client_type: str, stat: str):
+    with _stats_lock:
+        _stats[(client_type, stat)] += 1
+        created, reused = _stats[(client_type, "created")], _stats[(client_type, "reused")]
+    if stat == "created":
+        logger.debug("Created %s client (created=%s, reused=%s)", client_type, created, reused)
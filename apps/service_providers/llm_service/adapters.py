@@ -24,7 +24,7 @@ from apps.chat.models import Chat
 from apps.experiments.models import Experiment, ExperimentSession
 from apps.files.models import File
 from apps.service_providers.llm_service.main import LlmService, OpenAIAssistantRunnable
-from apps.service_providers.llm_service.prompt_context import PromptTemplateContext
+from apps.service_providers.llm_service.prompt_context import ParticipantDataProxy, PromptTemplateContext
 
 if TYPE_CHECKING:
     from apps.pipelines.nodes.nodes import AssistantNode, LLMResponseWithPrompt
@@ -70,6 +70,7 @@ class ChatAdapter(BaseAdapter):
         input_formatter: str | None = None,
         source_material_id: int | None = None,
         save_message_metadata_only=False,
+        participant_data_proxy: ParticipantDataProxy | None = None,
     ):
         self.session = session
         self.provider_model_name = provider_model_name
@@ -83,7 +84,7 @@ class ChatAdapter(BaseAdapter):
         self.source_material_id = source_material_id
 
         self.team = session.team
-        self.template_context = PromptTemplateContext(session, source_material_id)
+        self.template_context = PromptTemplateContext(session, source_material_id, participant_data_proxy)
         self.save_message_metadata_only = save_message_metadata_only
 
     @classmethod
@@ -110,6 +111,7 @@ class ChatAdapter(BaseAdapter):
         provider_model: "LlmProviderModel",
         tools: list[BaseTool],
         disabled_tools: set[str] = None,
+        participant_data_proxy: ParticipantDataProxy | None = None,
     ) -> Self:
         return cls(
             session=session,
@@ -123,6 +125,7 @@ class ChatAdapter(BaseAdapter):
             input_formatter="{input}",
             source_material_id=node.source_material_id,
             save_message_metadata_only=True,
+            participant_data_proxy=participant_data_proxy,
         )
 
     def get_chat_model(self):
@@ -150,6 +153,7 @@ class AssistantAdapter(BaseAdapter):
         input_formatter: str | None = None,
         save_message_metadata_only: bool = False,
         disabled_tools: set[str] = None,
+        participant_data_proxy: ParticipantDataProxy | None = None,
     ):
         self.session = session
         self.assistant = assistant
@@ -163,7 +167,9 @@ class AssistantAdapter(BaseAdapter):
 
         self.tools = get_assistant_tools(assistant, experiment_session=session)
         self.disabled_tools = disabled_tools
-        self.template_context = PromptTemplateContext(session, source_material_id=None)
+        self.template_context = PromptTemplateContext(
+            session, source_material_id=None, participant_data_proxy=participant_data_proxy
+        )
 
     @classmethod
     def for_experiment(cls, experiment: Experiment, session: ExperimentSession) -> Self:
@@ -176,7 +182,13 @@ class AssistantAdapter(BaseAdapter):
         )
 
     @classmethod
-    def for_pipeline(cls, session: ExperimentSession, node: "AssistantNode", disabled_tools: set[str] = None) -> Self:
+    def for_pipeline(
+        cls,
+        session: ExperimentSession,
+        node: "AssistantNode",
+        disabled_tools: set[str] = None,
+        participant_data_proxy: ParticipantDataProxy | None = None,
+    ) -> Self:
         assistant = OpenAiAssistant.objects.get(id=node.assistant_id)
         return cls(
             session=session,
@@ -185,6 +197,7 @@ class AssistantAdapter(BaseAdapter):
             input_formatter=node.input_formatter,
             save_message_metadata_only=True,
             disabled_tools=disabled_tools,
+            participant_data_proxy=participant_data_proxy,
         )
 
     @cached_property
@@ -219,7 +232,7 @@ class AssistantAdapter(BaseAdapter):
 
         input_variables = get_template_variables(instructions, "f-string")
         if input_variables:
-            context = PromptTemplateContext(self.session, None).get_context(input_variables)
+            context = self.template_context.get_context(input_variables)
             instructions = instructions.format(**context)
 
         code_interpreter_attachments = self.get_attachments(["code_interpreter"])
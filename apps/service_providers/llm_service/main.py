@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from io import BytesIO
 from time import sleep
 from typing import Any
@@ -31,6 +32,12 @@ class OpenAIAssistantRunnable(BrokenOpenAIAssistantRunnable):
     # and updated so that the thread API gets an `attachments` key instead of the previous `file_ids` key.
     # TODO: Here's a PR that tries to fix it in LangChain: https://github.com/langchain-ai/langchain/pull/21484
 
+    # Runs are created with the streaming API, so the run's events are pushed to us and there is no need to poll for
+    # its status. Runs are only polled while they are cancelled, or when a stream ends before the run is done.
+
+    min_check_every_ms: float = 250.0
+    """The initial interval between checks on run progress. This doubles on each check up to `check_every_ms`"""
+
     def invoke(self, input: dict, config: RunnableConfig | None = None):
         config = ensure_config(config)
         callback_manager = CallbackManager.configure(
@@ -43,7 +50,7 @@ class OpenAIAssistantRunnable(BrokenOpenAIAssistantRunnable):
             # Being run within AgentExecutor and there are tool outputs to submit.
             if self.as_agent and input.get("intermediate_steps"):
                 tool_outputs = self._parse_intermediate_steps(input["intermediate_steps"])
-                run = self.client.beta.threads.runs.submit_tool_outputs(**tool_outputs)
+                run = self._submit_tool_outputs(**tool_outputs)
             # Starting a new thread and a new run.
             elif "thread_id" not in input:
                 thread = {
@@ -71,8 +78,7 @@ class OpenAIAssistantRunnable(BrokenOpenAIAssistantRunnable):
             # Submitting tool outputs to an existing run, outside the AgentExecutor
             # framework.
             else:
-                run = self.client.beta.threads.runs.submit_tool_outputs(**input)
-            run = self._wait_for_run(run.id, run.thread_id)
+                run = self._submit_tool_outputs(**input)
         except BaseException as e:
             run_manager.on_chain_error(e)
             raise e
@@ -85,14 +91,55 @@ class OpenAIAssistantRunnable(BrokenOpenAIAssistantRunnable):
             run_manager.on_chain_end(response)
             return response
 
+    def _create_run(self, input: dict) -> Any:
+        params = {k: v for k, v in input.items() if k in ("instructions", "model", "tools", "run_metadata")}
+        stream = self.client.beta.threads.runs.create(
+            input["thread_id"], assistant_id=self.assistant_id, stream=True, **params
+        )
+        return self._get_run_from_stream(stream)
+
+    def _create_thread_and_run(self, input: dict, thread: dict) -> Any:
+        params = {k: v for k, v in input.items() if k in ("instructions", "model", "tools", "run_metadata")}
+        stream = self.client.beta.threads.create_and_run(
+            assistant_id=self.assistant_id, thread=thread, stream=True, **params
+        )
+        return self._get_run_from_stream(stream)
+
+    def _submit_tool_outputs(self, **tool_outputs) -> Any:
+        stream = self.client.beta.threads.runs.submit_tool_outputs(**tool_outputs, stream=True)
+        return self._get_run_from_stream(stream)
+
+    def _get_run_from_stream(self, stream) -> Any:
+        """Reads the events of a run until the run stops, either because it is done or because it requires action"""
+        run = None
+        for event in stream:
+            if event.event == "error":
+                raise ValueError(f"Error in the run stream: {event.data.message}")
+            if event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step."):
+                run = event.data
+
+        if run is None:
+            raise ValueError("The run stream ended before the run was created")
+        if run.status in ("in_progress", "queued"):
+            # The stream was closed before the run was done
+            return self._wait_for_run(run.id, run.thread_id)
+        return run
+
     def _wait_for_run(self, run_id: str, thread_id: str, progress_states=("in_progress", "queued")) -> Any:
-        in_progress = True
-        while in_progress:
+        poll_intervals = self._poll_intervals()
+        while True:
             run = self.client.beta.threads.runs.retrieve(run_id, thread_id=thread_id)
-            in_progress = run.status in progress_states
-            if in_progress:
-                sleep(self.check_every_ms / 1000)
-        return run
+            if run.status not in progress_states:
+                return run
+            sleep(next(poll_intervals))
+
+    def _poll_intervals(self) -> Iterator[float]:
+        """Yields the time in seconds to wait between checks on the status of a run. Short runs are picked up
+        quickly while long runs back off exponentially until the interval reaches `check_every_ms`."""
+        interval_ms = min(self.min_check_every_ms, self.check_every_ms)
+        while True:
+            yield interval_ms / 1000
+            interval_ms = min(interval_ms * 2, self.check_every_ms)
 
 
 class LlmService(pydantic.BaseModel):
@@ -0,0 +1,136 @@
+"""Concurrent execution of the tool calls that a model makes in a single step.
+
+Tool calls that are independent of each other (e.g. calls to custom actions) are run by a bounded pool of threads
+instead of one after the other. Tools opt in to this with `metadata={CONCURRENCY_SAFE: True}`. The calls of other
+tools, e.g. tools that write to the database, are made one after the other in the calling thread. Results are always
+returned in the order of the tool calls.
+"""
+
+import contextvars
+import functools
+import inspect
+import logging
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import TypeVar
+
+from django.conf import settings
+from django.db import connections
+from langchain.agents import AgentExecutor
+from langchain_core.tools import BaseTool
+
+logger = logging.getLogger("ocs.llm")
+
+T = TypeVar("T")
+
+# The metadata key of tools whose calls can be made concurrently
+CONCURRENCY_SAFE = "concurrency_safe"
+
+_defer_agent_actions: ContextVar[bool] = ContextVar("defer_agent_actions", default=False)
+
+
+def is_concurrency_safe(tool: BaseTool | None) -> bool:
+    return bool(tool and tool.metadata and tool.metadata.get(CONCURRENCY_SAFE))
+
+
+def run_concurrently(
+    funcs: Sequence[Callable[[], T]], max_workers: int | None = None, concurrency_safe: Sequence[bool] | None = None
+) -> list[T]:
+    """Calls each of `funcs` and returns their results in order.
+
+    Only the functions that are marked in `concurrency_safe` (all of them by default) are called concurrently, the
+    others are called one after the other in the calling thread. All the functions are called, even if some of them
+    raise an exception. The first exception (in order) is raised once all the functions have completed.
+    """
+    if concurrency_safe is None:
+        concurrency_safe = [True] * len(funcs)
+    max_workers = min(max_workers or settings.TOOL_CALL_MAX_WORKERS, sum(concurrency_safe))
+    if max_workers <= 1:
+        return [func() for func in funcs]
+
+    def _call_in_thread(context: contextvars.Context, func: Callable[[], T]) -> T:
+        try:
+            return context.run(func)
+        finally:
+            # The thread's database connections are not managed by Django
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool_call") as executor:
+        # each call gets its own copy of the context (e.g. the current team), since a context can't be entered by
+        # more than one thread at a time
+        futures = {
+            index: executor.submit(_call_in_thread, contextvars.copy_context(), func)
+            for index, (func, is_safe) in enumerate(zip(funcs, concurrency_safe, strict=True))
+            if is_safe
+        }
+        for index, (func, is_safe) in enumerate(zip(funcs, concurrency_safe, strict=True)):
+            if not is_safe:
+                futures[index] = _call_serially(func)
+    return [futures[index].result() for index in range(len(funcs))]
+
+
+def _call_serially(func: Callable[[], T]) -> Future:
+    future = Future()
+    try:
+        future.set_result(func())
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _supports_deferred_agent_actions() -> bool:
+    """`ParallelToolAgentExecutor` overrides private methods of `AgentExecutor`, so check that they still have the
+    signatures that it was written for. If they don't, tool calls are made one after the other."""
+    try:
+        iter_next_step = inspect.signature(AgentExecutor._iter_next_step).parameters
+        perform_agent_action = inspect.signature(AgentExecutor._perform_agent_action).parameters
+    except AttributeError:
+        return False
+    return list(iter_next_step)[:2] == ["self", "name_to_tool_map"] and list(perform_agent_action) == [
+        "self",
+        "name_to_tool_map",
+        "color_mapping",
+        "agent_action",
+        "run_manager",
+    ]
+
+
+SUPPORTS_DEFERRED_AGENT_ACTIONS = _supports_deferred_agent_actions()
+if not SUPPORTS_DEFERRED_AGENT_ACTIONS:
+    logger.warning("The installed version of langchain doesn't support running the tool calls of agents concurrently")
+
+
+class ParallelToolAgentExecutor(AgentExecutor):
+    """An agent executor that performs the tool calls of each step concurrently"""
+
+    def _iter_next_step(self, name_to_tool_map: dict[str, BaseTool], *args, **kwargs):
+        if not SUPPORTS_DEFERRED_AGENT_ACTIONS:
+            yield from super()._iter_next_step(name_to_tool_map, *args, **kwargs)
+            return
+
+        # The agent actions are deferred while the step is planned, and then performed together
+        reset_token = _defer_agent_actions.set(True)
+        try:
+            steps = list(super()._iter_next_step(name_to_tool_map, *args, **kwargs))
+        finally:
+            _defer_agent_actions.reset(reset_token)
+
+        deferred_actions = [step for step in steps if isinstance(step, functools.partial)]
+        concurrency_safe = [
+            is_concurrency_safe(name_to_tool_map.get(action.keywords["agent_action"].tool))
+            for action in deferred_actions
+        ]
+        yield from (step for step in steps if not isinstance(step, functools.partial))
+        yield from run_concurrently(deferred_actions, concurrency_safe=concurrency_safe)
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        if _defer_agent_actions.get():
+            return functools.partial(
+                super()._perform_agent_action,
+                name_to_tool_map,
+                color_mapping,
+                agent_action=agent_action,
+                run_manager=run_manager,
+            )
+        return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
@@ -1,5 +1,7 @@
+import copy
 from typing import Any, Self
 
+from django.db import transaction
 from django.utils import timezone
 
 from apps.channels.models import ChannelPlatform
@@ -8,11 +10,11 @@ from apps.utils.time import pretty_date
 
 
 class PromptTemplateContext:
-    def __init__(self, session, source_material_id: int = None):
+    def __init__(self, session, source_material_id: int = None, participant_data_proxy: "ParticipantDataProxy" = None):
         self.session = session
         self.source_material_id = source_material_id
         self.context_cache = {}
-        self.participant_data_proxy = ParticipantDataProxy(self.session)
+        self.participant_data_proxy = participant_data_proxy or ParticipantDataProxy(self.session)
 
     @property
     def factories(self):
@@ -142,15 +144,24 @@ EMPTY = SafeAccessWrapper(None)
 
 
 class ParticipantDataProxy:
-    """Allows multiple access without needing to re-fetch from the DB"""
+    """Allows multiple access without needing to re-fetch from the DB.
 
-    def __init__(self, experiment_session):
+    When `defer_writes` is set, changes are kept in memory until `flush` is called. Reads made in the meantime
+    see the pending changes.
+    """
+
+    def __init__(self, experiment_session, defer_writes: bool = False):
         self.session = experiment_session
+        self.defer_writes = defer_writes
         self._participant_data = None
         self._scheduled_messages = None
+        self._saved_data = None
+        self._has_pending_changes = False
 
     @classmethod
     def from_state(cls, pipeline_state) -> Self:
+        if unit_of_work := pipeline_state.get("unit_of_work"):
+            return unit_of_work.participant_data_proxy
         # using `.get` here for the sake of tests. In practice the session should always be present
         return cls(pipeline_state.get("experiment_session"))
 
@@ -161,21 +172,54 @@ class ParticipantDataProxy:
                 experiment_id=self.session.experiment_id,
                 team_id=self.session.team_id,
             )
+            if self.defer_writes:
+                self._saved_data = copy.deepcopy(self._participant_data.data)
         return self._participant_data
 
     def get(self):
         data = self._get_db_object().data
         return self.session.participant.global_data | data
 
+    def get_experiment_data(self) -> dict:
+        """Returns the participant data for the current experiment, without the participant's global data"""
+        return self._get_db_object().data
+
     def set(self, data):
         if not isinstance(data, dict):
             raise ValueError("Data must be a dictionary")
         participant_data = self._get_db_object()
         participant_data.data = data
-        participant_data.save(update_fields=["data"])
+        if self.defer_writes:
+            self._has_pending_changes = True
+            return
 
+        participant_data.save(update_fields=["data"])
         self.session.participant.update_name_from_data(data)
 
+    def flush(self):
+        """Saves the pending changes. Only the keys that were changed or removed are applied to the latest data in
+        the DB so that updates made by other writers in the meantime (e.g. tools) are not lost.
+        """
+        if not self._has_pending_changes:
+            return
+
+        data = self._participant_data.data
+        changed = {
+            key: value for key, value in data.items() if key not in self._saved_data or self._saved_data[key] != value
+        }
+        removed = self._saved_data.keys() - data.keys()
+        with transaction.atomic():
+            participant_data = ParticipantData.objects.select_for_update().get(id=self._participant_data.id)
+            participant_data.data = {
+                key: value for key, value in participant_data.data.items() if key not in removed
+            } | changed
+            participant_data.save(update_fields=["data"])
+
+        self._participant_data.data = participant_data.data
+        self._saved_data = copy.deepcopy(participant_data.data)
+        self._has_pending_changes = False
+        self.session.participant.update_name_from_data(changed)
+
     def get_schedules(self):
         """
         Returns all active scheduled messages for the participant in the current experiment session.
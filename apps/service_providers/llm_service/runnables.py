@@ -1,3 +1,4 @@
+import functools
 import logging
 import re
 import time
@@ -5,7 +6,7 @@ from typing import TYPE_CHECKING, Any, Literal
 
 import openai
 from django.db import transaction
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import create_tool_calling_agent
 from langchain.agents.openai_assistant.base import OpenAIAssistantFinish
 from langchain_core.agents import AgentFinish
 from langchain_core.load import Serializable
@@ -19,7 +20,8 @@ from langchain_core.runnables import (
     ensure_config,
 )
 from langchain_core.runnables.config import merge_configs
-from pydantic import ConfigDict
+from langchain_core.tools import ToolException
+from pydantic import ConfigDict, ValidationError
 
 from apps.chat.agent.openapi_tool import ToolArtifact
 from apps.experiments.models import Experiment, ExperimentSession
@@ -27,6 +29,11 @@ from apps.files.models import File
 from apps.service_providers.llm_service.adapters import AssistantAdapter, ChatAdapter
 from apps.service_providers.llm_service.history_managers import ExperimentHistoryManager, PipelineHistoryManager
 from apps.service_providers.llm_service.main import OpenAIAssistantRunnable
+from apps.service_providers.llm_service.parallel_tools import (
+    ParallelToolAgentExecutor,
+    is_concurrency_safe,
+    run_concurrently,
+)
 from apps.utils.prompt import OcsPromptTemplate
 
 if TYPE_CHECKING:
@@ -160,8 +167,13 @@ class LLMChat(RunnableSerializable[str, ChainOutput]):
 
         output = ""
         context = self._get_input_chain_context()
+        # set by the caller when the output should be streamed to the user while it is being generated
+        token_callback = config.get("configurable", {}).get("token_callback")
         for token in chain.stream({**self._get_input(input), **context}, config):
-            output += self._parse_output(token)
+            parsed_token = self._parse_output(token)
+            output += parsed_token
+            if token_callback and parsed_token:
+                token_callback(parsed_token)
             if self._chat_is_cancelled():
                 return output
         return output
@@ -230,7 +242,7 @@ class AgentLLMChat(LLMChat):
     def _build_chain(self) -> Runnable[dict[str, Any], dict]:
         tools = self.adapter.get_allowed_tools()
         agent = create_tool_calling_agent(llm=self.adapter.get_chat_model(), tools=tools, prompt=self.prompt)
-        return AgentExecutor.from_agent_and_tools(
+        return ParallelToolAgentExecutor.from_agent_and_tools(
             agent=agent,
             tools=tools,
             max_execution_time=120,
@@ -609,13 +621,24 @@ class AgentAssistantChat(AssistantChat):
     def _invoke_tools(self, response) -> tuple[list, list]:
         tool_map = {tool.name: tool for tool in self.adapter.get_allowed_tools()}
 
+        def _invoke_tool(action):
+            logger.info("Invoking tool %s", action.tool)
+            tool = tool_map[action.tool]
+            try:
+                return tool.invoke(tool_call(name=action.tool, args=action.tool_input, id=action.tool_call_id))
+            except (ToolException, ValidationError) as e:
+                # the model can correct invalid arguments or handle a failed call, so the error is its output
+                logger.exception("Error invoking tool %s", action.tool)
+                return f"Error: {e}"
+
         tool_outputs = []
         tool_outputs_with_artifacts = []
 
-        for action in response:
-            logger.info("Invoking tool %s", action.tool)
-            tool = tool_map[action.tool]
-            tool_output = tool.invoke(tool_call(name=action.tool, args=action.tool_input, id=action.tool_call_id))
+        results = run_concurrently(
+            [functools.partial(_invoke_tool, action) for action in response],
+            concurrency_safe=[is_concurrency_safe(tool_map.get(action.tool)) for action in response],
+        )
+        for action, tool_output in zip(response, results, strict=True):
             if isinstance(tool_output, ToolMessage):
                 if tool_output.artifact:
                     tool_outputs_with_artifacts.append(tool_output)
@@ -1,12 +1,55 @@
 import dataclasses
+import hashlib
+import logging
+from functools import cache
 
 import google.generativeai as genai
 import tiktoken
 from anthropic._tokenizers import sync_get_tokenizer
 from google.generativeai import GenerativeModel
-from langchain_core.messages import get_buffer_string
+from langchain_core.messages import BaseMessage, get_buffer_string
 from langchain_core.outputs import LLMResult
 
+from apps.utils.lru import LRUCache
+
+logger = logging.getLogger("ocs.llm_service")
+
+DEFAULT_ENCODING_MODEL = "gpt-4"
+REMOTE_TOKEN_COUNT_CACHE_SIZE = 10_000
+
+# Token counts from providers that can only count tokens remotely, keyed by (model, text hash)
+_remote_token_count_cache = LRUCache(maxsize=REMOTE_TOKEN_COUNT_CACHE_SIZE)
+
+
+@cache
+def get_tiktoken_encoding(model: str) -> tiktoken.Encoding:
+    """Returns the encoding for `model`. Encodings are kept for the life of the process."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # fallback to gpt-4 if the model is not available for encoding
+        return tiktoken.encoding_for_model(DEFAULT_ENCODING_MODEL)
+
+
+@cache
+def get_anthropic_tokenizer():
+    return sync_get_tokenizer()
+
+
+def approximate_token_count(text: str) -> int:
+    """A local approximation of the number of tokens in `text` for models without a local tokenizer"""
+    if not text:
+        return 0
+    return len(get_tiktoken_encoding(DEFAULT_ENCODING_MODEL).encode(text))
+
+
+def _message_text(message) -> str:
+    if isinstance(message, BaseMessage):
+        return get_buffer_string([message])
+    if isinstance(message, dict):
+        return message.get("content") or ""
+    return message or ""
+
 
 class TokenCounter:
     def get_tokens_from_response(self, response: LLMResult) -> None | tuple[int, int]:
@@ -42,13 +85,14 @@ class OpenAITokenCounter(TokenCounter):
         encoding_model = self._get_encoding_model()
         return len(encoding_model.encode(text))
 
+    def get_tokens_from_messages(self, messages) -> int:
+        texts = [get_buffer_string([m]) for m in messages]
+        if not texts:
+            return 0
+        return sum(len(tokens) for tokens in self._get_encoding_model().encode_batch(texts))
+
     def _get_encoding_model(self) -> tiktoken.Encoding:
-        try:
-            return tiktoken.encoding_for_model(self.model)
-        except KeyError:
-            # fallback to gpt-4 if the model is not available for encoding
-            model = "gpt-4"
-            return tiktoken.get_encoding(model)
+        return get_tiktoken_encoding(self.model)
 
 
 class AnthropicTokenCounter(TokenCounter):
@@ -66,10 +110,16 @@ class AnthropicTokenCounter(TokenCounter):
         return input_tokens, output_tokens
 
     def get_tokens_from_text(self, text) -> int:
-        tokenizer = sync_get_tokenizer()
+        tokenizer = get_anthropic_tokenizer()
         encoded_text = tokenizer.encode(text)
         return len(encoded_text.ids)
 
+    def get_tokens_from_messages(self, messages) -> int:
+        texts = [get_buffer_string([m]) for m in messages]
+        if not texts:
+            return 0
+        return sum(len(encoding.ids) for encoding in get_anthropic_tokenizer().encode_batch(texts))
+
 
 @dataclasses.dataclass
 class GeminiTokenCounter(TokenCounter):
@@ -81,6 +131,7 @@ class GeminiTokenCounter(TokenCounter):
             raise ValueError("KEY not found!")
 
         self.client = genai.Client(api_key=self.google_api_key)
+        self.model_name = self.model
         self.model = GenerativeModel(self.model)
 
     def get_tokens_from_response(self, response: LLMResult) -> None | tuple[int, int]:
@@ -96,19 +147,23 @@ class GeminiTokenCounter(TokenCounter):
         return input_tokens, output_tokens
 
     def get_tokens_from_text(self, text: str) -> int:
+        """Token counting is a remote call for Gemini so the results are memoized. If the remote call fails, an
+        approximate count is used instead."""
         if not text:
             return 0
 
-        response = self.client.count_tokens(model=self.model, contents=text)
-        return response.total_tokens
+        cache_key = (self.model_name, hashlib.sha1(text.encode()).hexdigest())
+        if (token_count := _remote_token_count_cache.get(cache_key)) is not None:
+            return token_count
+
+        try:
+            token_count = self.client.count_tokens(model=self.model, contents=text).total_tokens
+        except Exception:
+            logger.exception("Unable to count tokens for model %s, using an approximation", self.model_name)
+            return approximate_token_count(text)
+
+        _remote_token_count_cache.set(cache_key, token_count)
+        return token_count
 
     def get_tokens_from_messages(self, messages) -> int:
-        total_tokens = 0
-        for message in messages:
-            if isinstance(message, dict) and "content" in message:
-                total_tokens += self.get_tokens_from_text(message["content"])
-            elif isinstance(message, str):
-                total_tokens += self.get_tokens_from_text(message)
-            else:
-                print("Warning: Unsupported message format.")
-        return total_tokens
+        return sum(self.get_tokens_from_text(_message_text(message)) for message in messages)
@@ -1,7 +1,9 @@
 import logging
 import uuid
+from collections.abc import Hashable
 from datetime import datetime, timedelta
-from functools import cached_property
+from functools import cached_property, partial
+from http.cookiejar import DefaultCookiePolicy
 from io import BytesIO
 from typing import ClassVar
 from urllib.parse import urljoin
@@ -9,6 +11,7 @@ from urllib.parse import urljoin
 import boto3
 import pydantic
 import requests
+import turn.request_types
 from botocore.client import Config
 from django.conf import settings
 from slack_sdk import WebClient
@@ -21,6 +24,7 @@ from apps.channels import audio
 from apps.channels.datamodels import TurnWhatsappMessage, TwilioMessage
 from apps.channels.models import ChannelPlatform
 from apps.chat.channels import MESSAGE_TYPES
+from apps.service_providers import client_pool, outbound
 from apps.service_providers.exceptions import ServiceProviderConfigError
 from apps.service_providers.speech_service import SynthesizedAudio
 
@@ -32,10 +36,22 @@ class MessagingService(pydantic.BaseModel):
     _supported_platforms: ClassVar[list]
     voice_replies_supported: ClassVar[bool] = False
     supported_message_types: ClassVar[list] = []
+    # The number of messages that an account can send per second, or None if it isn't limited
+    messages_per_second: ClassVar[float | None] = None
 
     def send_text_message(self, message: str, from_: str, to: str, platform: ChannelPlatform, **kwargs):
         raise NotImplementedError
 
+    def wait_for_rate_limit(self):
+        """Blocks until the account is allowed to send another message"""
+        if self.messages_per_second:
+            outbound.get_rate_limiter(self._type, self._rate_limit_key, self.messages_per_second).acquire()
+
+    @property
+    def _rate_limit_key(self) -> Hashable:
+        """Identifies the account that the provider's rate limit applies to"""
+        raise NotImplementedError
+
     def send_voice_message(
         self, synthetic_voice: SynthesizedAudio, from_: str, to: str, platform: ChannelPlatform, **kwargs
     ):
@@ -65,29 +81,43 @@ class TwilioService(MessagingService):
         ChannelPlatform.FACEBOOK: "messenger",
     }
     MESSAGE_CHARACTER_LIMIT: int = 1600
+    # The default throughput of WhatsApp senders
+    messages_per_second: ClassVar[float] = 80
 
     @property
     def voice_replies_supported(self):
         return bool(settings.WHATSAPP_S3_AUDIO_BUCKET)
 
+    @property
+    def _rate_limit_key(self) -> Hashable:
+        return self.account_sid
+
     @property
     def client(self) -> Client:
-        return Client(self.account_sid, self.auth_token)
+        return client_pool.get_client(
+            "twilio", (self.account_sid, self.auth_token), partial(Client, self.account_sid, self.auth_token)
+        )
 
     @property
     def s3_client(self):
-        return boto3.client(
+        key = (settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY, settings.AWS_S3_REGION)
+        return client_pool.get_client(
             "s3",
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION,
-            config=Config(signature_version="s3v4"),
+            key,
+            lambda: boto3.client(
+                "s3",
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                region_name=settings.AWS_S3_REGION,
+                config=Config(signature_version="s3v4"),
+            ),
         )
 
     def _upload_audio_file(self, synthetic_voice: SynthesizedAudio):
         file_path = f"{uuid.uuid4()}.mp3"
         audio_bytes = synthetic_voice.get_audio_bytes(format="mp3")
-        self.s3_client.upload_fileobj(
+        s3_client = self.s3_client
+        s3_client.upload_fileobj(
             BytesIO(audio_bytes),
             settings.WHATSAPP_S3_AUDIO_BUCKET,
             file_path,
@@ -99,7 +129,7 @@ class TwilioService(MessagingService):
                 "ContentType": "audio/mpeg",
             },
         )
-        return self.s3_client.generate_presigned_url(
+        return s3_client.generate_presigned_url(
             "get_object",
             Params={
                 "Bucket": settings.WHATSAPP_S3_AUDIO_BUCKET,
@@ -110,7 +140,9 @@ class TwilioService(MessagingService):
 
     def send_text_message(self, message: str, from_: str, to: str, platform: ChannelPlatform, **kwargs):
         prefix = self.TWILIO_CHANNEL_PREFIXES[platform]
+        # The parts are sent in order so that they arrive in order
         for message_text in smart_split(message, chars_per_string=self.MESSAGE_CHARACTER_LIMIT):
+            self.wait_for_rate_limit()
             self.client.messages.create(from_=f"{prefix}:{from_}", body=message_text, to=f"{prefix}:{to}")
 
     def send_voice_message(
@@ -118,6 +150,7 @@ class TwilioService(MessagingService):
     ):
         prefix = self.TWILIO_CHANNEL_PREFIXES[platform]
         public_url = self._upload_audio_file(synthetic_voice)
+        self.wait_for_rate_limit()
         self.client.messages.create(from_=f"{prefix}:{from_}", to=f"{prefix}:{to}", media_url=[public_url])
 
     def get_message_audio(self, message: TwilioMessage) -> BytesIO:
@@ -146,13 +179,21 @@ class TurnIOService(MessagingService):
     voice_replies_supported: ClassVar[bool] = True
     supported_message_types = [MESSAGE_TYPES.TEXT, MESSAGE_TYPES.VOICE]
 
+    # The default throughput of WhatsApp business numbers
+    messages_per_second: ClassVar[float] = 80
+
     auth_token: str
 
     @property
     def client(self) -> TurnClient:
-        return TurnClient(token=self.auth_token)
+        return client_pool.get_client("turn", self.auth_token, partial(TurnClient, self.auth_token))
+
+    @property
+    def _rate_limit_key(self) -> Hashable:
+        return self.auth_token
 
     def send_text_message(self, message: str, from_: str, to: str, platform: ChannelPlatform, **kwargs):
+        self.wait_for_rate_limit()
         self.client.messages.send_text(to, message)
 
     def send_voice_message(
@@ -161,6 +202,7 @@ class TurnIOService(MessagingService):
         # OGG must use the opus codec: https://whatsapp.turn.io/docs/api/media#uploading-media
         voice_audio_bytes = synthetic_voice.get_audio_bytes(format="ogg", codec="libopus")
         media_id = self.client.media.upload_media(voice_audio_bytes, content_type="audio/ogg")
+        self.wait_for_rate_limit()
         self.client.messages.send_audio(whatsapp_id=to, media_id=media_id)
 
     def get_message_audio(self, message: TurnWhatsappMessage) -> BytesIO:
@@ -169,6 +211,29 @@ class TurnIOService(MessagingService):
         return audio.convert_audio(ogg_audio, target_format="wav", source_format="ogg")
 
 
+class _SharedSessionRequests:
+    """Stands in for the `requests` module in the Turn library, which makes every request with `requests.request`
+    and so opens a new connection for each one. Its requests are made with a shared session instead so that
+    connections are reused."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        # The session is shared by all accounts, which are identified by the authorization header of each request
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+turn_requests = _SharedSessionRequests()
+# If a later version of the library doesn't use the `requests` module like this, it makes its requests as before
+if getattr(turn.request_types, "requests", None) is requests:
+    turn.request_types.requests = turn_requests
+
+
 class SureAdhereService(MessagingService):
     _type: ClassVar[str] = "sureadhere"
     supported_platforms: ClassVar[list] = [ChannelPlatform.SUREADHERE]
@@ -181,6 +246,10 @@ class SureAdhereService(MessagingService):
     base_url: str
     auth_url: str
 
+    @property
+    def session(self) -> requests.Session:
+        return client_pool.get_http_session("sureadhere", (self.base_url, self.client_id, self.client_secret))
+
     def get_access_token(self):
         auth_data = {
             "grant_type": "client_credentials",
@@ -188,7 +257,7 @@ class SureAdhereService(MessagingService):
             "client_secret": self.client_secret,
             "scope": self.client_scope,
         }
-        response = requests.post(self.auth_url, data=auth_data)
+        response = self.session.post(self.auth_url, data=auth_data)
         response.raise_for_status()
         return response.json()["access_token"]
 
@@ -197,7 +266,7 @@ class SureAdhereService(MessagingService):
         send_msg_url = urljoin(self.base_url, "/treatment/external/send-msg")
         headers = {"Content-Type": "application/json", "Authorization": f"Bearer {access_token}"}
         data = {"patient_Id": to, "message_Body": message}
-        response = requests.post(send_msg_url, headers=headers, json=data)
+        response = self.session.post(send_msg_url, headers=headers, json=data)
         response.raise_for_status()
 
 
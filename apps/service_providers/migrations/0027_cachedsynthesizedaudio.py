@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-18 06:19
+
+import apps.utils.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_providers', '0026_add_google_gemini_models'),
+        ('teams', '0008_create_speculative_safety_layers_flag'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedSynthesizedAudio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(upload_to='voice_cache/')),
+                ('format', models.CharField(max_length=16)),
+                ('duration', models.FloatField()),
+                ('size', models.PositiveIntegerField()),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teams.team', verbose_name='Team')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(models.Model, apps.utils.models.VersioningMixin),
+        ),
+    ]
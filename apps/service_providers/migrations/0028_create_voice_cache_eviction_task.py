@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_periodic_task(apps, schema_editor):
+    IntervalSchedule = apps.get_model("django_celery_beat", "IntervalSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    schedule, _ = IntervalSchedule.objects.get_or_create(
+        every=1,
+        period="hours",
+    )
+    PeriodicTask.objects.get_or_create(
+        name="service_providers.tasks.evict_synthesized_audio",
+        task="apps.service_providers.tasks.evict_synthesized_audio",
+        interval=schedule,
+    )
+
+
+def delete_periodic_task(apps, schema_editor):
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(name="service_providers.tasks.evict_synthesized_audio").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_providers", "0027_cachedsynthesizedaudio"),
+        ("django_celery_beat", "0018_improve_crontab_helptext"),
+    ]
+
+    operations = [migrations.RunPython(create_periodic_task, delete_periodic_task)]
@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import IntegrityError, models, transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.functional import classproperty
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
@@ -326,6 +327,18 @@ class VoiceProvider(BaseTeamModel, ProviderMixin):
         return super().delete()
 
 
+class CachedSynthesizedAudio(BaseTeamModel):
+    """Synthesized audio of text that is sent repeatedly. See `apps.service_providers.voice_cache`."""
+
+    # Hash of the voice provider, the synthetic voice and the text
+    cache_key = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to="voice_cache/")
+    format = models.CharField(max_length=16)
+    duration = models.FloatField()
+    size = models.PositiveIntegerField()
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+
 class MessagingProviderType(models.TextChoices):
     twilio = "twilio", _("Twilio")
     turnio = "turnio", _("Turn.io")
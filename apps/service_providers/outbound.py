@@ -0,0 +1,136 @@
+"""Rate limiting and concurrent dispatch of outbound messages.
+
+Messaging providers limit the number of messages that an account can send per second. The rate limit of an account is
+shared by all processes using a token bucket in Redis, so concurrent sends (e.g. scheduled messages that are dispatched
+by several workers) don't exceed the provider's limit. If Redis is not available, sends are limited per process.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import TypeVar
+
+import redis
+from django.conf import settings
+from django.db import connections
+
+from apps.utils.lru import LRUCache
+
+logger = logging.getLogger("ocs.messaging")
+
+RATE_LIMITER_CACHE_SIZE = 256
+
+_rate_limiters = LRUCache(maxsize=RATE_LIMITER_CACHE_SIZE)
+
+T = TypeVar("T")
+
+# Reserves a call in the bucket stored at KEYS[1] for a rate of ARGV[1] calls per second and returns how long the
+# caller must wait before making the call. The bucket holds the time at which it will be full again, which is pushed
+# back by each call, and up to a second's worth of calls are allowed in a burst. The time of the Redis server is used
+# so that the clocks of the callers don't matter.
+ACQUIRE_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local full_at = math.max(tonumber(redis.call("GET", KEYS[1]) or now), now) + 1 / tonumber(ARGV[1])
+redis.call("SET", KEYS[1], string.format("%.6f", full_at), "PX", math.ceil((full_at - now) * 1000))
+return string.format("%.6f", math.max(0, full_at - now - 1))
+"""
+
+
+class RateLimiter:
+    """A thread safe token bucket that allows `rate` calls to `acquire` per second, with bursts of up to `rate`
+    calls."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call is allowed"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve a token before waiting so that concurrent callers queue up behind each other
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class SharedRateLimiter:
+    """A token bucket like `RateLimiter` that is stored in Redis so that it is shared between processes. Falls back
+    to a per process limiter if Redis is not available."""
+
+    def __init__(self, key: str, rate: float):
+        self.key = key
+        self.rate = rate
+        self._fallback = RateLimiter(rate)
+
+    def acquire(self):
+        """Blocks until a call is allowed"""
+        try:
+            wait = float(_get_acquire_script()(keys=[self.key], args=[self.rate]))
+        except redis.RedisError:
+            logger.exception("Unable to use the shared rate limiter %s", self.key)
+            self._fallback.acquire()
+            return
+
+        if wait:
+            time.sleep(wait)
+
+
+def get_rate_limiter(provider_type: str, key: Hashable, rate: float) -> SharedRateLimiter:
+    """Returns the rate limiter of the provider account identified by `key`"""
+    cache_key = (provider_type, key, rate)
+    limiter = _rate_limiters.get(cache_key)
+    if limiter is None:
+        # account keys can be credentials, so they are hashed
+        account_hash = hashlib.sha256(str(key).encode()).hexdigest()
+        limiter = SharedRateLimiter(f"outbound_rate_limit:{provider_type}:{account_hash}", rate)
+        _rate_limiters.set(cache_key, limiter)
+    return limiter
+
+
+@cache
+def _get_acquire_script():
+    return redis.Redis.from_url(settings.REDIS_URL).register_script(ACQUIRE_SCRIPT)
+
+
+def dispatch(batches: Iterable[Sequence[T]], send: Callable[[T], None], max_workers: int | None = None):
+    """Calls `send` for every item of `batches` using a bounded pool of threads.
+
+    Batches are sent concurrently, but the items of a batch are sent in order by the same thread e.g. so that the
+    messages to a participant arrive in the order they were scheduled. Exceptions raised by `send` are logged and
+    don't stop the remaining items from being sent.
+    """
+    max_workers = max_workers or settings.OUTBOUND_DISPATCH_MAX_WORKERS
+    if max_workers == 1:
+        for batch in batches:
+            _send_batch(batch, send)
+        return
+
+    def _send_batch_in_thread(batch: Sequence[T]):
+        try:
+            _send_batch(batch, send)
+        finally:
+            # The thread's database connections are not managed by Django
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="outbound") as executor:
+        # consume the results to wait for all batches
+        list(executor.map(_send_batch_in_thread, batches))
+
+
+def _send_batch(batch: Sequence[T], send: Callable[[T], None]):
+    for item in batch:
+        try:
+            send(item)
+        except Exception:
+            logger.exception("Error dispatching outbound message")
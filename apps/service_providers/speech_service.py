@@ -10,9 +10,8 @@ import boto3
 import pydantic
 import requests
 from openai import OpenAI
-from pydub import AudioSegment
 
-from apps.channels.audio import convert_audio
+from apps.channels.audio import convert_audio, get_audio_duration
 from apps.chat.exceptions import AudioSynthesizeException, AudioTranscriptionException
 from apps.experiments.models import SyntheticVoice
 
@@ -83,13 +82,11 @@ class AWSSpeechService(SpeechService):
         )
 
         audio_stream = response["AudioStream"]
-        audio_data = audio_stream.read()
-
-        audio_segment = AudioSegment.from_file(BytesIO(audio_data), format="mp3")
-        duration_seconds = len(audio_segment) / 1000  # Convert milliseconds to seconds
-
         with closing(audio_stream):
-            return SynthesizedAudio(audio=BytesIO(audio_data), duration=duration_seconds, format="mp3")
+            audio_data = audio_stream.read()
+
+        duration_seconds = get_audio_duration(audio_data, format="mp3")
+        return SynthesizedAudio(audio=BytesIO(audio_data), duration=duration_seconds, format="mp3")
 
 
 class AzureSpeechService(SpeechService):
@@ -119,14 +116,11 @@ class AzureSpeechService(SpeechService):
 
             # Check if synthesis was successful
             if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                audio_segment = AudioSegment.from_file(
-                    temp_file.name, format="wav"
-                )  # Azure returns audio in WAV format
-                duration_seconds = len(audio_segment) / 1000  # Convert milliseconds to seconds
-
                 with open(temp_file.name, "rb") as f:
                     file_content = f.read()
 
+                # Azure returns audio in WAV format
+                duration_seconds = get_audio_duration(file_content, format="wav")
                 return SynthesizedAudio(audio=BytesIO(file_content), duration=duration_seconds, format="wav")
             elif result.reason == speechsdk.ResultReason.Canceled:
                 cancellation_details = result.cancellation_details
@@ -180,8 +174,7 @@ class OpenAISpeechService(SpeechService):
         response = self._client.audio.speech.create(model="tts-1", voice=synthetic_voice.name, input=text)
         audio_data = response.read()
 
-        audio_segment = AudioSegment.from_file(BytesIO(audio_data), format="mp3")
-        duration_seconds = len(audio_segment) / 1000  # Convert milliseconds to seconds
+        duration_seconds = get_audio_duration(audio_data, format="mp3")
         return SynthesizedAudio(audio=BytesIO(audio_data), duration=duration_seconds, format="mp3")
 
     def _transcribe_audio(self, audio: BytesIO) -> str:
@@ -222,10 +215,8 @@ class OpenAIVoiceEngineSpeechService(SpeechService):
         response = requests.post(url, headers=headers, data=data, files=files)
 
         if response.status_code == 200:
-            audio_data = BytesIO(response.content)
-            audio_segment = AudioSegment.from_file(audio_data, format="mp3")
-            audio_data.seek(0)
-            return SynthesizedAudio(audio=audio_data, duration=audio_segment.duration_seconds, format="mp3")
+            duration_seconds = get_audio_duration(response.content, format="mp3")
+            return SynthesizedAudio(audio=BytesIO(response.content), duration=duration_seconds, format="mp3")
         else:
             msg = f"Error synthesizing voice with OpenAI Voice Engine. Response status: {response.status_code}."
             raise AudioSynthesizeException(msg)
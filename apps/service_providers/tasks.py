@@ -0,0 +1,8 @@
+from celery.app import shared_task
+
+from apps.service_providers import voice_cache
+
+
+@shared_task(ignore_result=True)
+def evict_synthesized_audio():
+    voice_cache.evict_least_recently_used()
@@ -19,6 +19,7 @@ from apps.chat.agent.tools import TOOL_CLASS_MAP
 from apps.chat.models import Chat, ChatAttachment, ChatMessage, ChatMessageType
 from apps.service_providers.llm_service.adapters import AssistantAdapter
 from apps.service_providers.llm_service.history_managers import ExperimentHistoryManager
+from apps.service_providers.llm_service.main import OpenAIAssistantRunnable
 from apps.service_providers.llm_service.runnables import (
     AssistantChat,
     GenerationCancelled,
@@ -68,19 +69,15 @@ def db_session(request):
 @patch("apps.service_providers.llm_service.adapters.AssistantAdapter.get_attachments", Mock())
 @patch("apps.service_providers.llm_service.runnables.AssistantChat._get_output_with_annotations")
 @patch("openai.resources.beta.threads.messages.Messages.list")
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
-def test_assistant_conversation_new_chat(
-    create_and_run, retrieve_run, list_messages, save_response_annotations, session
-):
+def test_assistant_conversation_new_chat(create_and_run, list_messages, save_response_annotations, session):
     save_response_annotations.return_value = ("ai response", {})
     chat = session.chat
     assert chat.get_metadata(Chat.MetadataKeys.OPENAI_THREAD_ID) is None
 
     thread_id = "test_thread_id"
     run = _create_run(ASSISTANT_ID, thread_id)
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
 
     list_messages.return_value.data = _create_thread_messages(
         ASSISTANT_ID, run.id, thread_id, [{"assistant": "ai response"}]
@@ -93,6 +90,50 @@ def test_assistant_conversation_new_chat(
     assert chat.get_metadata(Chat.MetadataKeys.OPENAI_THREAD_ID) == thread_id
 
 
+def test_assistant_run_polling_backs_off():
+    runnable = OpenAIAssistantRunnable(assistant_id=ASSISTANT_ID, client=Mock())
+    poll_intervals = runnable._poll_intervals()
+    assert [next(poll_intervals) for _ in range(5)] == [0.25, 0.5, 1, 1, 1]
+
+
+def test_assistant_run_is_read_from_the_run_stream():
+    client = Mock()
+    runnable = OpenAIAssistantRunnable(assistant_id=ASSISTANT_ID, client=client)
+    in_progress_run = _create_run(ASSISTANT_ID, "thread_id", status="in_progress")
+    completed_run = _create_run(ASSISTANT_ID, "thread_id")
+    step_event = Mock(event="thread.run.step.completed", data=Mock(status="completed"))
+    client.beta.threads.runs.create.return_value = [
+        *_run_stream(in_progress_run),
+        step_event,
+        *_run_stream(completed_run),
+    ]
+
+    assert runnable._create_run({"thread_id": "thread_id", "tools": []}) == completed_run
+    assert client.beta.threads.runs.create.call_args == mock.call(
+        "thread_id", assistant_id=ASSISTANT_ID, stream=True, tools=[]
+    )
+    client.beta.threads.runs.retrieve.assert_not_called()
+
+
+def test_assistant_run_is_polled_when_the_run_stream_ends_early():
+    client = Mock()
+    runnable = OpenAIAssistantRunnable(assistant_id=ASSISTANT_ID, client=client)
+    completed_run = _create_run(ASSISTANT_ID, "thread_id")
+    client.beta.threads.runs.create.return_value = _run_stream(_create_run(ASSISTANT_ID, "thread_id", "in_progress"))
+    client.beta.threads.runs.retrieve.return_value = completed_run
+
+    assert runnable._create_run({"thread_id": "thread_id"}) == completed_run
+
+
+def test_assistant_run_stream_errors():
+    client = Mock()
+    runnable = OpenAIAssistantRunnable(assistant_id=ASSISTANT_ID, client=client)
+    client.beta.threads.runs.create.return_value = [Mock(event="error", data=Mock(message="Server error"))]
+
+    with pytest.raises(ValueError, match="Server error"):
+        runnable._create_run({"thread_id": "thread_id"})
+
+
 @patch("apps.chat.agent.tools.get_custom_action_tools", Mock(return_value=[]))
 @patch(
     "apps.service_providers.llm_service.adapters.AssistantAdapter.get_messages_to_sync_to_thread",
@@ -103,10 +144,9 @@ def test_assistant_conversation_new_chat(
 @patch("apps.service_providers.llm_service.runnables.AssistantChat._get_output_with_annotations")
 @patch("openai.resources.beta.threads.messages.Messages.list")
 @patch("openai.resources.beta.threads.messages.Messages.create")
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.threads.runs.Runs.create")
 def test_assistant_conversation_existing_chat(
-    create_run, retrieve_run, create_message, list_messages, save_response_annotations, session
+    create_run, create_message, list_messages, save_response_annotations, session
 ):
     ai_response = "ai response"
     save_response_annotations.return_value = (ai_response, {})
@@ -115,8 +155,7 @@ def test_assistant_conversation_existing_chat(
     chat.set_metadata(chat.MetadataKeys.OPENAI_THREAD_ID, thread_id)
 
     run = _create_run(ASSISTANT_ID, thread_id)
-    create_run.return_value = run
-    retrieve_run.return_value = run
+    create_run.return_value = _run_stream(run)
     list_messages.return_value.data = _create_thread_messages(
         ASSISTANT_ID, run.id, thread_id, [{"assistant": ai_response}]
     )
@@ -138,11 +177,8 @@ def test_assistant_conversation_existing_chat(
 @patch("apps.service_providers.llm_service.adapters.AssistantAdapter.get_attachments", Mock())
 @patch("apps.service_providers.llm_service.runnables.AssistantChat._get_output_with_annotations")
 @patch("openai.resources.beta.threads.messages.Messages.list")
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
-def test_assistant_conversation_input_formatting(
-    create_and_run, retrieve_run, list_messages, save_response_annotations, session
-):
+def test_assistant_conversation_input_formatting(create_and_run, list_messages, save_response_annotations, session):
     ai_response = "ai response"
     save_response_annotations.return_value = (ai_response, {})
 
@@ -153,8 +189,7 @@ def test_assistant_conversation_input_formatting(
 
     thread_id = "test_thread_id"
     run = _create_run(ASSISTANT_ID, thread_id)
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
     list_messages.return_value.data = _create_thread_messages(
         ASSISTANT_ID, run.id, thread_id, [{"assistant": "ai response"}]
     )
@@ -173,18 +208,16 @@ def test_assistant_conversation_input_formatting(
 @patch("apps.service_providers.llm_service.adapters.AssistantAdapter.get_file_type_info")
 @patch("apps.service_providers.llm_service.runnables.AssistantChat._get_output_with_annotations")
 @patch("openai.resources.beta.threads.messages.Messages.list")
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
 def test_assistant_includes_file_type_information(
-    create_and_run, retrieve_run, list_messages, save_response_annotations, get_file_type_info, session
+    create_and_run, list_messages, save_response_annotations, get_file_type_info, session
 ):
     ai_response = "ai response"
     save_response_annotations.return_value = (ai_response, {})
 
     thread_id = "test_thread_id"
     run = _create_run(ASSISTANT_ID, thread_id)
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
     get_file_type_info.return_value = [{"file-12345": "application/fmt"}]
     list_messages.return_value.data = _create_thread_messages(
         ASSISTANT_ID, run.id, thread_id, [{"assistant": ai_response}]
@@ -297,13 +330,12 @@ def test_assistant_runnable_cancels_existing_run(save_response_annotations, resp
 @pytest.mark.django_db()
 @patch("apps.assistants.sync.create_files_remote")
 @patch("openai.resources.beta.threads.messages.Messages.list")
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
 @patch(
     "apps.service_providers.llm_service.runnables.AssistantChat._get_output_with_annotations",
     new=Mock(return_value=("ai response", {})),
 )
-def test_assistant_uploads_new_file(create_and_run, retrieve_run, list_messages, create_files_remote, db_session):
+def test_assistant_uploads_new_file(create_and_run, list_messages, create_files_remote, db_session):
     """Test that attachments are uploaded to OpenAI and that its remote file ids are stored on the chat message"""
     session = db_session
     create_files_remote.return_value = ["openai-file-1", "openai-file-2"]
@@ -313,8 +345,7 @@ def test_assistant_uploads_new_file(create_and_run, retrieve_run, list_messages,
 
     thread_id = "test_thread_id"
     run = _create_run(ASSISTANT_ID, thread_id)
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
     list_messages.return_value.data = _create_thread_messages(
         ASSISTANT_ID, run.id, thread_id, [{"assistant": "ai response"}]
     )
@@ -337,13 +368,11 @@ def test_assistant_uploads_new_file(create_and_run, retrieve_run, list_messages,
 @pytest.mark.parametrize("cited_file_missing", [False, True])
 @patch("openai.resources.files.Files.retrieve")
 @patch("apps.assistants.sync.get_and_store_openai_file")
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
 @patch("openai.resources.beta.threads.messages.Messages.list")
 def test_assistant_response_with_annotations(
     list_messages,
     create_and_run,
-    retrieve_run,
     get_and_store_openai_file,
     retrieve_openai_file,
     cited_file_missing,
@@ -415,8 +444,7 @@ def test_assistant_response_with_annotations(
         ASSISTANT_ID, run.id, thread_id, [{"assistant": ai_message}], annotations
     )
 
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
 
     # Run assistant
     result = assistant.invoke("test", attachments=[])
@@ -449,13 +477,11 @@ def test_assistant_response_with_annotations(
 
 @pytest.mark.django_db()
 @pytest.mark.parametrize("allow_file_downloads", [False, True])
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
 @patch("openai.resources.beta.threads.messages.Messages.list")
 def test_assistant_response_with_annotations_and_assistant_file(
     list_messages,
     create_and_run,
-    retrieve_run,
     allow_file_downloads,
 ):
     """Test that cited files are rendered correctly in AI messsages"""
@@ -490,8 +516,7 @@ def test_assistant_response_with_annotations_and_assistant_file(
         ASSISTANT_ID, run.id, thread_id, [{"assistant": ai_message}], annotations, include_image_file=False
     )
 
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
 
     # Run assistant
     result = assistant.invoke("test", attachments=[])
@@ -513,13 +538,11 @@ def test_assistant_response_with_annotations_and_assistant_file(
 @pytest.mark.django_db()
 @patch("openai.resources.files.Files.retrieve")
 @patch("apps.assistants.sync.get_and_store_openai_file")
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
 @patch("openai.resources.beta.threads.messages.Messages.list")
 def test_assistant_response_with_image_file_content_block(
     list_messages,
     create_and_run,
-    retrieve_run,
     get_and_store_openai_file,
     retrieve_openai_file,
     db_session,
@@ -544,8 +567,7 @@ def test_assistant_response_with_image_file_content_block(
     thread_id = "test_thread_id"
     run = _create_run(ASSISTANT_ID, thread_id)
     list_messages.return_value.data = _create_thread_messages(ASSISTANT_ID, run.id, thread_id, [{"assistant": "Ola"}])
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
     assistant = create_experiment_runnable(db_session.experiment, db_session)
 
     # Run assistant
@@ -692,6 +714,11 @@ def _create_run(
     return run
 
 
+def _run_stream(*runs: Run) -> list:
+    """The events of a run stream in which the run moves through the statuses of `runs`"""
+    return [Mock(event=f"thread.run.{run.status}", data=run) for run in runs]
+
+
 @pytest.mark.django_db()
 @patch("apps.service_providers.llm_service.runnables.AssistantChat._sync_messages_to_thread")
 def test_input_message_is_saved_on_chain_error(sync_messages_to_thread, db_session):
@@ -707,13 +734,11 @@ def test_input_message_is_saved_on_chain_error(sync_messages_to_thread, db_sessi
 
 
 @pytest.mark.django_db()
-@patch("openai.resources.beta.threads.runs.Runs.retrieve")
 @patch("openai.resources.beta.Threads.create_and_run")
 @patch("openai.resources.beta.threads.messages.Messages.list")
 def test_assistant_empty_messages_list(
     list_messages,
     create_and_run,
-    retrieve_run,
     db_session,
 ):
     """
@@ -725,8 +750,7 @@ def test_assistant_empty_messages_list(
     # Set up OpenAI thread and run
     thread_id = "test_thread_id"
     run = _create_run(ASSISTANT_ID, thread_id)
-    create_and_run.return_value = run
-    retrieve_run.return_value = run
+    create_and_run.return_value = _run_stream(run)
 
     # Mock an empty messages list
     list_messages.return_value.data = []
@@ -13,7 +13,7 @@ from apps.chat.agent.openapi_tool import ToolArtifact
 from apps.service_providers.llm_service.adapters import AssistantAdapter
 from apps.service_providers.llm_service.history_managers import ExperimentHistoryManager
 from apps.service_providers.llm_service.runnables import AgentAssistantChat
-from apps.service_providers.tests.test_assistant_runnable import _create_run, _create_thread_messages
+from apps.service_providers.tests.test_assistant_runnable import _create_run, _create_thread_messages, _run_stream
 from apps.utils.factories.assistants import OpenAiAssistantFactory
 from apps.utils.factories.experiment import ExperimentSessionFactory
 from apps.utils.langchain import build_fake_llm_service
@@ -40,7 +40,7 @@ def session(fake_llm_service):
 @pytest.mark.django_db()
 def test_assistant_tool_response(submit_tool_outputs, session):
     with configure_common_mocks(session) as run:
-        submit_tool_outputs.return_value = run
+        submit_tool_outputs.return_value = _run_stream(_create_run(run.assistant_id, run.thread_id))
         tool = _make_tool_for_testing("test tool output")
         runnable = get_runnable(session, tool)
         result = runnable.invoke("test")
@@ -53,6 +53,7 @@ def test_assistant_tool_response(submit_tool_outputs, session):
             "tool_outputs": [{"output": "test tool output", "tool_call_id": "call1"}],
             "run_id": "test",
             "thread_id": "test_thread_id",
+            "stream": True,
         },
     )
 
@@ -69,7 +70,7 @@ def test_assistant_tool_artifact_response(create_run, create_message, create_fil
     session.experiment.assistant.builtin_tools = builtin_tools
 
     with configure_common_mocks(session) as run:
-        create_run.return_value = run
+        create_run.return_value = _run_stream(_create_run(run.assistant_id, run.thread_id))
 
         # mock the tool so that it returns an artifact. This should trigger the file upload workflow
         artifact = ToolArtifact(content=b"test artifact", name="test_artifact.txt", content_type="text/plain")
@@ -99,7 +100,12 @@ def test_assistant_tool_artifact_response(create_run, create_message, create_fil
     )
     # check that the run was created with the correct tools (excluding the artifact tool)
     assert create_run.call_args_list == [
-        mock.call("test_thread_id", assistant_id="assistant_1", tools=[{"type": tool} for tool in builtin_tools])
+        mock.call(
+            "test_thread_id",
+            assistant_id="assistant_1",
+            stream=True,
+            tools=[{"type": tool} for tool in builtin_tools],
+        )
     ]
 
 
@@ -133,13 +139,9 @@ def configure_common_mocks(session):
                 type="submit_tool_outputs",
             ),
         )
-        create_and_run.return_value = run
-        # 1st call on initial invoke, 2nd after tool message
-        retrieve_run.side_effect = [
-            run,  # 1st call on initial invoke
-            _create_run(assistant_id, thread_id),  # send call waiting for cancellation
-            _create_run(assistant_id, thread_id),  # 3rd call after tool message
-        ]
+        create_and_run.return_value = _run_stream(run)
+        # the tool artifact run is cancelled
+        retrieve_run.return_value = _create_run(assistant_id, thread_id, status="cancelled")
         list_messages.return_value.data = _create_thread_messages(
             assistant_id, run.id, thread_id, [{"assistant": "ai response"}]
         )
@@ -1,10 +1,23 @@
+import json
+from unittest.mock import Mock, patch
+
 import pytest
+import requests
 from pydantic import ValidationError
 
 from apps.channels.models import ChannelPlatform
+from apps.service_providers import client_pool
+from apps.service_providers.messaging_service import TurnIOService, TwilioService, turn_requests
 from apps.service_providers.models import MessagingProvider, MessagingProviderType
 
 
+@pytest.fixture()
+def _clear_client_pool():
+    client_pool.clear()
+    yield
+    client_pool.clear()
+
+
 def test_twilio_messaging_provider(team_with_users):
     _test_messaging_provider(
         team_with_users,
@@ -51,6 +64,38 @@ def test_platform_supported_platforms(platform: str, expected_provider_types: li
     assert provider_types == expected_provider_types
 
 
+@pytest.mark.usefixtures("_clear_client_pool")
+def test_clients_are_pooled_by_credentials():
+    service = TwilioService(account_sid="account_sid", auth_token="auth_token")
+    client = service.client
+
+    assert TwilioService(account_sid="account_sid", auth_token="auth_token").client is client
+    assert TwilioService(account_sid="account_sid", auth_token="new_token").client is not client
+    assert client_pool.get_pool_stats() == {"twilio": {"created": 2, "reused": 1}}
+
+
+@pytest.mark.usefixtures("_clear_client_pool")
+@patch("requests.request", Mock(side_effect=AssertionError("requests must use the session")))
+def test_turn_requests_share_a_session():
+    client = TurnIOService(auth_token="auth_token").client
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps({"messages": [{"id": "1"}], "media": [{"id": "2"}]}).encode()
+    with patch.object(turn_requests.session, "send", return_value=response) as send:
+        client.messages.send_text("27123456789", "Hi")
+        client.media.upload_media(b"audio", content_type="audio/ogg")
+
+    requests_sent = [call.args[0] for call in send.call_args_list]
+    assert [(request.method, request.url) for request in requests_sent] == [
+        ("POST", "https://whatsapp.turn.io/v1/messages"),
+        ("POST", "https://whatsapp.turn.io/v1/media"),
+    ]
+    assert requests_sent[0].headers["Authorization"] == "Bearer auth_token"
+    assert json.loads(requests_sent[0].body)["text"] == {"body": "Hi"}
+    assert requests_sent[1].headers["Content-Type"] == "audio/ogg"
+    assert TurnIOService(auth_token="auth_token").client is client
+
+
 def _test_messaging_provider_error(provider_type: MessagingProviderType, data):
     form = provider_type.form_cls(None, data=data)
     assert not form.is_valid()
@@ -0,0 +1,80 @@
+import threading
+from unittest.mock import Mock, patch
+
+import redis
+
+from apps.service_providers.outbound import RateLimiter, dispatch, get_rate_limiter
+
+
+@patch("apps.service_providers.outbound.time")
+def test_rate_limiter_waits_once_bursts_are_exhausted(time):
+    time.monotonic.return_value = 100
+    limiter = RateLimiter(rate=2)
+
+    limiter.acquire()
+    limiter.acquire()
+    time.sleep.assert_not_called()
+
+    # Concurrent callers queue up behind each other
+    limiter.acquire()
+    limiter.acquire()
+    assert [call.args[0] for call in time.sleep.call_args_list] == [0.5, 1]
+
+    # tokens are replenished as time passes
+    time.monotonic.return_value = 102
+    time.sleep.reset_mock()
+    limiter.acquire()
+    time.sleep.assert_not_called()
+
+
+@patch("apps.service_providers.outbound.time")
+@patch("apps.service_providers.outbound._get_acquire_script")
+def test_shared_rate_limiter_waits_for_the_reserved_call(get_acquire_script, time):
+    acquire_script = get_acquire_script.return_value
+    acquire_script.side_effect = [b"0.000000", b"0.500000"]
+    limiter = get_rate_limiter("twilio", "account-sid", rate=2)
+
+    limiter.acquire()
+    limiter.acquire()
+
+    assert limiter is get_rate_limiter("twilio", "account-sid", rate=2)
+    assert "account-sid" not in limiter.key
+    assert acquire_script.call_args.kwargs == {"keys": [limiter.key], "args": [2]}
+    assert [call.args[0] for call in time.sleep.call_args_list] == [0.5]
+
+
+@patch("apps.service_providers.outbound.time")
+@patch("apps.service_providers.outbound._get_acquire_script")
+def test_shared_rate_limiter_falls_back_to_the_process(get_acquire_script, time):
+    get_acquire_script.return_value.side_effect = redis.ConnectionError()
+    time.monotonic.return_value = 100
+    limiter = get_rate_limiter("turn", "auth-token", rate=1)
+
+    limiter.acquire()
+    limiter.acquire()
+
+    assert [call.args[0] for call in time.sleep.call_args_list] == [1]
+
+
+def test_dispatch_sends_batches_concurrently_and_items_in_order():
+    barrier = threading.Barrier(2, timeout=5)
+    sent = []
+
+    def send(item):
+        if item in ("a1", "b1"):
+            # only passes if the first items of both batches are sent at the same time
+            barrier.wait()
+        if item == "a2":
+            raise Exception("Provider error")
+        sent.append(item)
+
+    dispatch([["a1", "a2", "a3"], ["b1", "b2"]], send, max_workers=2)
+
+    assert sorted(sent) == ["a1", "a3", "b1", "b2"]
+    assert sent.index("a1") < sent.index("a3")
+
+
+def test_dispatch_without_batches():
+    send = Mock()
+    dispatch([], send)
+    send.assert_not_called()
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+
+import pytest
+from django.test import override_settings
+from langchain.agents import create_tool_calling_agent
+from langchain_core.messages import AIMessageChunk
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+
+from apps.service_providers.llm_service.parallel_tools import (
+    CONCURRENCY_SAFE,
+    SUPPORTS_DEFERRED_AGENT_ACTIONS,
+    ParallelToolAgentExecutor,
+    run_concurrently,
+)
+from apps.utils.langchain import FakeLlm
+
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+@override_settings(TOOL_CALL_MAX_WORKERS=4)
+def test_run_concurrently_keeps_the_order_of_results():
+    def _call(delay, result):
+        time.sleep(delay)
+        return result, request_id.get()
+
+    request_id.set("123")
+    results = run_concurrently([lambda: _call(0.1, 1), lambda: _call(0, 2), lambda: _call(0.05, 3)])
+    assert results == [(1, "123"), (2, "123"), (3, "123")]
+
+
+@override_settings(TOOL_CALL_MAX_WORKERS=4)
+def test_run_concurrently_completes_all_calls_before_raising():
+    completed = []
+
+    def _fail():
+        raise ValueError("tool failed")
+
+    def _succeed():
+        time.sleep(0.05)
+        completed.append(True)
+
+    with pytest.raises(ValueError, match="tool failed"):
+        run_concurrently([_fail, _succeed])
+    assert completed == [True]
+
+
+@override_settings(TOOL_CALL_MAX_WORKERS=4)
+def test_run_concurrently_calls_unsafe_functions_in_the_calling_thread():
+    def _call(result):
+        return result, threading.current_thread()
+
+    results = run_concurrently(
+        [lambda: _call(1), lambda: _call(2), lambda: _call(3), lambda: _call(4)],
+        concurrency_safe=[True, False, True, False],
+    )
+    assert [result for result, _thread in results] == [1, 2, 3, 4]
+    threads = [thread for _result, thread in results]
+    assert threads[0] is not threading.current_thread()
+    assert threads[2] is not threading.current_thread()
+    assert threads[1] is threads[3] is threading.current_thread()
+
+
+@override_settings(TOOL_CALL_MAX_WORKERS=4)
+def test_agent_executor_runs_tool_calls_concurrently():
+    # each tool waits for the other one, so the tools only complete if they are run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def _get_weather(city: str) -> str:
+        """Get the weather of a city"""
+        barrier.wait()
+        return f"sunny in {city}"
+
+    tool = StructuredTool.from_function(_get_weather, name="get_weather", metadata={CONCURRENCY_SAFE: True})
+    tool_call_chunks = [
+        {"name": "get_weather", "args": json.dumps({"city": city}), "id": f"call_{index}", "index": index}
+        for index, city in enumerate(["Cape Town", "Nairobi"])
+    ]
+    llm = FakeLlm(responses=[AIMessageChunk(content="", tool_call_chunks=tool_call_chunks), "It's sunny"])
+    prompt = ChatPromptTemplate.from_messages([("human", "{input}"), ("placeholder", "{agent_scratchpad}")])
+    agent = create_tool_calling_agent(llm=llm, tools=[tool], prompt=prompt)
+    executor = ParallelToolAgentExecutor.from_agent_and_tools(agent=agent, tools=[tool], return_intermediate_steps=True)
+
+    result = executor.invoke({"input": "What is the weather?"})
+
+    assert result["output"] == "It's sunny"
+    assert [observation for _action, observation in result["intermediate_steps"]] == [
+        "sunny in Cape Town",
+        "sunny in Nairobi",
+    ]
+
+
+@override_settings(TOOL_CALL_MAX_WORKERS=4)
+def test_agent_executor_runs_unsafe_tool_calls_serially():
+    threads = []
+
+    def _update_data(key: str) -> str:
+        """Update the participant's data"""
+        threads.append(threading.current_thread())
+        return f"updated {key}"
+
+    tool = StructuredTool.from_function(_update_data, name="update_data")
+    tool_call_chunks = [
+        {"name": "update_data", "args": json.dumps({"key": key}), "id": f"call_{index}", "index": index}
+        for index, key in enumerate(["name", "age"])
+    ]
+    llm = FakeLlm(responses=[AIMessageChunk(content="", tool_call_chunks=tool_call_chunks), "Done"])
+    prompt = ChatPromptTemplate.from_messages([("human", "{input}"), ("placeholder", "{agent_scratchpad}")])
+    agent = create_tool_calling_agent(llm=llm, tools=[tool], prompt=prompt)
+    executor = ParallelToolAgentExecutor.from_agent_and_tools(agent=agent, tools=[tool], return_intermediate_steps=True)
+
+    result = executor.invoke({"input": "Update my data"})
+
+    assert [observation for _action, observation in result["intermediate_steps"]] == ["updated name", "updated age"]
+    assert threads == [threading.current_thread()] * 2
+
+
+def test_installed_langchain_supports_deferred_agent_actions():
+    """Fails if an upgrade of langchain changed the private `AgentExecutor` methods that `ParallelToolAgentExecutor`
+    overrides"""
+    assert SUPPORTS_DEFERRED_AGENT_ACTIONS
@@ -0,0 +1,44 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.service_providers.llm_service import token_counters
+from apps.service_providers.llm_service.token_counters import AnthropicTokenCounter, GeminiTokenCounter
+
+
+@pytest.fixture(autouse=True)
+def _clear_token_count_cache():
+    token_counters._remote_token_count_cache.clear()
+    yield
+    token_counters._remote_token_count_cache.clear()
+
+
+def test_anthropic_token_counter_counts_messages_in_batch():
+    counter = AnthropicTokenCounter()
+    messages = [HumanMessage("Hello there"), AIMessage("Hi! How can I help you today?")]
+
+    expected = sum(counter.get_tokens_from_text(f"{m.type.title()}: {m.content}") for m in messages)
+    assert counter.get_tokens_from_messages(messages) == expected
+    assert counter.get_tokens_from_messages([]) == 0
+
+
+@patch("apps.service_providers.llm_service.token_counters.genai.Client", create=True)
+def test_gemini_token_counts_are_memoized(client_cls):
+    client_cls.return_value.count_tokens.return_value = Mock(total_tokens=5)
+    counter = GeminiTokenCounter("gemini-1.5-flash", "api-key")
+
+    assert counter.get_tokens_from_messages(["Hello", {"content": "Hello"}, HumanMessage("Hello")]) == 15
+    assert counter.get_tokens_from_text("Hello") == 5
+    # "Hello" and "Human: Hello"
+    assert client_cls.return_value.count_tokens.call_count == 2
+
+
+@patch("apps.service_providers.llm_service.token_counters.approximate_token_count", Mock(return_value=3))
+@patch("apps.service_providers.llm_service.token_counters.genai.Client", create=True)
+def test_gemini_token_count_falls_back_to_approximation(client_cls):
+    client_cls.return_value.count_tokens.side_effect = Exception("Service unavailable")
+    counter = GeminiTokenCounter("gemini-1.5-flash", "api-key")
+
+    assert counter.get_tokens_from_text("Hello") == 3
+    assert len(token_counters._remote_token_count_cache) == 0
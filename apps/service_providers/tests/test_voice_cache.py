@@ -0,0 +1,82 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from apps.service_providers import voice_cache
+from apps.service_providers.models import CachedSynthesizedAudio
+from apps.service_providers.speech_service import SynthesizedAudio
+from apps.service_providers.tasks import evict_synthesized_audio
+from apps.utils.factories.experiment import SyntheticVoiceFactory
+from apps.utils.factories.service_provider_factories import VoiceProviderFactory
+
+
+@pytest.fixture()
+def voice_provider():
+    return VoiceProviderFactory()
+
+
+@pytest.fixture()
+def synthetic_voice():
+    return SyntheticVoiceFactory()
+
+
+@pytest.fixture()
+def synthesize_voice():
+    def _synthesize_voice(text, synthetic_voice):
+        return SynthesizedAudio(audio=BytesIO(text.encode()), duration=len(text), format="mp3")
+
+    with patch("apps.service_providers.models.VoiceProvider.get_speech_service") as get_speech_service:
+        get_speech_service.return_value.synthesize_voice.side_effect = _synthesize_voice
+        yield get_speech_service.return_value.synthesize_voice
+
+
+def _synthesize(voice_provider, synthetic_voice, text):
+    audio = voice_cache.synthesize_voice(voice_provider, synthetic_voice, text)
+    return audio.audio.getvalue(), audio.duration, audio.format
+
+
+@pytest.mark.django_db()
+def test_repeated_text_is_synthesized_twice(voice_provider, synthetic_voice, synthesize_voice):
+    cache.delete(f"synthesized_text:{voice_cache.get_cache_key(voice_provider, synthetic_voice, 'Hi there')}")
+
+    for _i in range(4):
+        assert _synthesize(voice_provider, synthetic_voice, "Hi there") == (b"Hi there", 8, "mp3")
+
+    # the audio is only cached once the text is synthesized for the second time
+    assert synthesize_voice.call_count == 2
+    entry = CachedSynthesizedAudio.objects.get()
+    assert entry.team_id == voice_provider.team_id
+    assert entry.size == 8
+
+    # the cache is specific to the voice
+    _synthesize(voice_provider, SyntheticVoiceFactory(), "Hi there")
+    assert synthesize_voice.call_count == 3
+
+
+@pytest.mark.django_db()
+@override_settings(VOICE_CACHE_MAX_TEAM_SIZE=10)
+def test_least_recently_used_audio_is_evicted(voice_provider, synthetic_voice, synthesize_voice):
+    def _cache(voice_provider, text):
+        cache.delete(f"synthesized_text:{voice_cache.get_cache_key(voice_provider, synthetic_voice, text)}")
+        _synthesize(voice_provider, synthetic_voice, text)
+        _synthesize(voice_provider, synthetic_voice, text)
+
+    other_team_voice_provider = VoiceProviderFactory()
+    _cache(voice_provider, "Hello")
+    _cache(voice_provider, "Howzit")
+    _cache(other_team_voice_provider, "Hello")
+    # audio is only evicted by the periodic task
+    assert CachedSynthesizedAudio.objects.count() == 3
+
+    evict_synthesized_audio()
+
+    # "Hello" is evicted from the first team's cache, the other team's cache is within its limit
+    assert sorted(CachedSynthesizedAudio.objects.values_list("team_id", "size")) == sorted(
+        [(voice_provider.team_id, 6), (other_team_voice_provider.team_id, 5)]
+    )
+    synthesize_voice.reset_mock()
+    _synthesize(voice_provider, synthetic_voice, "Howzit")
+    synthesize_voice.assert_not_called()
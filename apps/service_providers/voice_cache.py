@@ -0,0 +1,97 @@
+"""A cache of synthesized audio for text that is sent repeatedly e.g. seed messages, reminders or the default
+responses of safety layers.
+
+Audio is cached by the hash of the voice provider, the synthetic voice and the text, and is stored in the default
+storage. Most bot responses are never repeated, so audio is only cached once its text is synthesized a second time.
+The size of each team's cache is limited to `settings.VOICE_CACHE_MAX_TEAM_SIZE` bytes. A periodic task removes the
+least recently used audio of teams that exceed it (see `evict_least_recently_used`).
+"""
+
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.experiments.models import SyntheticVoice
+from apps.service_providers.models import CachedSynthesizedAudio, VoiceProvider
+from apps.service_providers.speech_service import SynthesizedAudio
+
+logger = logging.getLogger("ocs.speech")
+
+# How long to remember that text was synthesized
+SYNTHESIZED_TEXT_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_cache_key(voice_provider: VoiceProvider, synthetic_voice: SyntheticVoice, text: str) -> str:
+    key = f"{voice_provider.id}:{synthetic_voice.id}:{synthetic_voice.file_id}:{text}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def synthesize_voice(voice_provider: VoiceProvider, synthetic_voice: SyntheticVoice, text: str) -> SynthesizedAudio:
+    """Returns the cached audio of `text` if there is any, otherwise the text is synthesized"""
+    cache_key = get_cache_key(voice_provider, synthetic_voice, text)
+    if audio := _get_cached_audio(cache_key):
+        return audio
+
+    audio = voice_provider.get_speech_service().synthesize_voice(text, synthetic_voice)
+    # `add` only succeeds the first time the text is synthesized
+    if not cache.add(f"synthesized_text:{cache_key}", True, timeout=SYNTHESIZED_TEXT_TIMEOUT):
+        _cache_audio(voice_provider.team_id, cache_key, audio)
+    return audio
+
+
+def _get_cached_audio(cache_key: str) -> SynthesizedAudio | None:
+    entry = CachedSynthesizedAudio.objects.filter(cache_key=cache_key).first()
+    if not entry:
+        return None
+
+    try:
+        with entry.file.open("rb") as audio_file:
+            audio_bytes = audio_file.read()
+    except OSError:
+        logger.exception("Unable to read cached audio %s", cache_key)
+        entry.delete()
+        return None
+
+    CachedSynthesizedAudio.objects.filter(id=entry.id).update(last_used_at=timezone.now())
+    return SynthesizedAudio(audio=BytesIO(audio_bytes), duration=entry.duration, format=entry.format)
+
+
+def _cache_audio(team_id: int, cache_key: str, audio: SynthesizedAudio):
+    audio_bytes = audio.audio.getvalue()
+    entry = CachedSynthesizedAudio(
+        team_id=team_id, cache_key=cache_key, format=audio.format, duration=audio.duration, size=len(audio_bytes)
+    )
+    entry.file.save(f"{cache_key}.{audio.format}", ContentFile(audio_bytes), save=False)
+    try:
+        with transaction.atomic():
+            entry.save()
+    except IntegrityError:
+        # The audio was cached by another process in the meantime
+        entry.file.delete(save=False)
+
+
+def evict_least_recently_used():
+    """Removes the least recently used audio of every team whose cache is larger than the maximum size"""
+    max_size = settings.VOICE_CACHE_MAX_TEAM_SIZE
+    team_sizes = (
+        CachedSynthesizedAudio.objects.values("team_id")
+        .annotate(size=Sum("size"))
+        .filter(size__gt=max_size)
+        .values_list("team_id", "size")
+    )
+    for team_id, size in team_sizes:
+        excess = size - max_size
+        entries = CachedSynthesizedAudio.objects.filter(team_id=team_id).order_by("last_used_at")
+        for entry in entries.only("id", "file", "size").iterator():
+            entry.file.delete(save=False)
+            entry.delete()
+            excess -= entry.size
+            if excess <= 0:
+                break
@@ -2,6 +2,7 @@ from slack_bolt import BoltContext
 from slack_sdk import WebClient
 from slack_sdk.http_retry import RateLimitErrorRetryHandler
 
+from apps.service_providers import client_pool
 from apps.slack.models import SlackInstallation
 from apps.slack.slack_app import app
 
@@ -19,13 +20,18 @@ def get_slack_client(installation_id: int, do_retries: bool = False) -> WebClien
         raise Exception("Unable to authenticate")
 
     token = auth_result.bot_token or auth_result.user_token
-    return WebClient(
-        token=token,
-        base_url=app.client.base_url,
-        timeout=app.client.timeout,
-        ssl=app.client.ssl,
-        proxy=app.client.proxy,
-        headers=app.client.headers,
-        team_id=installation.slack_team_id,
-        retry_handlers=[RateLimitErrorRetryHandler()] if do_retries else None,
+    # Clients are keyed by the token, so rotated tokens get a new client
+    return client_pool.get_client(
+        "slack",
+        (token, installation.slack_team_id, do_retries),
+        lambda: WebClient(
+            token=token,
+            base_url=app.client.base_url,
+            timeout=app.client.timeout,
+            ssl=app.client.ssl,
+            proxy=app.client.proxy,
+            headers=app.client.headers,
+            team_id=installation.slack_team_id,
+            retry_handlers=[RateLimitErrorRetryHandler()] if do_retries else None,
+        ),
     )
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def create_speculative_safety_layers_flag(apps, schema_editor):
+    Flag = apps.get_model('teams', 'Flag')
+    Flag.objects.get_or_create(name='speculative_safety_layers', defaults={'everyone': False})
+
+def remove_speculative_safety_layers_flag(apps, schema_editor):
+    Flag = apps.get_model('teams', 'Flag')
+    Flag.objects.filter(name='speculative_safety_layers').delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0007_create_commcare_connect_flag'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_speculative_safety_layers_flag, remove_speculative_safety_layers_flag),
+    ]
@@ -52,6 +52,7 @@ IGNORE_APPS = {
     "microsoft",  # allauth
     "otp_static",
     "otp_totp",
+    "postgres",
     "redis",  # heath_check.redis
     "rest_framework",
     "rest_framework_api_key",
@@ -72,7 +73,7 @@ IGNORE_APPS = {
     "web",
 }
 
-IGNORE_MODELS = {"teams": {"flag"}}
+IGNORE_MODELS = {"teams": {"flag"}, "service_providers": {"cachedsynthesizedaudio"}}
 
 
 def test_missing_content_types():
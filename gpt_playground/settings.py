@@ -48,6 +48,7 @@ DJANGO_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
     "django.forms",
 ]
 
@@ -314,6 +315,14 @@ AWS_ACCESS_KEY_ID = env("AWS_ACCESS_KEY_ID", default=None)
 AWS_SECRET_ACCESS_KEY = env("AWS_SECRET_ACCESS_KEY", default=None)
 AWS_S3_REGION = env("AWS_S3_REGION", default=None)
 WHATSAPP_S3_AUDIO_BUCKET = env("WHATSAPP_S3_AUDIO_BUCKET", default=None)
+# The maximum size in bytes of each team's cache of synthesized audio of repeated text
+VOICE_CACHE_MAX_TEAM_SIZE = env.int("VOICE_CACHE_MAX_TEAM_SIZE", default=100 * 1024 * 1024)
+# The number of participants that scheduled messages are sent to concurrently. Tests send them in the calling
+# thread since other threads can't see the data of the test's transaction.
+OUTBOUND_DISPATCH_MAX_WORKERS = env.int("OUTBOUND_DISPATCH_MAX_WORKERS", default=1 if IS_TESTING else 8)
+# The number of tool calls of a single LLM response that are run concurrently. Tests run them in the calling thread
+# for the same reason.
+TOOL_CALL_MAX_WORKERS = env.int("TOOL_CALL_MAX_WORKERS", default=1 if IS_TESTING else 4)
 
 USE_S3_STORAGE = env.bool("USE_S3_STORAGE", default=False)
 if USE_S3_STORAGE: